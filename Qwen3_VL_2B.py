@@ -1,7 +1,25 @@
+import os
+import copy
+import threading
+from contextlib import contextmanager
+
 import torch
-from transformers import AutoProcessor, BitsAndBytesConfig
+from transformers import (
+    AutoProcessor,
+    BatchFeature,
+    BitsAndBytesConfig,
+    LogitsProcessor,
+    LogitsProcessorList,
+    StoppingCriteria,
+    StoppingCriteriaList,
+)
+from transformers.generation.streamers import BaseStreamer
+from transformers.modeling_outputs import CausalLMOutputWithPast
 from qwen_vl_utils import process_vision_info
 
+from vision_cache import VisionEmbeddingCache
+from context_builder import ContextBuilder
+
 try:
     from transformers import Qwen3VLForConditionalGeneration as _VLModel
 except ImportError:
@@ -11,36 +29,482 @@ except ImportError:
         from transformers import AutoModelForVision2Seq as _VLModel
 
 
+class YesNoProbabilityCapture(LogitsProcessor):
+    """
+    Records the Yes/No probabilities at the first generation step and passes scores through.
+
+    Replaces output_scores=True, which keeps a vocabulary-sized tensor for every step.
+    """
+
+    def __init__(self, yes_token_id, no_token_id):
+        self.yes_token_id = yes_token_id
+        self.no_token_id = no_token_id
+        self.probs = None  # list of (p_yes, p_no) per batch row, set on the first step
+
+    def __call__(self, input_ids, scores):
+        if self.probs is None:
+            pair = scores[:, [self.yes_token_id, self.no_token_id]].float()
+            self.probs = [tuple(row) for row in torch.softmax(pair, dim=-1).tolist()]
+        return scores
+
+
+class SentenceStoppingCriteria(StoppingCriteria):
+    """
+    Stops a row once it has completed max_sentences sentences.
+
+    A sentence ends when a token ending in . ! or ? is followed by a token
+    starting with whitespace; only the last two tokens are decoded per step.
+    EOS still ends the answer earlier through the normal generate() path.
+    """
+
+    def __init__(self, tokenizer, prompt_length, max_sentences):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.max_sentences = max_sentences
+        self.counts = None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.counts is None:
+            self.counts = [0] * input_ids.shape[0]
+
+        done = []
+        for row, ids in enumerate(input_ids):
+            if ids.shape[0] - self.prompt_length >= 2:
+                previous, current = self.tokenizer.batch_decode(ids[-2:].unsqueeze(1))
+                if previous.rstrip().endswith(('.', '!', '?')) and current[:1].isspace():
+                    self.counts[row] += 1
+            done.append(self.counts[row] >= self.max_sentences)
+
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+    def fired(self, row):
+        """Whether generation for this row was cut by the sentence limit."""
+        return self.counts is not None and self.counts[row] >= self.max_sentences
+
+
+class VerdictStreamer(BaseStreamer):
+    """
+    Forwards a single-row generation to a callback as it decodes.
+
+    The first generated token is the Yes/No verdict, so a 'verdict' event
+    (with the captured confidence) is sent as soon as it exists, followed by
+    'text' events carrying each newly decoded piece of the answer.
+    """
+
+    def __init__(self, tokenizer, on_token, capture=None, emit_verdict=True, answer_prefix_ids=None, row=0):
+        self.tokenizer = tokenizer
+        self.on_token = on_token
+        self.capture = capture
+        self.row = row
+        self.emit_verdict = emit_verdict
+        self.prompt_seen = False
+        # Answer tokens already fixed before generate() (a forced verdict token)
+        self.token_ids = list(answer_prefix_ids or [])
+        self.text = ''
+
+    def put(self, value):
+        # generate() passes the prompt first; only new tokens are streamed
+        if not self.prompt_seen:
+            self.prompt_seen = True
+            return
+
+        self.token_ids.extend(value.reshape(-1).tolist())
+        text = self.tokenizer.decode(self.token_ids, skip_special_tokens=True)
+        if text.endswith('\ufffd'):
+            return  # wait for the rest of a multi-byte character
+
+        if self.emit_verdict and text.strip():
+            self.emit_verdict = False
+            is_yes = text.strip().lower().startswith('yes')
+            confidence_pct = None
+            if self.capture is not None and self.capture.probs:
+                p_yes, p_no = self.capture.probs[self.row]
+                confidence_pct = (p_yes if is_yes else p_no) * 100
+            self.on_token({'type': 'verdict', 'verdict': 'Yes' if is_yes else 'No',
+                           'confidence_pct': confidence_pct})
+
+        if len(text) > len(self.text):
+            self.on_token({'type': 'text', 'text': text[len(self.text):]})
+            self.text = text
+
+    def end(self):
+        self.on_token({'type': 'done', 'text': self.text})
+
+
+class BatchVerdictStreamer(BaseStreamer):
+    """
+    Fans a batched generation out to one VerdictStreamer per row.
+
+    Rows without a callback have no streamer. Rows that finish early keep
+    receiving pad tokens, which decode to nothing.
+    """
+
+    def __init__(self, row_streamers):
+        self.row_streamers = row_streamers
+
+    def put(self, value):
+        # The prompt arrives as (rows, length), each step as (rows,)
+        for row, streamer in enumerate(self.row_streamers):
+            if streamer is not None:
+                streamer.put(value[row])
+
+    def end(self):
+        for streamer in self.row_streamers:
+            if streamer is not None:
+                streamer.end()
+
+
+SCAM_TYPES = ('phishing', 'investment', 'giveaway', 'impersonation', 'tech_support',
+              'romance', 'job', 'shopping', 'other', 'none')
+
+
+class StructuredVerdictProcessor(LogitsProcessor):
+    """
+    Constrains generation to the compact structured verdict schema:
+
+        Yes|No
+        type: <one of SCAM_TYPES>      ('none' only after No)
+        evidence: <short text>         (0 to max_evidence lines, no line breaks inside)
+
+    Every row walks a small state machine; at each step all tokens outside
+    the allowed set are masked. Yes/No probabilities are recorded from the
+    unmasked scores at the first step, as in YesNoProbabilityCapture.
+    """
+
+    def __init__(self, tokenizer, prompt_length, eos_token_ids, text_token_mask,
+                 max_evidence=3, max_evidence_tokens=16):
+        encode = lambda text: tokenizer.encode(text, add_special_tokens=False)
+        self.prompt_length = prompt_length
+        self.eos_token_ids = list(eos_token_ids)
+        self.text_token_mask = text_token_mask
+        self.max_evidence = max_evidence
+        self.max_evidence_tokens = max_evidence_tokens
+
+        self.verdict_options = [encode("Yes"), encode("No")]
+        self.type_options = [encode(" " + scam_type) for scam_type in SCAM_TYPES]
+        self.type_literal = encode("\ntype:")
+        self.evidence_literal = encode("evidence:")
+        self.newline_id = encode("\n")[0]
+
+        self.states = None
+        self.probs = None  # list of (p_yes, p_no) per batch row, set on the first step
+
+        # Longest possible answer, used as max_new_tokens
+        self.max_new_tokens = (
+            max(map(len, self.verdict_options)) + len(self.type_literal)
+            + max(map(len, self.type_options)) + 2
+            + max_evidence * (len(self.evidence_literal) + max_evidence_tokens + 1)
+        )
+
+    def _choice(self, name, options):
+        return {'stage': 'choice', 'name': name, 'options': options, 'pos': 0}
+
+    def _literal(self, ids, then):
+        return {'stage': 'literal', 'ids': ids, 'pos': 0, 'then': then}
+
+    def _after_line(self, state):
+        """State after a newline that ends the type line or an evidence line."""
+        if state['evidence'] < self.max_evidence:
+            state['evidence'] += 1
+            state['text_length'] = 0
+            return self._literal(self.evidence_literal, {'stage': 'text'})
+        return {'stage': 'end'}
+
+    def _advance(self, state, token):
+        """Move one row's state past the token sampled at the previous step."""
+        step = state['step']
+        if token in self.eos_token_ids:
+            state['step'] = {'stage': 'done'}
+            return
+
+        if step['stage'] == 'choice':
+            pos = step['pos']
+            options = [o for o in step['options'] if len(o) > pos and o[pos] == token]
+            chosen = next((o for o in options if len(o) == pos + 1), None)
+            if chosen is None:
+                state['step'] = {**step, 'options': options, 'pos': pos + 1}
+            elif step['name'] == 'verdict':
+                is_yes = chosen == self.verdict_options[0]
+                allowed = [o for t, o in zip(SCAM_TYPES, self.type_options) if (t == 'none') != is_yes]
+                state['step'] = self._literal(self.type_literal, self._choice('type', allowed))
+            else:
+                state['step'] = {'stage': 'line_end'}
+
+        elif step['stage'] == 'literal':
+            if step['pos'] + 1 < len(step['ids']):
+                state['step'] = {**step, 'pos': step['pos'] + 1}
+            else:
+                state['step'] = step['then']
+
+        elif step['stage'] == 'line_end' or (step['stage'] == 'text' and token == self.newline_id):
+            state['step'] = self._after_line(state)
+
+        elif step['stage'] == 'text':
+            state['text_length'] += 1
+            if state['text_length'] >= self.max_evidence_tokens:
+                state['step'] = {'stage': 'line_end'}
+
+    def _allowed(self, state):
+        """Allowed token ids for a row, or None when free text is allowed."""
+        step = state['step']
+        if step['stage'] == 'choice':
+            return sorted({o[step['pos']] for o in step['options']})
+        if step['stage'] == 'literal':
+            return [step['ids'][step['pos']]]
+        if step['stage'] == 'line_end':
+            return [self.newline_id] + self.eos_token_ids
+        if step['stage'] == 'text':
+            return None
+        return self.eos_token_ids
+
+    def __call__(self, input_ids, scores):
+        if self.states is None:
+            self.states = [{'step': self._choice('verdict', self.verdict_options), 'evidence': 0,
+                            'text_length': 0} for _ in range(input_ids.shape[0])]
+            first = [self.verdict_options[0][0], self.verdict_options[1][0]]
+            self.probs = [tuple(row) for row in torch.softmax(scores[:, first].float(), dim=-1).tolist()]
+        elif input_ids.shape[1] > self.prompt_length:
+            for state, token in zip(self.states, input_ids[:, -1].tolist()):
+                self._advance(state, token)
+
+        masked = torch.full_like(scores, float('-inf'))
+        for row, state in enumerate(self.states):
+            allowed = self._allowed(state)
+            if allowed is None:
+                # The logits may cover padded vocabulary rows the tokenizer never produces
+                mask = torch.zeros(scores.shape[-1], dtype=torch.bool, device=scores.device)
+                size = min(scores.shape[-1], self.text_token_mask.shape[0])
+                mask[:size] = self.text_token_mask[:size].to(scores.device)
+                if state['text_length'] > 0:
+                    mask[[self.newline_id] + self.eos_token_ids] = True
+                masked[row, mask] = scores[row, mask]
+            else:
+                masked[row, allowed] = scores[row, allowed]
+        return masked
+
+
+def parse_structured_verdict(text):
+    """
+    Parse output produced under StructuredVerdictProcessor.
+
+    :param text: Decoded structured answer
+    :return: Dict with 'verdict' ('Yes'/'No'/None), 'is_scam', 'scam_type' and 'evidence' list
+    """
+    lines = [line.strip() for line in (text or '').strip().split('\n') if line.strip()]
+    verdict = lines[0] if lines and lines[0] in ('Yes', 'No') else None
+
+    scam_type = None
+    evidence = []
+    for line in lines[1:]:
+        key, _, value = line.partition(':')
+        value = value.strip()
+        if key == 'type' and value in SCAM_TYPES:
+            scam_type = value
+        elif key == 'evidence' and value:
+            evidence.append(value)
+
+    return {
+        'verdict': verdict,
+        'is_scam': None if verdict is None else verdict == 'Yes',
+        'scam_type': scam_type,
+        'evidence': evidence,
+    }
+
+
+def _trim_to_last_sentence(text):
+    """Drop a trailing fragment left behind when a sentence stop fires."""
+    stripped = text.rstrip()
+    cut = max(stripped.rfind('.'), stripped.rfind('!'), stripped.rfind('?'))
+    return stripped[:cut + 1] if cut > 0 else stripped
+
+
+# Static instruction text lives in the system turn shared by every classification
+# variant (classify_video, classify_videos, the scheduler), so the rendered chat
+# template starts with an identical token prefix on every request; its KV cache is
+# computed once and reused (see Qwen3VLModel._prefill_with_prefix).
+SCAM_DEFINITION_PROMPT = (
+    "DEFINITION OF SCAM: A scam is strictly defined as a policy-violating deceptive "
+    "pattern in accordance with the official Community Guidelines of the target platforms. "
+    "Specifically: YouTube's 'Spam, Deceptive Practices & Scams Policies' and TikTok's "
+    "prohibitions on deceptive practices, financial frauds, and impersonation. "
+    "Observable scam behaviors include but are not limited to: promoting get-rich-quick "
+    "or guaranteed-return investment schemes, misleading or disguised external links, "
+    "visual or audio impersonation of legitimate brands/officials/platforms, fake "
+    "giveaways or prize claims, phishing for personal or financial information, "
+    "artificial urgency tactics (e.g. 'limited time', 'act now', 'account suspended'), "
+    "and coordinated inauthentic behavior designed to deceive viewers.\n"
+    "DO NOT flag content solely for being promotional, opinionated, or low-quality "
+    "unless it also exhibits the deceptive patterns above."
+)
+
+# The holistic prompt is not a fine-tuned format, so its static instructions live in the
+# system turn: every holistic request starts with the same token prefix, whose KV cache
+# is computed once and reused (see Qwen3VLModel._prefill_with_prefix).
+HOLISTIC_INSTRUCTIONS = """You are analyzing videos for potential scam indicators.
+
+**Your Task:**
+BE PRAGMATIC DO NOT BE FOOLED BY SEMANTIC MISDIRECTION. Analyze the video content along with the provided context to detect if this is a scam. Consider:
+1. Mismatches & Deception: Do the title, description, visual content, and audio align? Are there contradictions suggesting deception?
+2. Red Flags: Look for fake urgency, requests for personal info, too-good-to-be-true offers, impersonation, suspicious URLs, poor grammar, etc.
+3. Manipulation Tactics: Does the video use fear, urgency, or greed to pressure viewers?
+4. Visual Analysis: Look for fake websites, manipulated images, generic stock footage, low-quality branding, etc.
+Analyze the entire video content along with the provided context (title, description, audio, and visual text) to detect if this is a scam. Consider:
+
+1. **Mismatches & Deception:** Do the title, description, visual content, and audio align? Are there contradictions suggesting deception?
+
+2. **Red Flags:** Look for:
+   - Fake urgency ("limited time", "act now", "account suspended")
+   - Requests for personal info, passwords, or payment
+   - Too-good-to-be-true offers (free money, prizes, investment returns)
+   - Impersonation of legitimate brands, companies, or officials
+   - Suspicious URLs or contact information
+   - Poor grammar, spelling, or unprofessional presentation
+
+3. **Manipulation Tactics:** Does the video use fear, urgency, or greed to pressure viewers?
+
+4. **Visual Analysis:** Look at the video content for:
+   - Fake websites or login pages
+   - Manipulated images or screenshots
+   - Generic stock footage inconsistent with claims
+   - Low-quality or stolen branding
+
+**Provide:**
+- **Scam Likelihood:** (Low/Medium/High/Very High)
+- **Evidence:** Specific examples from the video, title, description, audio, or text
+- **Scam Type:** (Phishing, Investment scam, Tech support scam, Fake giveaway, etc.)
+- **Recommendation:** What viewers should know or do
+
+Be thorough and specific in your analysis."""
+
+
+FRAME_SCAM_PROMPT = """Analyze this image for potential scam indicators:
+1. Suspicious URLs or links
+2. Fake urgency messages (limited time offers, account warnings)
+3. Requests for personal information or payment
+4. Impersonation of legitimate brands/services
+5. Grammatical errors or unprofessional design
+6. Too-good-to-be-true offers
+
+Provide a brief analysis of any suspicious elements found."""
+
+
 class Qwen3VLModel:
-    def __init__(self, model_name="Qwen/Qwen3-VL-2B-Instruct", device=None):
+    def __init__(self, model_name="Qwen/Qwen3-VL-2B-Instruct", device=None, use_prefix_cache=True,
+                 cpu_quantization="none", cpu_dtype="bfloat16", num_threads=None,
+                 vision_cache_mb=256, vision_cache_dir=None, local_files_only=False,
+                 vision_cache_disk_mb=2048):
         """
         Initialize Qwen3-VL-2B-Instruct model for visual understanding.
 
-        :param model_name: Model identifier from HuggingFace
+        :param model_name: Model identifier from HuggingFace, or a local model directory
+                           (e.g. the vlm/ folder of a model bundle)
         :param device: Device to run model on (cuda/cpu)
+        :param use_prefix_cache: Reuse the KV cache of the static system prompt across requests
+        :param cpu_quantization: CPU only — "none" keeps cpu_dtype weights; "int8" applies PyTorch
+                                 dynamic int8 quantization to Linear layers (fp32 weights; latency
+                                 and accuracy against bf16 not yet measured)
+        :param cpu_dtype: CPU only — weight dtype when cpu_quantization="none" (bfloat16/float32)
+        :param num_threads: CPU only — intra-op thread count (default: all cores)
+        :param vision_cache_mb: Memory for cached vision-encoder outputs so repeat frames skip
+                                the encoder (0 with no vision_cache_dir = disabled)
+        :param vision_cache_dir: Optional directory for a persistent on-disk vision cache tier
+        :param local_files_only: Never contact the Hub (model bundles / offline hosts)
+        :param vision_cache_disk_mb: Size cap of the disk tier; oldest entries are pruned beyond it
         """
         self.model_name = model_name
         self.device = device if device else ("cuda" if torch.cuda.is_available() else "cpu")
+        self.use_prefix_cache = use_prefix_cache
+        # {system_prompt: (prefix_input_ids, past_key_values)}
+        self._prefix_caches = {}
+        self.prefix_cache_stats = {'hits': 0, 'misses': 0, 'prefill_tokens_saved': 0}
+        # Token counts of the most recent forward/generate pass (evaluation scripts)
+        self.last_generation_stats = {'prompt_tokens': 0, 'generated_tokens': 0}
+        # Per-thread stack of open _count_tokens tallies
+        self._token_tallies = threading.local()
+        # What the holistic context builder kept and dropped on the last call
+        self.last_context_report = None
+
+        self.vision_cache = None
+        if vision_cache_mb or vision_cache_dir:
+            # Quantized and full-precision encoders produce different features
+            precision = cpu_quantization if self.device == "cpu" else "nf4"
+            self.vision_cache = VisionEmbeddingCache(
+                max_memory_mb=vision_cache_mb,
+                disk_dir=vision_cache_dir,
+                namespace=f"{model_name}|{self.device}|{precision}",
+                device=self.device,
+                max_disk_mb=vision_cache_disk_mb,
+            )
 
         print(f"Loading {model_name} on {self.device}...")
 
-        bnb_config = BitsAndBytesConfig(
-            load_in_4bit=True,
-            bnb_4bit_compute_dtype=torch.bfloat16,
-            bnb_4bit_use_double_quant=False,
-            bnb_4bit_quant_type="nf4",
-        )
+        if self.device == "cpu":
+            self.model = self._load_cpu_model(model_name, cpu_quantization, cpu_dtype, num_threads,
+                                              local_files_only)
+        else:
+            # NF4 via bitsandbytes needs CUDA
+            bnb_config = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=torch.bfloat16,
+                bnb_4bit_use_double_quant=False,
+                bnb_4bit_quant_type="nf4",
+            )
 
-        self.model = _VLModel.from_pretrained(
-            model_name,
-            quantization_config=bnb_config,
-            device_map="auto",
-        )
+            self.model = _VLModel.from_pretrained(
+                model_name,
+                quantization_config=bnb_config,
+                device_map="auto",
+                local_files_only=local_files_only,
+            )
+
+        self.processor = AutoProcessor.from_pretrained(model_name, local_files_only=local_files_only)
+        # Left padding keeps every row's prompt flush with the first generated token in batches
+        self.processor.tokenizer.padding_side = "left"
 
-        self.processor = AutoProcessor.from_pretrained(model_name)
+        # Verdict tokens, resolved once: confidence is read from these two logits
+        yes_ids = self.processor.tokenizer.encode("Yes", add_special_tokens=False)
+        no_ids = self.processor.tokenizer.encode("No", add_special_tokens=False)
+        self.yes_token_id = yes_ids[0] if yes_ids else None
+        self.no_token_id = no_ids[0] if no_ids else None
 
         print(f"Model loaded successfully on {self.device}")
 
+    @staticmethod
+    def _load_cpu_model(model_name, cpu_quantization="none", cpu_dtype="bfloat16", num_threads=None,
+                        local_files_only=False):
+        """
+        Load the model for CPU inference without bitsandbytes.
+
+        :param model_name: Model identifier from HuggingFace
+        :param cpu_quantization: "int8" (dynamic int8 Linear layers) or "none"
+        :param cpu_dtype: Weight dtype when not quantizing
+        :param num_threads: Intra-op thread count (default: all cores)
+        :param local_files_only: Never contact the Hub
+        :return: Model in eval mode
+        """
+        num_threads = num_threads or os.cpu_count() or 1
+        torch.set_num_threads(num_threads)
+        try:
+            # Only settable before any inter-op parallel work has started
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+
+        if cpu_quantization == "int8":
+            # Dynamic quantization converts fp32 Linear weights; activations stay fp32
+            model = _VLModel.from_pretrained(model_name, torch_dtype=torch.float32,
+                                             local_files_only=local_files_only)
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif cpu_quantization == "none":
+            model = _VLModel.from_pretrained(model_name, torch_dtype=getattr(torch, cpu_dtype),
+                                             local_files_only=local_files_only)
+        else:
+            raise ValueError(f"Unknown cpu_quantization '{cpu_quantization}' (use 'int8' or 'none')")
+
+        model.eval()
+        print(f"CPU model ready ({cpu_quantization}, {num_threads} threads)")
+        return model
+
     def analyze_image(self, image_path, prompt, max_new_tokens=512):
         """
         Analyze an image with a text prompt.
@@ -75,34 +539,35 @@ class Qwen3VLModel:
             generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False
         )[0]
 
-    def analyze_frames_for_scams(self, frame_metadata, custom_prompt=None):
+    def analyze_frames_for_scams(self, frame_metadata, custom_prompt=None, batch_size=4):
         """
         Analyze frames specifically for scam detection.
 
         :param frame_metadata: List of frame metadata dicts
         :param custom_prompt: Custom analysis prompt (optional)
+        :param batch_size: Number of frames per generate() call
         :return: List of analysis results with timestamps
         """
-        default_prompt = """Analyze this image for potential scam indicators:
-1. Suspicious URLs or links
-2. Fake urgency messages (limited time offers, account warnings)
-3. Requests for personal information or payment
-4. Impersonation of legitimate brands/services
-5. Grammatical errors or unprofessional design
-6. Too-good-to-be-true offers
+        prompt = custom_prompt if custom_prompt else FRAME_SCAM_PROMPT
+        results = []
 
-Provide a brief analysis of any suspicious elements found."""
+        for i in range(0, len(frame_metadata), batch_size):
+            batch = frame_metadata[i:i + batch_size]
+            analyses = self._analyze_batch(
+                [frame_info['path'] for frame_info in batch], [prompt] * len(batch)
+            )
 
-        prompt = custom_prompt if custom_prompt else default_prompt
-        results = []
+            for frame_info, analysis in zip(batch, analyses):
+                image_path = frame_info['path']
+                timestamp = frame_info['timestamp']
+                frame_id = frame_info.get('frame_id', 0)
 
-        for frame_info in frame_metadata:
-            image_path = frame_info['path']
-            timestamp = frame_info['timestamp']
-            frame_id = frame_info.get('frame_id', 0)
+                if isinstance(analysis, Exception):
+                    print(f"Error analyzing frame {frame_id}: {str(analysis)}")
+                    analysis = f"Error: {str(analysis)}"
+                else:
+                    print(f"[Frame {frame_id} @ {timestamp:.2f}s] Analysis complete")
 
-            try:
-                analysis = self.analyze_image(image_path, prompt)
                 results.append({
                     'frame_id': frame_id,
                     'timestamp': timestamp,
@@ -110,32 +575,85 @@ Provide a brief analysis of any suspicious elements found."""
                     'analysis': analysis,
                     'model': self.model_name
                 })
-                print(f"[Frame {frame_id} @ {timestamp:.2f}s] Analysis complete")
 
-            except Exception as e:
-                print(f"Error analyzing frame {frame_id}: {str(e)}")
+        return results
+
+    def analyze_flagged_frames(self, flagged_frames, max_new_tokens=256, batch_size=4):
+        """
+        Per-frame analysis of frames flagged by cheap signals (see FrameSelector.flag_suspicious_frames).
+
+        Each prompt names the detected URLs, numbers, addresses or phrases so
+        the model checks them instead of describing the whole frame.
+
+        :param flagged_frames: Frame dicts with 'path', 'timestamp' and 'signals'
+        :param max_new_tokens: Maximum tokens per frame analysis
+        :param batch_size: Number of frames per generate() call
+        :return: List of analysis results with timestamps and the triggering signals
+        """
+        results = []
+        for i in range(0, len(flagged_frames), batch_size):
+            batch = flagged_frames[i:i + batch_size]
+            prompts = []
+            for frame in batch:
+                lines = []
+                for source, label in (('ocr', 'On-screen text'), ('transcript', 'Speech around this moment')):
+                    for signal, matches in frame['signals'].get(source, {}).items():
+                        lines.append(f"- {label} ({signal.replace('_', ' ')}): {', '.join(dict.fromkeys(matches))}")
+                prompts.append(
+                    f"{FRAME_SCAM_PROMPT}\n\nAutomated checks flagged this frame:\n" + "\n".join(lines) +
+                    "\nState whether these elements look like part of a scam and why, in 2-3 sentences."
+                )
+
+            analyses = self._analyze_batch([frame['path'] for frame in batch], prompts, max_new_tokens)
+            for frame, analysis in zip(batch, analyses):
+                if isinstance(analysis, Exception):
+                    print(f"Error analyzing frame {frame.get('frame_id', 0)}: {str(analysis)}")
+                    analysis = f"Error: {str(analysis)}"
                 results.append({
-                    'frame_id': frame_id,
-                    'timestamp': timestamp,
-                    'image_path': image_path,
-                    'analysis': f"Error: {str(e)}",
+                    'frame_id': frame.get('frame_id', 0),
+                    'timestamp': frame['timestamp'],
+                    'image_path': frame['path'],
+                    'signals': frame['signals'],
+                    'analysis': analysis,
                     'model': self.model_name
                 })
 
         return results
 
-    def analyze_video_holistic(self, video_path, title=None, description=None, transcription=None, ocr_text=None, max_new_tokens=1024):
+    def analyze_video_holistic(self, video_path=None, title=None, description=None, transcription=None,
+                               ocr_text=None, max_new_tokens=1024, frames=None, max_frames=16,
+                               total_pixels=16 * 320 * 320, context_budget=1536):
         """
         Analyze an entire video holistically with title, description, and extracted content.
 
-        :param video_path: Path to video file
+        :param video_path: Path to video file; only decoded (at 1 fps) when frames is not given
         :param title: Video title
         :param description: Video description
         :param transcription: Full audio transcription
-        :param ocr_text: All extracted OCR text from the video
+        :param ocr_text: All extracted OCR text from the video (string or list of spans)
         :param max_new_tokens: Maximum tokens to generate
+        :param frames: Frames already decoded by the sampling stage, as dicts with 'timestamp' and
+                       either 'path' or 'image' (PIL image) — e.g. ImageProcessing frame metadata.
+                       Passing them avoids decoding the video a second time.
+        :param max_frames: Maximum number of frames shown to the model
+        :param total_pixels: Pixel budget shared by all frames (bounds visual tokens)
+        :param context_budget: Token budget for transcription + OCR text; the most relevant
+                               sentences and unique OCR spans are kept (None = no limit).
+                               What was dropped is recorded in last_context_report.
         :return: Comprehensive scam analysis
         """
+        if frames is None and video_path is None:
+            raise ValueError("analyze_video_holistic needs either video_path or frames")
+
+        self.last_context_report = None
+        if context_budget and (transcription or ocr_text):
+            builder = ContextBuilder(self.processor.tokenizer, max_tokens=context_budget)
+            context = builder.build(transcription, ocr_text, title, description)
+            transcription, ocr_text = context['transcription'], context['ocr_text']
+            self.last_context_report = {'tokens': context['tokens'], 'dropped': context['dropped']}
+        elif isinstance(ocr_text, (list, tuple)):
+            ocr_text = '\n'.join(ocr_text)
+
         context_parts = []
         if title:
             context_parts.append(f"**Video Title:** {title}")
@@ -148,64 +666,26 @@ Provide a brief analysis of any suspicious elements found."""
 
         context_str = "\n\n".join(context_parts)
 
-        prompt = f"""You are analyzing this video for potential scam indicators.
-
-Here is the available context:
+        prompt = f"""Here is the available context:
 
 {context_str}
 
-**Your Task:**
-BE PRAGMATIC DO NOT BE FOOLED BY SEMANTIC MISDIRECTION. Analyze the video content along with the provided context to detect if this is a scam. Consider:
-1. Mismatches & Deception: Do the title, description, visual content, and audio align? Are there contradictions suggesting deception?
-2. Red Flags: Look for fake urgency, requests for personal info, too-good-to-be-true offers, impersonation, suspicious URLs, poor grammar, etc.
-3. Manipulation Tactics: Does the video use fear, urgency, or greed to pressure viewers?
-4. Visual Analysis: Look for fake websites, manipulated images, generic stock footage, low-quality branding, etc.
-Analyze the entire video content along with the provided context (title, description, audio, and visual text) to detect if this is a scam. Consider:
-
-1. **Mismatches & Deception:** Do the title, description, visual content, and audio align? Are there contradictions suggesting deception?
-
-2. **Red Flags:** Look for:
-   - Fake urgency ("limited time", "act now", "account suspended")
-   - Requests for personal info, passwords, or payment
-   - Too-good-to-be-true offers (free money, prizes, investment returns)
-   - Impersonation of legitimate brands, companies, or officials
-   - Suspicious URLs or contact information
-   - Poor grammar, spelling, or unprofessional presentation
-
-3. **Manipulation Tactics:** Does the video use fear, urgency, or greed to pressure viewers?
-
-4. **Visual Analysis:** Look at the video content for:
-   - Fake websites or login pages
-   - Manipulated images or screenshots
-   - Generic stock footage inconsistent with claims
-   - Low-quality or stolen branding
+Analyze this video for potential scam indicators following the instructions above."""
 
-**Provide:**
-- **Scam Likelihood:** (Low/Medium/High/Very High)
-- **Evidence:** Specific examples from the video, title, description, audio, or text
-- **Scam Type:** (Phishing, Investment scam, Tech support scam, Fake giveaway, etc.)
-- **Recommendation:** What viewers should know or do
-
-Be thorough and specific in your analysis."""
-
-        messages = [{"role": "user", "content": [
-            {"type": "video", "video": video_path, "fps": 1.0},
-            {"type": "text", "text": prompt},
-        ]}]
+        if frames:
+            content = self._timestamped_frame_content(frames, max_frames, total_pixels)
+        else:
+            content = [{"type": "video", "video": video_path, "fps": 1.0,
+                        "max_frames": max_frames, "total_pixels": total_pixels}]
+        content.append({"type": "text", "text": prompt})
 
-        text = self.processor.apply_chat_template(
-            messages, tokenize=False, add_generation_prompt=True
-        )
-        image_inputs, video_inputs = process_vision_info(messages)
-        inputs = self.processor(
-            text=[text],
-            images=image_inputs,
-            videos=video_inputs,
-            padding=True,
-            return_tensors="pt",
-        ).to(self.device)
+        messages = [
+            {"role": "system", "content": HOLISTIC_INSTRUCTIONS},
+            {"role": "user", "content": content},
+        ]
 
-        generated_ids = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+        inputs = self._prepare_inputs(messages)
+        generated_ids = self._generate(inputs, HOLISTIC_INSTRUCTIONS, max_new_tokens=max_new_tokens)
         generated_ids_trimmed = [
             out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
         ]
@@ -213,6 +693,33 @@ Be thorough and specific in your analysis."""
             generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False
         )[0]
 
+    @staticmethod
+    def _timestamped_frame_content(frames, max_frames=16, total_pixels=16 * 320 * 320):
+        """
+        Message content showing pre-decoded frames in time order, each labelled with its timestamp.
+
+        :param frames: Dicts with 'timestamp' and 'path' or 'image'
+        :param max_frames: Frames beyond this are subsampled evenly
+        :param total_pixels: Pixel budget split evenly across the shown frames
+        :return: List of interleaved text/image content items
+        """
+        frames = sorted(frames, key=lambda f: f['timestamp'])
+        if len(frames) > max_frames:
+            step = len(frames) / max_frames
+            frames = [frames[int(i * step)] for i in range(max_frames)]
+
+        frame_pixels = max(28 * 28, total_pixels // len(frames))
+        content = []
+        for frame in frames:
+            content.append({"type": "text", "text": f"[{frame['timestamp']:.1f}s]"})
+            content.append({
+                "type": "image",
+                "image": frame['image'] if frame.get('image') is not None else frame['path'],
+                "min_pixels": min(224 * 224, frame_pixels),
+                "max_pixels": frame_pixels,
+            })
+        return content
+
     def analyze_with_context(self, image_path, context_info, prompt_template=None):
         """
         Analyze an image with additional context (like OCR text or audio transcription).
@@ -241,35 +748,37 @@ Analyze this image for scam indicators and explain how the visual content relate
 
         return self.analyze_image(image_path, prompt)
 
-    def classify_video(self, image_paths, title=None, description=None,
-                       max_frames=6, max_new_tokens=512):
+    def _build_classification_messages(self, image_paths, title=None, description=None, max_frames=6,
+                                       pixel_budgets=None, structured=False):
         """
-        Classify a video as scam or legitimate using multiple frames.
-        Matches the training format: all frames + title/description → Yes/No + reasoning.
+        Build the chat messages for video classification (scam definition in the system turn).
 
         :param image_paths: List of frame image paths
         :param title: Video title
         :param description: Video description
         :param max_frames: Maximum number of frames to pass (prevents OOM)
-        :param max_new_tokens: Maximum tokens to generate
-        :return: Tuple of ("Yes. <reasoning>" or "No. <reasoning>", confidence_pct float or None)
-                 confidence_pct is the model's probability for the Yes/No verdict (0–100).
+        :param pixel_budgets: Optional max_pixels per image, aligned with image_paths
+        :param structured: Ask for the compact structured format instead of written reasoning
+        :return: Chat messages list
         """
+        if pixel_budgets is None:
+            pixel_budgets = [448 * 448] * len(image_paths)
+
         # Subsample evenly across the full frame list so we get representative coverage
         if len(image_paths) > max_frames:
             step = len(image_paths) / max_frames
-            frames = [image_paths[int(i * step)] for i in range(max_frames)]
+            picks = [int(i * step) for i in range(max_frames)]
         else:
-            frames = image_paths
+            picks = range(len(image_paths))
 
         content = []
-        for img_path in frames:
+        for i in picks:
             # Cap resolution to limit visual tokens per image and prevent OOM
             content.append({
                 "type": "image",
-                "image": img_path,
-                "min_pixels": 224 * 224,
-                "max_pixels": 448 * 448,
+                "image": image_paths[i],
+                "min_pixels": min(224 * 224, pixel_budgets[i]),
+                "max_pixels": pixel_budgets[i],
             })
 
         prompt_parts = []
@@ -278,32 +787,33 @@ Analyze this image for scam indicators and explain how the visual content relate
         if description:
             prompt_parts.append(f"Description: {description}")
         prompt_parts.append("")
-        prompt_parts.append(
-            "DEFINITION OF SCAM: A scam is strictly defined as a policy-violating deceptive "
-            "pattern in accordance with the official Community Guidelines of the target platforms. "
-            "Specifically: YouTube's 'Spam, Deceptive Practices & Scams Policies' and TikTok's "
-            "prohibitions on deceptive practices, financial frauds, and impersonation. "
-            "Observable scam behaviors include but are not limited to: promoting get-rich-quick "
-            "or guaranteed-return investment schemes, misleading or disguised external links, "
-            "visual or audio impersonation of legitimate brands/officials/platforms, fake "
-            "giveaways or prize claims, phishing for personal or financial information, "
-            "artificial urgency tactics (e.g. 'limited time', 'act now', 'account suspended'), "
-            "and coordinated inauthentic behavior designed to deceive viewers.\n"
-            "DO NOT flag content solely for being promotional, opinionated, or low-quality "
-            "unless it also exhibits the deceptive patterns above.\n\n"
-            "Given the above definition, is this video a scam? "
-            "Check the video frames, title, and description for deceptive patterns. "
-            "Answer Yes/No followed by your reasoning in 4-5 sentences."
-        )
+        if structured:
+            prompt_parts.append(
+                "Given the above definition, is this video a scam? "
+                "Check the video frames, title, and description for deceptive patterns. "
+                "Answer Yes or No on the first line, then 'type:' with one of "
+                f"{', '.join(SCAM_TYPES)}, then up to a few 'evidence:' lines with short facts."
+            )
+        else:
+            prompt_parts.append(
+                "Given the above definition, is this video a scam? "
+                "Check the video frames, title, and description for deceptive patterns. "
+                "Answer Yes/No followed by your reasoning in 4-5 sentences."
+            )
         content.append({"type": "text", "text": "\n".join(prompt_parts)})
 
-        messages = [{"role": "user", "content": content}]
+        return [
+            {"role": "system", "content": SCAM_DEFINITION_PROMPT},
+            {"role": "user", "content": content},
+        ]
 
+    def _prepare_inputs(self, messages):
+        """Apply the chat template and run the processor for a single conversation."""
         text = self.processor.apply_chat_template(
             messages, tokenize=False, add_generation_prompt=True
         )
         image_inputs, video_inputs = process_vision_info(messages)
-        inputs = self.processor(
+        return self.processor(
             text=[text],
             images=image_inputs,
             videos=video_inputs,
@@ -311,40 +821,886 @@ Analyze this image for scam indicators and explain how the visual content relate
             return_tensors="pt",
         ).to(self.device)
 
-        outputs = self.model.generate(
-            **inputs,
-            max_new_tokens=max_new_tokens,
-            return_dict_in_generate=True,
-            output_scores=True,
+    def _rope_owner(self):
+        """Module that computes multimodal RoPE indices and stores rope_deltas."""
+        inner = getattr(self.model, 'model', None)
+        return inner if hasattr(inner, 'get_rope_index') else self.model
+
+    def _get_prefix_cache(self, system_prompt):
+        """
+        KV cache for the rendered system turn, computed on first use.
+
+        :param system_prompt: Static system prompt text
+        :return: Tuple of (prefix input_ids, past_key_values)
+        """
+        if system_prompt not in self._prefix_caches:
+            prefix_text = self.processor.apply_chat_template(
+                [{"role": "system", "content": system_prompt}], tokenize=False
+            )
+            prefix_ids = self.processor.tokenizer(
+                prefix_text, return_tensors="pt", add_special_tokens=False
+            ).input_ids.to(self.model.device)
+            with torch.no_grad():
+                outputs = self.model(input_ids=prefix_ids, use_cache=True, logits_to_keep=1)
+            self._prefix_caches[system_prompt] = (prefix_ids, outputs.past_key_values)
+            print(f"Cached system prompt prefix ({prefix_ids.shape[1]} tokens)")
+        return self._prefix_caches[system_prompt]
+
+    def precompute_prefix_caches(self):
+        """Build the KV caches of the static system prompts now (e.g. before forking workers)."""
+        if self.use_prefix_cache:
+            self._get_prefix_cache(SCAM_DEFINITION_PROMPT)
+            self._get_prefix_cache(HOLISTIC_INSTRUCTIONS)
+
+    def _prefill_with_prefix(self, inputs, system_prompt, stop_before_last=False):
+        """
+        Prefill only the request-specific suffix on top of a copy of the cached prefix.
+
+        Multimodal RoPE positions are computed over the full sequence and sliced,
+        so image tokens get the same positions as in an uncached prefill.
+
+        :param inputs: Processor outputs for one conversation
+        :param system_prompt: Static system prompt the conversation starts with
+        :param stop_before_last: Leave the final token unprocessed so generate() can take over
+        :return: Model outputs (last-position logits + past_key_values), or None if not applicable
+        """
+        if not self.use_prefix_cache or not system_prompt:
+            return None
+
+        try:
+            prefix_ids, prefix_cache = self._get_prefix_cache(system_prompt)
+            input_ids = inputs.input_ids
+            prefix_length = prefix_ids.shape[1]
+            if (input_ids.shape[0] != 1 or input_ids.shape[1] <= prefix_length + 1
+                    or not torch.equal(input_ids[0, :prefix_length], prefix_ids[0].to(input_ids.device))):
+                self.prefix_cache_stats['misses'] += 1
+                return None
+
+            end = input_ids.shape[1] - (1 if stop_before_last else 0)
+            rope_owner = self._rope_owner()
+            position_ids, rope_deltas = rope_owner.get_rope_index(
+                input_ids,
+                inputs.get('image_grid_thw'),
+                inputs.get('video_grid_thw'),
+                attention_mask=inputs.attention_mask,
+            )
+            vision_inputs = {
+                key: inputs[key]
+                for key in ('pixel_values', 'image_grid_thw', 'pixel_values_videos', 'video_grid_thw')
+                if key in inputs
+            }
+
+            with torch.no_grad():
+                outputs = self.model(
+                    input_ids=input_ids[:, prefix_length:end],
+                    attention_mask=inputs.attention_mask[:, :end],
+                    position_ids=position_ids[..., prefix_length:end],
+                    cache_position=torch.arange(prefix_length, end, device=input_ids.device),
+                    past_key_values=copy.deepcopy(prefix_cache),
+                    use_cache=True,
+                    logits_to_keep=1,
+                    **vision_inputs,
+                )
+            # Decode steps derive positions from rope_deltas; make them match this request
+            rope_owner.rope_deltas = rope_deltas
+
+            self.prefix_cache_stats['hits'] += 1
+            self.prefix_cache_stats['prefill_tokens_saved'] += prefix_length
+            return outputs
+
+        except (TypeError, AttributeError, NotImplementedError) as e:
+            # The model does not support this cache or RoPE API; stop trying
+            print(f"Prefix cache unsupported, falling back to full prefill: {e}")
+            self.use_prefix_cache = False
+            return None
+        except Exception as e:
+            # Transient (e.g. out of memory) or input-specific: only this request falls back
+            print(f"Prefix cache failed for this request, falling back to full prefill: {e}")
+            self.prefix_cache_stats['misses'] += 1
+            return None
+
+    def _image_features(self, pixel_values, image_grid_thw):
+        """
+        Vision-encoder outputs per image, served from the vision cache where possible.
+
+        Only images missing from the cache go through the encoder, in one call.
+
+        :param pixel_values: Processor patches for all images, concatenated
+        :param image_grid_thw: Patch grid per image, shape (images, 3)
+        :return: Tuple of (list of per-image embeddings, list of per-layer deepstack
+                 features concatenated over images, or None)
+        """
+        owner = self._rope_owner()
+        patch_counts = image_grid_thw.prod(-1).tolist()
+        merge = getattr(self.model.config.vision_config, 'spatial_merge_size', 2)
+        token_counts = [n // merge ** 2 for n in patch_counts]
+        pixel_chunks = torch.split(pixel_values, patch_counts)
+
+        keys = [None] * len(patch_counts)
+        entries = [None] * len(patch_counts)
+        if self.vision_cache is not None:
+            keys = [self.vision_cache.key(chunk, grid) for chunk, grid in zip(pixel_chunks, image_grid_thw)]
+            entries = [self.vision_cache.get(key) for key in keys]
+
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        if missing:
+            features = owner.get_image_features(
+                torch.cat([pixel_chunks[i] for i in missing]), image_grid_thw[missing]
+            )
+            embeds, deepstack = features if isinstance(features, tuple) and len(features) == 2 else (features, None)
+            counts = [token_counts[i] for i in missing]
+            per_image = list(embeds) if isinstance(embeds, (list, tuple)) else list(torch.split(embeds, counts))
+            per_layer = [torch.split(layer, counts) for layer in deepstack] if deepstack is not None else None
+
+            for j, i in enumerate(missing):
+                image_deepstack = [layer[j] for layer in per_layer] if per_layer is not None else None
+                entries[i] = (per_image[j], image_deepstack)
+                if self.vision_cache is not None:
+                    self.vision_cache.put(keys[i], per_image[j], image_deepstack)
+
+        deepstack = None
+        if entries[0][1] is not None:
+            deepstack = [torch.cat([entry[1][layer] for entry in entries])
+                         for layer in range(len(entries[0][1]))]
+        return [entry[0] for entry in entries], deepstack
+
+    def _prefill_with_vision_cache(self, inputs, system_prompt=None, stop_before_last=False):
+        """
+        Prefill from cached vision-encoder outputs instead of re-encoding every image.
+
+        Image features are written into the token embeddings and the language
+        model is run directly, with deepstack features injected at the image
+        positions. For a single conversation the cached system prompt prefix
+        is reused as in _prefill_with_prefix.
+
+        :param inputs: Processor outputs (one or more left-padded rows) with images
+        :param system_prompt: Static system prompt whose cached prefix can be reused
+        :param stop_before_last: Leave the final token unprocessed so generate() can take over
+        :return: Model outputs (last-position logits + past_key_values), or None if not applicable
+        """
+        if self.vision_cache is None or 'pixel_values' not in inputs:
+            return None
+        owner = self._rope_owner()
+        if not (hasattr(owner, 'get_image_features') and hasattr(owner, 'language_model')):
+            return None
+
+        try:
+            input_ids = inputs.input_ids
+            image_grid_thw = inputs['image_grid_thw']
+
+            with torch.no_grad():
+                per_image, deepstack = self._image_features(inputs['pixel_values'], image_grid_thw)
+                position_ids, rope_deltas = owner.get_rope_index(
+                    input_ids, image_grid_thw, None, attention_mask=inputs.attention_mask
+                )
+                image_mask = input_ids == self.model.config.image_token_id
+                inputs_embeds = owner.get_input_embeddings()(input_ids)
+                inputs_embeds[image_mask] = torch.cat(per_image).to(inputs_embeds.dtype)
+
+                start, past_key_values = 0, None
+                if self.use_prefix_cache and system_prompt and input_ids.shape[0] == 1:
+                    prefix_ids, prefix_cache = self._get_prefix_cache(system_prompt)
+                    prefix_length = prefix_ids.shape[1]
+                    if (input_ids.shape[1] > prefix_length + 1 and torch.equal(
+                            input_ids[0, :prefix_length], prefix_ids[0].to(input_ids.device))):
+                        start, past_key_values = prefix_length, copy.deepcopy(prefix_cache)
+                        self.prefix_cache_stats['hits'] += 1
+                        self.prefix_cache_stats['prefill_tokens_saved'] += prefix_length
+                    else:
+                        self.prefix_cache_stats['misses'] += 1
+
+                end = input_ids.shape[1] - (1 if stop_before_last else 0)
+                language_kwargs = {}
+                if deepstack is not None:
+                    language_kwargs['visual_pos_masks'] = image_mask[:, start:end]
+                    language_kwargs['deepstack_visual_embeds'] = deepstack
+
+                outputs = owner.language_model(
+                    inputs_embeds=inputs_embeds[:, start:end],
+                    attention_mask=inputs.attention_mask[:, :end],
+                    position_ids=position_ids[..., start:end],
+                    cache_position=torch.arange(start, end, device=input_ids.device),
+                    past_key_values=past_key_values,
+                    use_cache=True,
+                    **language_kwargs,
+                )
+                logits = self.model.lm_head(outputs.last_hidden_state[:, -1:])
+
+            # Decode steps derive positions from rope_deltas; make them match this request
+            owner.rope_deltas = rope_deltas
+            return CausalLMOutputWithPast(logits=logits, past_key_values=outputs.past_key_values)
+
+        except (TypeError, AttributeError, NotImplementedError) as e:
+            # The model's vision or language modules do not support this path; stop trying
+            print(f"Vision cache unsupported, falling back to the full forward pass: {e}")
+            self.vision_cache = None
+            return None
+        except Exception as e:
+            # Transient (e.g. out of memory on a big batch): only this request falls back
+            print(f"Vision cache path failed for this request, falling back to the full forward pass: {e}")
+            return None
+
+    def _generate(self, inputs, system_prompt, **generate_kwargs):
+        """
+        Run generate(), reusing the system prompt's KV cache when possible.
+
+        :param inputs: Processor outputs for one conversation
+        :param system_prompt: Static system prompt the conversation starts with (None = no system turn)
+        :return: Generated token ids (prompt included)
+        """
+        prefilled = self._prefill_with_vision_cache(inputs, system_prompt, stop_before_last=True)
+        if prefilled is None:
+            prefilled = self._prefill_with_prefix(inputs, system_prompt, stop_before_last=True)
+        if prefilled is None:
+            return self.model.generate(**inputs, **generate_kwargs)
+
+        # Only the final prompt token remains; vision inputs are already in the KV cache
+        return self.model.generate(
+            input_ids=inputs.input_ids,
+            attention_mask=inputs.attention_mask,
+            past_key_values=prefilled.past_key_values,
+            **generate_kwargs,
         )
 
-        generated_ids_trimmed = [
-            out_ids[len(in_ids):]
-            for in_ids, out_ids in zip(inputs.input_ids, outputs.sequences)
-        ]
-        verdict_text = self.processor.batch_decode(
-            generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False
-        )[0]
+    def _yes_no_probs(self, first_token_logits):
+        """
+        Softmax over the Yes/No logits of the first answer token.
+
+        :param first_token_logits: Logits over the vocabulary, shape (vocab_size,)
+        :return: Tuple of (p_yes, p_no) floats, or None if the verdict tokens are unknown
+        """
+        if self.yes_token_id is None or self.no_token_id is None:
+            return None
+        logits = first_token_logits.float()
+        probs = torch.softmax(torch.stack([logits[self.yes_token_id], logits[self.no_token_id]]), dim=0)
+        return probs[0].item(), probs[1].item()
+
+    @staticmethod
+    def _select_visual_tokens(image_embeds, keep_ratio):
+        """
+        Choose which visual tokens of one image to keep.
+
+        Tokens closest (cosine) to the image's mean embedding carry the least
+        distinct content — typically flat background — and are dropped first.
+
+        :param image_embeds: Visual token embeddings of one image, shape (tokens, hidden)
+        :param keep_ratio: Fraction of tokens to keep
+        :return: Boolean keep mask, shape (tokens,)
+        """
+        num_tokens = image_embeds.shape[0]
+        num_keep = max(1, int(round(num_tokens * keep_ratio)))
+        embeds = torch.nn.functional.normalize(image_embeds.float(), dim=-1)
+        mean = torch.nn.functional.normalize(embeds.mean(dim=0, keepdim=True), dim=-1)
+        saliency = 1.0 - (embeds @ mean.T).squeeze(-1)
+
+        keep = torch.zeros(num_tokens, dtype=torch.bool, device=image_embeds.device)
+        keep[saliency.topk(num_keep).indices] = True
+        return keep
+
+    def _score_pruned(self, inputs, keep_ratio):
+        """
+        Verdict forward pass with low-saliency visual tokens removed after the vision encoder.
+
+        Kept tokens retain their original multimodal RoPE positions, and the
+        deepstack visual features are pruned with the same mask, so the
+        language model sees a shorter sequence laid out as before.
+
+        :param inputs: Processor outputs for one conversation with images
+        :param keep_ratio: Fraction of visual tokens to keep per image
+        :return: Tuple of (p_yes, p_no), or None if pruning is unsupported for this model
+        """
+        owner = self._rope_owner()
+        if not (hasattr(owner, 'get_image_features') and hasattr(owner, 'language_model')):
+            return None
+        if inputs.input_ids.shape[0] != 1 or 'pixel_values' not in inputs:
+            return None
+
+        input_ids = inputs.input_ids
+        image_grid_thw = inputs['image_grid_thw']
+
+        with torch.no_grad():
+            per_image, deepstack = self._image_features(inputs['pixel_values'], image_grid_thw)
+
+            visual_keep = torch.cat([self._select_visual_tokens(e, keep_ratio) for e in per_image])
+            image_embeds = torch.cat(per_image, dim=0)
+
+            position_ids, _ = owner.get_rope_index(
+                input_ids, image_grid_thw, None, attention_mask=inputs.attention_mask
+            )
+            image_mask = input_ids[0] == self.model.config.image_token_id
+
+            inputs_embeds = owner.get_input_embeddings()(input_ids)
+            inputs_embeds[0, image_mask] = image_embeds.to(inputs_embeds.dtype)
+
+            keep = torch.ones_like(image_mask)
+            keep[image_mask.nonzero(as_tuple=True)[0][~visual_keep]] = False
+
+            language_kwargs = {}
+            if deepstack is not None:
+                language_kwargs['visual_pos_masks'] = image_mask[keep].unsqueeze(0)
+                language_kwargs['deepstack_visual_embeds'] = [layer[visual_keep] for layer in deepstack]
 
-        # --- Logit-based confidence ---
-        # outputs.scores[0] holds logits over the full vocabulary for the FIRST generated token.
-        # We compare the logit for "Yes" vs "No" to get a calibrated probability.
-        confidence_pct = None
+            kept_length = int(keep.sum())
+            outputs = owner.language_model(
+                inputs_embeds=inputs_embeds[:, keep],
+                attention_mask=inputs.attention_mask[:, keep],
+                position_ids=position_ids[..., keep],
+                cache_position=torch.arange(kept_length, device=input_ids.device),
+                use_cache=False,
+                **language_kwargs,
+            )
+            logits = self.model.lm_head(outputs.last_hidden_state[:, -1])
+
+        self._record_generation(kept_length, 0,
+                                visual_tokens_pruned=int((~visual_keep).sum()))
+        return self._yes_no_probs(logits[0])
+
+    def score_verdict(self, inputs, system_prompt=SCAM_DEFINITION_PROMPT, visual_keep_ratio=1.0):
+        """
+        Read the verdict from a single prefill forward pass, with no decoding.
+
+        :param inputs: Processor outputs for one conversation
+        :param system_prompt: Static system prompt whose cached prefix can be reused
+        :param visual_keep_ratio: Fraction of visual tokens kept after the vision encoder (1.0 = all)
+        :return: Tuple of (p_yes, p_no), or None if the verdict tokens are unknown
+        """
+        return self._score_prefill(inputs, system_prompt, visual_keep_ratio)[0]
+
+    def _score_prefill(self, inputs, system_prompt=SCAM_DEFINITION_PROMPT, visual_keep_ratio=1.0):
+        """
+        score_verdict, also returning the prefill outputs so decoding can continue from them.
+
+        :return: Tuple of ((p_yes, p_no) or None, model outputs with past_key_values over the
+                 whole prompt, or None when the pass was pruned and has no reusable cache)
+        """
+        if visual_keep_ratio < 1.0:
+            probs = self._score_pruned(inputs, visual_keep_ratio)
+            if probs is not None:
+                return probs, None
+
+        outputs = self._prefill_with_vision_cache(inputs, system_prompt)
+        if outputs is None:
+            outputs = self._prefill_with_prefix(inputs, system_prompt)
+        if outputs is None:
+            with torch.no_grad():
+                outputs = self.model(**inputs, use_cache=True, logits_to_keep=1)
+        self._record_generation(int(inputs.attention_mask.sum()), 0)
+        return self._yes_no_probs(outputs.logits[0, -1]), outputs
+
+    def _record_generation(self, prompt_tokens, generated_tokens, **extra):
+        """Set last_generation_stats and add the counts to every token tally open on this thread."""
+        self.last_generation_stats = {'prompt_tokens': prompt_tokens, 'generated_tokens': generated_tokens,
+                                      **extra}
+        for tally in getattr(self._token_tallies, 'stack', []):
+            tally['prompt_tokens'] += prompt_tokens
+            tally['generated_tokens'] += generated_tokens
+
+    @contextmanager
+    def _count_tokens(self):
+        """
+        Sum the tokens of every pass run on this thread inside the block (scoring,
+        continuation, retries), unaffected by other callers of the model.
+
+        :return: Context manager yielding the {'prompt_tokens', 'generated_tokens'} tally
+        """
+        stack = getattr(self._token_tallies, 'stack', None)
+        if stack is None:
+            stack = self._token_tallies.stack = []
+        tally = {'prompt_tokens': 0, 'generated_tokens': 0}
+        stack.append(tally)
         try:
-            first_token_logits = outputs.scores[0][0].float()  # (vocab_size,)
-            yes_ids = self.processor.tokenizer.encode("Yes", add_special_tokens=False)
-            no_ids  = self.processor.tokenizer.encode("No",  add_special_tokens=False)
-            if yes_ids and no_ids:
-                yes_logit = first_token_logits[yes_ids[0]]
-                no_logit  = first_token_logits[no_ids[0]]
-                probs = torch.softmax(torch.stack([yes_logit, no_logit]), dim=0)
+            yield tally
+        finally:
+            stack.remove(tally)
+
+    def classify_video(self, image_paths, title=None, description=None,
+                       max_frames=6, max_new_tokens=512, reasoning="always", max_sentences=6,
+                       visual_keep_ratio=1.0, pixel_budgets=None, on_token=None, max_evidence=3,
+                       max_evidence_tokens=16, return_stats=False):
+        """
+        Classify a video as scam or legitimate using multiple frames.
+        Same content as the training format (all frames + title/description → Yes/No +
+        reasoning), with the static scam definition in a shared system turn whose KV prefix
+        is cached; hits are counted in prefix_cache_stats.
+
+        :param image_paths: List of frame image paths
+        :param title: Video title
+        :param description: Video description
+        :param max_frames: Maximum number of frames to pass (prevents OOM)
+        :param max_new_tokens: Maximum tokens to generate
+        :param reasoning: When to decode the written reasoning:
+                          "always" — generate the full answer (original behaviour)
+                          "positive" — one forward pass for the verdict; generate only if Yes
+                          "never" — verdict and confidence from one forward pass only
+                          "structured" — constrained short answer (verdict, type, evidence
+                          lines); parse it with parse_structured_verdict
+        :param max_sentences: Stop decoding after this many sentences (verdict + reasoning);
+                              None = run to EOS or max_new_tokens
+        :param visual_keep_ratio: Fraction of visual tokens kept for the verdict forward pass
+                                  ("never"/"positive" modes); reasoning always sees every token
+        :param pixel_budgets: Optional max_pixels per frame aligned with image_paths
+                              (default 448×448 each), e.g. from FrameSelector
+        :param on_token: Optional callback receiving stream events as they are produced:
+                         {'type': 'verdict', 'verdict': 'Yes'/'No', 'confidence_pct': ...} first,
+                         then {'type': 'text', 'text': ...} per decoded piece and a final
+                         {'type': 'done', 'text': ...} (the returned text may be trimmed further)
+        :param max_evidence: Structured mode — maximum evidence lines
+        :param max_evidence_tokens: Structured mode — maximum tokens per evidence line
+        :param return_stats: Also return the prompt/generated token counts of every pass this call ran
+        :return: Tuple of ("Yes. <reasoning>" or "No. <reasoning>", confidence_pct float or None)
+                 confidence_pct is the model's probability for the Yes/No verdict (0–100).
+                 Without reasoning the verdict text is just "Yes." or "No.".
+                 With return_stats, a (that tuple, token counts) pair.
+        """
+        messages = self._build_classification_messages(
+            image_paths, title, description, max_frames, pixel_budgets,
+            structured=reasoning == "structured"
+        )
+        with self._count_tokens() as tokens:
+            inputs = self._prepare_inputs(messages)
+            result = self._classify_inputs(inputs, max_new_tokens, reasoning, max_sentences,
+                                           visual_keep_ratio, on_token, max_evidence, max_evidence_tokens)
+        return (result, tokens) if return_stats else result
+
+    def _classify_inputs(self, inputs, max_new_tokens, reasoning, max_sentences, visual_keep_ratio,
+                         on_token, max_evidence, max_evidence_tokens):
+        """classify_video on prepared single-video inputs."""
+        if reasoning == "structured":
+            return self._decode_structured(inputs, max_evidence, max_evidence_tokens, on_token=on_token)[0]
+
+        if reasoning in ("never", "positive"):
+            probs, prefilled = self._score_prefill(inputs, visual_keep_ratio=visual_keep_ratio)
+            if probs is not None:
+                is_yes = probs[0] >= probs[1]
+                confidence_pct = (probs[0] if is_yes else probs[1]) * 100
+                if on_token is not None:
+                    on_token({'type': 'verdict', 'verdict': 'Yes' if is_yes else 'No',
+                              'confidence_pct': confidence_pct})
+                if reasoning == "never" or not is_yes:
+                    verdict_text = "Yes." if is_yes else "No."
+                    if on_token is not None:
+                        on_token({'type': 'done', 'text': verdict_text})
+                    return verdict_text, confidence_pct
+                # The verdict event has been sent; only the reasoning remains to stream
+                verdict_text = self._continue_after_verdict(inputs, prefilled, self.yes_token_id,
+                                                            max_new_tokens, max_sentences, on_token)[0]
+                return verdict_text, confidence_pct
+            # Unknown verdict tokens: fall through to full generation
+
+        return self._decode_verdicts(inputs, max_new_tokens, max_sentences, on_token=on_token)[0]
+
+    def _streamer(self, inputs, on_token, capture=None, emit_verdict=True, answer_prefix_ids=None):
+        """
+        Streamer forwarding a generation to on_token, or None when nothing listens.
+
+        :param inputs: Processor outputs the generation runs on
+        :param on_token: One callback for single-row inputs, or a list of callbacks (or None)
+                         aligned with the rows of a batch
+        :return: VerdictStreamer, BatchVerdictStreamer or None
+        """
+        rows = inputs.input_ids.shape[0]
+        callbacks = list(on_token) if isinstance(on_token, (list, tuple)) else [on_token] if rows == 1 else []
+        if not any(callbacks):
+            return None
+        streamers = [
+            VerdictStreamer(self.processor.tokenizer, callback, capture, emit_verdict, answer_prefix_ids, row)
+            if callback is not None else None
+            for row, callback in enumerate(callbacks)
+        ]
+        return streamers[0] if rows == 1 else BatchVerdictStreamer(streamers)
+
+    def _continue_after_verdict(self, inputs, prefilled, verdict_token_id, max_new_tokens=512,
+                                max_sentences=6, on_token=None):
+        """
+        Decode the reasoning that follows a scored verdict, for every row of the inputs.
+
+        The verdict token is forced as the first answer token, so the text
+        always agrees with the verdict already reported. When the scoring
+        pass left a KV cache over the whole prompt, decoding continues from
+        it and the prompt is not prefilled again.
+
+        :param inputs: Processor outputs, one row per video
+        :param prefilled: Scoring-pass outputs over exactly these rows, or None to prefill again
+                          (pruned scoring keeps no cache, and reasoning sees every visual token)
+        :param verdict_token_id: Token forced as the first answer token
+        :param max_new_tokens: Maximum answer tokens, the verdict included
+        :param max_sentences: Sentence limit per row (None = run to EOS or max_new_tokens)
+        :param on_token: Optional stream callback, or list of callbacks per row (see _streamer);
+                         the verdict event is assumed already sent
+        :return: List of answer texts starting with the verdict, one per row
+        """
+        prompt_length = inputs.input_ids.shape[1]
+        verdict = torch.full((inputs.input_ids.shape[0], 1), verdict_token_id, dtype=inputs.input_ids.dtype,
+                             device=inputs.input_ids.device)
+        input_ids = torch.cat([inputs.input_ids, verdict], dim=1)
+        attention_mask = torch.cat([inputs.attention_mask, torch.ones_like(verdict)], dim=1)
+
+        stopping_criteria = StoppingCriteriaList()
+        sentence_stop = None
+        if max_sentences:
+            sentence_stop = SentenceStoppingCriteria(self.processor.tokenizer, prompt_length, max_sentences)
+            stopping_criteria.append(sentence_stop)
+
+        streamer = self._streamer(inputs, on_token, emit_verdict=False, answer_prefix_ids=[verdict_token_id])
+
+        generate_kwargs = dict(max_new_tokens=max(1, max_new_tokens - 1),
+                               stopping_criteria=stopping_criteria, streamer=streamer)
+        if prefilled is not None:
+            # The cache covers the prompt; generate() runs only the forced verdict token
+            generated_ids = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=prefilled.past_key_values,
+                **generate_kwargs,
+            )
+        else:
+            extended = BatchFeature({**inputs, 'input_ids': input_ids, 'attention_mask': attention_mask})
+            generated_ids = self._generate(extended, SCAM_DEFINITION_PROMPT, **generate_kwargs)
+
+        new_tokens = generated_ids[:, prompt_length:]
+        texts = self.processor.batch_decode(
+            new_tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False
+        )
+        self._record_generation(
+            int(inputs.attention_mask.sum()),
+            int((new_tokens != self.processor.tokenizer.pad_token_id).sum()),
+        )
+        return [
+            _trim_to_last_sentence(text) if sentence_stop is not None and sentence_stop.fired(row) else text
+            for row, text in enumerate(texts)
+        ]
+
+    def _decode_verdicts(self, inputs, max_new_tokens=512, max_sentences=6, on_token=None,
+                         emit_verdict=True):
+        """
+        Generate verdict + reasoning for every row of a (possibly batched) classification input.
+
+        :param inputs: Processor outputs, one row per video
+        :param max_new_tokens: Maximum tokens to generate
+        :param max_sentences: Sentence limit per row (None = run to EOS or max_new_tokens)
+        :param on_token: Optional stream callback, or list of callbacks per row (see _streamer)
+        :param emit_verdict: Send a 'verdict' event on the first token (False if already sent)
+        :return: List of (verdict_text, confidence_pct) tuples, one per row
+        """
+        prompt_length = inputs.input_ids.shape[1]
+        logits_processor = LogitsProcessorList()
+        capture = None
+        if self.yes_token_id is not None and self.no_token_id is not None:
+            capture = YesNoProbabilityCapture(self.yes_token_id, self.no_token_id)
+            logits_processor.append(capture)
+
+        stopping_criteria = StoppingCriteriaList()
+        sentence_stop = None
+        if max_sentences:
+            sentence_stop = SentenceStoppingCriteria(self.processor.tokenizer, prompt_length, max_sentences)
+            stopping_criteria.append(sentence_stop)
+
+        streamer = self._streamer(inputs, on_token, capture, emit_verdict)
+
+        generated_ids = self._generate(
+            inputs,
+            SCAM_DEFINITION_PROMPT,
+            max_new_tokens=max_new_tokens,
+            logits_processor=logits_processor,
+            stopping_criteria=stopping_criteria,
+            streamer=streamer,
+        )
+
+        new_tokens = generated_ids[:, prompt_length:]
+        texts = self.processor.batch_decode(
+            new_tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False
+        )
+        self._record_generation(
+            int(inputs.attention_mask.sum()),
+            int((new_tokens != self.processor.tokenizer.pad_token_id).sum()),
+        )
+
+        results = []
+        for row, verdict_text in enumerate(texts):
+            if sentence_stop is not None and sentence_stop.fired(row):
+                verdict_text = _trim_to_last_sentence(verdict_text)
+
+            # --- Logit-based confidence ---
+            # The capture processor saw the scores for the FIRST generated token only.
+            # We compare the probability for "Yes" vs "No" to get a calibrated confidence.
+            confidence_pct = None
+            if capture is not None and capture.probs:
+                p_yes, p_no = capture.probs[row]
                 is_yes = verdict_text.strip().lower().startswith("yes")
                 # confidence = probability of whichever answer was actually given
-                confidence_pct = (probs[0] if is_yes else probs[1]).item() * 100
-        except Exception:
-            confidence_pct = None
+                confidence_pct = (p_yes if is_yes else p_no) * 100
+
+            results.append((verdict_text, confidence_pct))
+
+        return results
+
+    def _text_token_mask(self):
+        """
+        Vocabulary mask of tokens allowed inside structured free text, computed once.
+
+        Excludes special tokens and any token that decodes to a line break.
+        """
+        if getattr(self, '_structured_text_mask', None) is None:
+            tokenizer = self.processor.tokenizer
+            pieces = tokenizer.batch_decode([[i] for i in range(len(tokenizer))], skip_special_tokens=True)
+            special = set(tokenizer.all_special_ids)
+            self._structured_text_mask = torch.tensor([
+                bool(piece) and '\n' not in piece and '\r' not in piece and i not in special
+                for i, piece in enumerate(pieces)
+            ])
+        return self._structured_text_mask
+
+    def _decode_structured(self, inputs, max_evidence=3, max_evidence_tokens=16, on_token=None):
+        """
+        Constrained, greedy generation of the structured verdict for every row.
+
+        :param inputs: Processor outputs (structured prompt), one row per video
+        :param max_evidence: Maximum evidence lines
+        :param max_evidence_tokens: Maximum tokens per evidence line
+        :param on_token: Optional stream callback, or list of callbacks per row (see _streamer)
+        :return: List of (structured_text, confidence_pct) tuples, one per row
+        """
+        eos = self.model.generation_config.eos_token_id
+        constraint = StructuredVerdictProcessor(
+            self.processor.tokenizer,
+            inputs.input_ids.shape[1],
+            eos if isinstance(eos, (list, tuple)) else [eos],
+            self._text_token_mask(),
+            max_evidence=max_evidence,
+            max_evidence_tokens=max_evidence_tokens,
+        )
+
+        streamer = self._streamer(inputs, on_token, constraint)
+
+        # Greedy: sampling warpers (top-k) could cut every allowed token
+        generated_ids = self._generate(
+            inputs,
+            SCAM_DEFINITION_PROMPT,
+            max_new_tokens=constraint.max_new_tokens,
+            logits_processor=LogitsProcessorList([constraint]),
+            do_sample=False,
+            streamer=streamer,
+        )
+
+        new_tokens = generated_ids[:, inputs.input_ids.shape[1]:]
+        texts = self.processor.batch_decode(
+            new_tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False
+        )
+        self._record_generation(
+            int(inputs.attention_mask.sum()),
+            int((new_tokens != self.processor.tokenizer.pad_token_id).sum()),
+        )
+
+        results = []
+        for row, text in enumerate(texts):
+            p_yes, p_no = constraint.probs[row]
+            is_yes = text.strip().startswith("Yes")
+            results.append((text.strip(), (p_yes if is_yes else p_no) * 100))
+        return results
+
+    def classify_videos(self, videos, max_frames=6, max_new_tokens=512, reasoning="always",
+                        max_sentences=6, visual_keep_ratio=1.0, max_evidence=3, max_evidence_tokens=16,
+                        return_stats=False):
+        """
+        Classify several videos with one padded processor call and one forward/generate pass.
+
+        Videos whose frames fail to load are isolated before batching; if the
+        batched pass fails, each video is retried on its own.
+
+        :param videos: List of dicts with 'image_paths' and optional 'title' / 'description' /
+                       'pixel_budgets' / 'on_token' (stream callback for that video, see
+                       classify_video; each row's verdict and reasoning stream as the batch decodes)
+        :param max_frames: Maximum number of frames per video
+        :param max_new_tokens: Maximum tokens to generate
+        :param reasoning: "always", "positive", "never" or "structured" (see classify_video)
+        :param max_sentences: Sentence limit per answer
+        :param visual_keep_ratio: Fraction of visual tokens kept for verdict scoring; below 1.0
+                                  the verdict pass runs per video (pruning is single-sequence)
+        :param max_evidence: Structured mode — maximum evidence lines
+        :param max_evidence_tokens: Structured mode — maximum tokens per evidence line
+        :param return_stats: Also return the prompt/generated token counts of every pass this
+                             call ran (batch, continuation and per-video retries)
+        :return: List aligned with videos holding (verdict_text, confidence_pct) or the Exception
+                 raised; with return_stats, a (list, token counts) pair
+        """
+        with self._count_tokens() as tokens:
+            results = self._classify_batch(videos, max_frames, max_new_tokens, reasoning, max_sentences,
+                                           visual_keep_ratio, max_evidence, max_evidence_tokens)
+        return (results, tokens) if return_stats else results
+
+    def _classify_batch(self, videos, max_frames, max_new_tokens, reasoning, max_sentences,
+                        visual_keep_ratio, max_evidence, max_evidence_tokens):
+        """classify_videos without the token tally."""
+        results = [None] * len(videos)
+        prepared = []
+
+        def callbacks(items):
+            return [videos[i].get('on_token') for i, _, _ in items]
+
+        for i, video in enumerate(videos):
+            try:
+                messages = self._build_classification_messages(
+                    video['image_paths'], video.get('title'), video.get('description'), max_frames,
+                    video.get('pixel_budgets'), structured=reasoning == "structured"
+                )
+                image_inputs, _ = process_vision_info(messages)
+                prepared.append((i, messages, image_inputs))
+            except Exception as e:
+                results[i] = e
+
+        try:
+            pending = prepared
+            if pending and reasoning in ("never", "positive"):
+                outputs = None
+                if visual_keep_ratio < 1.0:
+                    row_probs = [
+                        self.score_verdict(self._batch_inputs([item]), visual_keep_ratio=visual_keep_ratio)
+                        for item in pending
+                    ]
+                else:
+                    inputs = self._batch_inputs(pending)
+                    outputs = self._prefill_with_vision_cache(inputs, SCAM_DEFINITION_PROMPT)
+                    if outputs is None:
+                        with torch.no_grad():
+                            outputs = self.model(**inputs, use_cache=True, logits_to_keep=1)
+                    logits = outputs.logits[:, -1]
+                    row_probs = [self._yes_no_probs(row_logits) for row_logits in logits]
+                    self._record_generation(int(inputs.attention_mask.sum()), 0)
+
+                still_pending, positive = [], []
+                for item, probs in zip(pending, row_probs):
+                    if probs is None:
+                        still_pending.append(item)
+                        continue
+                    is_yes = probs[0] >= probs[1]
+                    on_token = videos[item[0]].get('on_token')
+                    if on_token is not None:
+                        on_token({'type': 'verdict', 'verdict': 'Yes' if is_yes else 'No',
+                                  'confidence_pct': max(probs) * 100})
+                    if reasoning == "positive" and is_yes:
+                        positive.append((item, probs[0] * 100))
+                        continue
+                    results[item[0]] = ("Yes." if is_yes else "No."), max(probs) * 100
+                    if on_token is not None:
+                        on_token({'type': 'done', 'text': results[item[0]][0]})
+
+                if positive:
+                    # Forced "Yes" continuation; the scoring cache is reusable only when it
+                    # covers exactly these rows
+                    reuse = outputs is not None and len(positive) == len(pending)
+                    positive_items = [item for item, _ in positive]
+                    texts = self._continue_after_verdict(
+                        inputs if reuse else self._batch_inputs(positive_items),
+                        outputs if reuse else None, self.yes_token_id, max_new_tokens, max_sentences,
+                        on_token=callbacks(positive_items)
+                    )
+                    for ((i, _, _), confidence_pct), text in zip(positive, texts):
+                        results[i] = text, confidence_pct
+                pending = still_pending
 
-        return verdict_text, confidence_pct
+            if pending and reasoning == "structured":
+                verdicts = self._decode_structured(self._batch_inputs(pending), max_evidence, max_evidence_tokens,
+                                                   on_token=callbacks(pending))
+                for (i, _, _), verdict in zip(pending, verdicts):
+                    results[i] = verdict
+                pending = []
+
+            if pending:
+                verdicts = self._decode_verdicts(self._batch_inputs(pending), max_new_tokens, max_sentences,
+                                                 on_token=callbacks(pending))
+                for (i, _, _), verdict in zip(pending, verdicts):
+                    results[i] = verdict
+
+        except Exception as e:
+            if len(prepared) == 1:
+                results[prepared[0][0]] = e
+                return results
+            print(f"Batched classification failed ({e}); retrying videos one at a time")
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            for i, _, _ in prepared:
+                video = videos[i]
+                try:
+                    results[i] = self.classify_video(
+                        video['image_paths'], video.get('title'), video.get('description'),
+                        max_frames=max_frames, max_new_tokens=max_new_tokens,
+                        reasoning=reasoning, max_sentences=max_sentences,
+                        visual_keep_ratio=visual_keep_ratio, pixel_budgets=video.get('pixel_budgets'),
+                        on_token=video.get('on_token'),
+                        max_evidence=max_evidence, max_evidence_tokens=max_evidence_tokens,
+                    )
+                except Exception as item_error:
+                    results[i] = item_error
+
+        return results
+
+    def _batch_inputs(self, prepared):
+        """Left-padded processor inputs for prepared (index, messages, images) items."""
+        texts = [
+            self.processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+            for _, messages, _ in prepared
+        ]
+        images = [image for _, _, image_inputs in prepared for image in image_inputs]
+        return self.processor(
+            text=texts,
+            images=images,
+            padding=True,
+            return_tensors="pt",
+        ).to(self.device)
+
+    def _analyze_batch(self, image_paths, prompts, max_new_tokens=512):
+        """
+        Run several single-image conversations through one padded processor call and one generate().
+
+        Images that fail to load are isolated before batching; if the batched
+        generate fails (e.g. out of memory) the batch is split in half and retried.
+
+        :param image_paths: List of image paths
+        :param prompts: One prompt per image
+        :param max_new_tokens: Maximum tokens to generate per item
+        :return: List aligned with image_paths holding the response text or the Exception raised
+        """
+        results = [None] * len(image_paths)
+        prepared = []
+
+        for i, (image_path, prompt) in enumerate(zip(image_paths, prompts)):
+            messages = [{"role": "user", "content": [
+                {"type": "image", "image": image_path},
+                {"type": "text", "text": prompt},
+            ]}]
+            try:
+                image_inputs, _ = process_vision_info(messages)
+                prepared.append((i, messages, image_inputs))
+            except Exception as e:
+                results[i] = e
+
+        self._generate_prepared(prepared, results, max_new_tokens)
+        return results
+
+    def _generate_prepared(self, prepared, results, max_new_tokens):
+        """Generate for prepared (index, messages, images) items, bisecting on failure."""
+        if not prepared:
+            return
+
+        try:
+            inputs = self._batch_inputs(prepared)
+            generated_ids = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+            decoded = self.processor.batch_decode(
+                generated_ids[:, inputs.input_ids.shape[1]:],
+                skip_special_tokens=True, clean_up_tokenization_spaces=False
+            )
+            for (i, _, _), text in zip(prepared, decoded):
+                results[i] = text
+
+        except Exception as e:
+            if len(prepared) == 1:
+                results[prepared[0][0]] = e
+                return
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            middle = len(prepared) // 2
+            self._generate_prepared(prepared[:middle], results, max_new_tokens)
+            self._generate_prepared(prepared[middle:], results, max_new_tokens)
 
     def batch_analyze(self, image_paths, prompt, batch_size=4):
         """
@@ -352,16 +1708,15 @@ Analyze this image for scam indicators and explain how the visual content relate
 
         :param image_paths: List of image paths
         :param prompt: Prompt for analysis
-        :param batch_size: Number of images to process at once
+        :param batch_size: Number of images per generate() call
         :return: List of analysis results
         """
         results = []
         for i in range(0, len(image_paths), batch_size):
             batch = image_paths[i:i + batch_size]
-            for img_path in batch:
-                try:
-                    result = self.analyze_image(img_path, prompt)
-                    results.append({'image_path': img_path, 'analysis': result})
-                except Exception as e:
-                    results.append({'image_path': img_path, 'analysis': f"Error: {str(e)}"})
+            analyses = self._analyze_batch(batch, [prompt] * len(batch))
+            for img_path, analysis in zip(batch, analyses):
+                if isinstance(analysis, Exception):
+                    analysis = f"Error: {str(analysis)}"
+                results.append({'image_path': img_path, 'analysis': analysis})
         return results
@@ -4,10 +4,15 @@ OptiScam FastAPI Backend
 Start with:
     python -m uvicorn api:app --host 0.0.0.0 --port 8000
 
+or, to share model weights between several worker processes (CPU, Linux/macOS):
+    python prefork_server.py --workers 4 --port 8000
+
 The frontend (Next.js) connects to this server via http://localhost:8000.
 """
 
 import os
+import json
+import time
 import uuid
 import threading
 from pathlib import Path
@@ -17,6 +22,7 @@ from fastapi import FastAPI, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
 from main import OptiScamAnalyzer
+from prefork_server import process_memory
 
 # ---------------------------------------------------------------------------
 # App setup
@@ -36,16 +42,51 @@ UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # ---------------------------------------------------------------------------
-# Load models once at startup (Qwen3-VL + Whisper + TrOCR)
+# Models (Qwen3-VL + Whisper + TrOCR) load on first use unless OPTISCAM_LAZY_MODELS=0
 # ---------------------------------------------------------------------------
 
-print("Initializing OptiScam models (this takes ~30 s on first run)...")
-analyzer = OptiScamAnalyzer()
-print("Models ready — API is accepting requests.\n")
+print("Initializing OptiScam models...")
+# Job threads share one VLM through a batching scheduler instead of calling it concurrently
+analyzer = OptiScamAnalyzer(config={
+    'use_vlm_scheduler': True,
+    'vlm_max_batch_size': int(os.environ.get('OPTISCAM_VLM_MAX_BATCH', 4)),
+    'vlm_max_wait_ms': float(os.environ.get('OPTISCAM_VLM_MAX_WAIT_MS', 50)),
+    'lazy_model_loading': os.environ.get('OPTISCAM_LAZY_MODELS', '1') != '0',
+    'model_memory_limit_mb': float(os.environ['OPTISCAM_MODEL_MEMORY_MB'])
+                             if os.environ.get('OPTISCAM_MODEL_MEMORY_MB') else None,
+    'device': os.environ.get('OPTISCAM_DEVICE') or None,
+    'cpu_threads': int(os.environ['OPTISCAM_CPU_THREADS']) if os.environ.get('OPTISCAM_CPU_THREADS') else None,
+    # Thread budgets sized for this many overlapping jobs; more jobs wait for a slot
+    'max_concurrent_jobs': int(os.environ['OPTISCAM_MAX_CONCURRENT_JOBS'])
+                           if os.environ.get('OPTISCAM_MAX_CONCURRENT_JOBS') else None,
+    'cpu_pin_jobs': os.environ.get('OPTISCAM_PIN_JOBS', '0') == '1',
+    # Off by default; implied by a job limit or pinning, and set by prefork_server.py
+    'resource_governor': os.environ.get(
+        'OPTISCAM_RESOURCE_GOVERNOR',
+        '1' if os.environ.get('OPTISCAM_MAX_CONCURRENT_JOBS') or os.environ.get('OPTISCAM_PIN_JOBS') == '1' else '0'
+    ) == '1',
+    'model_bundle_dir': os.environ.get('OPTISCAM_MODEL_BUNDLE') or None,
+    # A bundled deployment warms up before reporting readiness unless OPTISCAM_WARMUP=0
+    'warm_up': os.environ.get('OPTISCAM_WARMUP', '1' if os.environ.get('OPTISCAM_MODEL_BUNDLE') else '0') == '1',
+})
+print("API is accepting requests.\n")
 
 # In-memory job store: {job_id: {"status": ..., "result": ..., "error": ...}}
 jobs: dict[str, dict] = {}
 
+# Windowed Whisper decoding that fills partial_transcript as it goes; off by default so
+# transcripts come from Whisper's native long-form decoder
+STREAM_TRANSCRIPT = os.environ.get('OPTISCAM_STREAM_TRANSCRIPT', '0') == '1'
+
+# Set by prefork_server.py: workers mirror their jobs here so any worker can answer a poll
+JOB_DIR = os.environ.get('OPTISCAM_JOB_DIR')
+# Finished jobs are removed from JOB_DIR (and this worker's store) after this many seconds
+JOB_TTL = float(os.environ.get('OPTISCAM_JOB_TTL', 3600))
+
+# Jobs changed since the mirror last wrote them
+_dirty_jobs: set[str] = set()
+_dirty_event = threading.Event()
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -70,6 +111,78 @@ def _json_safe(obj):
     return obj
 
 
+def _mark_dirty(job_id: str):
+    """Record a change to jobs[job_id] for the JOB_DIR mirror."""
+    if JOB_DIR:
+        _dirty_jobs.add(job_id)
+        _dirty_event.set()
+
+
+def _expire_job_files(finished: dict):
+    """Remove finished jobs older than JOB_TTL, plus files orphaned by earlier workers."""
+    now = time.time()
+    for job_id, finished_at in list(finished.items()):
+        if now - finished_at > JOB_TTL:
+            del finished[job_id]
+            jobs.pop(job_id, None)
+            try:
+                os.remove(os.path.join(JOB_DIR, f"{job_id}.json"))
+            except FileNotFoundError:
+                pass
+    # Keep this worker's long-running jobs fresh so other workers' sweeps leave them alone
+    for job_id in list(jobs):
+        if job_id not in finished:
+            try:
+                os.utime(os.path.join(JOB_DIR, f"{job_id}.json"))
+            except FileNotFoundError:
+                pass
+    for entry in os.scandir(JOB_DIR):
+        try:
+            if now - entry.stat().st_mtime > JOB_TTL and entry.name.split(".")[0] not in jobs:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def _mirror_jobs(interval=0.5):
+    """Write this worker's jobs to JOB_DIR when they change (prefork mode)."""
+    finished = {}           # {job_id: time written as done/error}
+    last_expiry = 0.0
+    while True:
+        # Idle workers wake only to expire old jobs
+        _dirty_event.wait(timeout=max(JOB_TTL / 4, interval))
+        _dirty_event.clear()
+        while _dirty_jobs:
+            job_id = _dirty_jobs.pop()
+            job = jobs.get(job_id)
+            if job is None:
+                continue
+            try:
+                data = json.dumps(_json_safe(job))
+            except (TypeError, ValueError, RuntimeError):
+                _dirty_jobs.add(job_id)  # mutated mid-serialization; retry next pass
+                break
+            tmp_path = os.path.join(JOB_DIR, f"{job_id}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(JOB_DIR, f"{job_id}.json"))
+            if job.get("status") in ("done", "error"):
+                finished.setdefault(job_id, time.time())
+
+        if time.time() - last_expiry > JOB_TTL / 4:
+            _expire_job_files(finished)
+            last_expiry = time.time()
+        # Coalesce bursts of streamed-token updates into one write per interval
+        time.sleep(interval)
+
+
+@app.on_event("startup")
+def _start_job_mirror():
+    # Started per worker process: threads from the preloading parent do not survive fork
+    if JOB_DIR:
+        threading.Thread(target=_mirror_jobs, name="job-mirror", daemon=True).start()
+
+
 # ---------------------------------------------------------------------------
 # Background analysis worker
 # ---------------------------------------------------------------------------
@@ -80,21 +193,52 @@ def _run_analysis(
     title: Optional[str],
     description: Optional[str],
     holistic: bool,
+    subtitle_path: Optional[str] = None,
 ):
     try:
         jobs[job_id]["status"] = "running"
+        jobs[job_id]["partial_transcript"] = []
+        jobs[job_id]["partial_verdict"] = None
+        _mark_dirty(job_id)
+
+        def on_transcript_segment(segment):
+            # Surface each decoded window to pollers while the pipeline continues
+            jobs[job_id]["partial_transcript"].append({
+                "start": float(segment["start"]),
+                "end": float(segment["end"]),
+                "text": segment["text"].strip(),
+            })
+            _mark_dirty(job_id)
+
+        def on_vlm_token(event):
+            # Verdict first (about one prefill after classification starts), then the reasoning
+            if event["type"] == "verdict":
+                jobs[job_id]["partial_verdict"] = {
+                    "verdict": event["verdict"],
+                    "confidence_score": event["confidence_pct"],
+                    "text": "",
+                }
+            elif event["type"] == "text" and jobs[job_id].get("partial_verdict") is not None:
+                jobs[job_id]["partial_verdict"]["text"] += event["text"]
+            _mark_dirty(job_id)
 
         if holistic:
             result = analyzer.analyze_video_holistic(
                 video_path=video_path,
                 title=title or None,
                 description=description or None,
+                on_transcript_segment=on_transcript_segment if STREAM_TRANSCRIPT else None,
+                subtitle_path=subtitle_path,
+                on_vlm_token=on_vlm_token,
             )
         else:
             result = analyzer.process_video(
                 video_path=video_path,
                 title=title or None,
                 description=description or None,
+                on_transcript_segment=on_transcript_segment if STREAM_TRANSCRIPT else None,
+                subtitle_path=subtitle_path,
+                on_vlm_token=on_vlm_token,
             )
 
         # Drop non-serializable config blob before returning
@@ -104,6 +248,7 @@ def _run_analysis(
             "status": "done",
             "result": _json_safe(result),
         }
+        _mark_dirty(job_id)
 
     except Exception as e:
         import traceback
@@ -112,14 +257,16 @@ def _run_analysis(
             "error": str(e),
             "traceback": traceback.format_exc(),
         }
+        _mark_dirty(job_id)
 
     finally:
-        # Remove the uploaded file to free disk space
-        try:
-            if os.path.exists(video_path):
-                os.remove(video_path)
-        except Exception:
-            pass
+        # Remove the uploaded file (and any fetched captions) to free disk space
+        for path in (video_path, subtitle_path):
+            try:
+                if path and os.path.exists(path):
+                    os.remove(path)
+            except Exception:
+                pass
 
 
 # ---------------------------------------------------------------------------
@@ -128,8 +275,25 @@ def _run_analysis(
 
 @app.get("/health")
 def health():
-    """Quick health check — confirms API and models are loaded."""
-    return {"status": "ok", "models_loaded": True}
+    """Quick health check — confirms the API is up and lists the models currently resident."""
+    return {"status": "ok", "models_loaded": list(analyzer.models.summary()['resident'])}
+
+
+@app.get("/stats")
+def stats():
+    """VLM scheduler metrics, vision cache hit rates, model loads/evictions and this process's memory."""
+    # Reading stats must not load the VLM
+    vision_model = analyzer.models.loaded('vlm')
+    vision_cache = vision_model.vision_cache if vision_model else None
+    return {
+        "load_times": analyzer.load_times,
+        "vlm_scheduler": analyzer.vlm_scheduler.stats() if analyzer.vlm_scheduler else None,
+        "vision_cache": vision_cache.summary() if vision_cache else None,
+        "models": analyzer.models.summary(),
+        "cpu_governor": analyzer.governor.summary() if analyzer.governor else None,
+        # Per worker process; private vs shared shows how much of the weights fork shares
+        "process_memory": {"pid": os.getpid(), **(process_memory() or {})},
+    }
 
 
 @app.post("/analyze")
@@ -155,6 +319,7 @@ async def analyze(
         f.write(content)
 
     jobs[job_id] = {"status": "pending"}
+    _mark_dirty(job_id)
 
     # Run the ML pipeline in a background thread (it's blocking / GPU-bound)
     thread = threading.Thread(
@@ -181,6 +346,7 @@ async def analyze_youtube(
     """
     job_id = str(uuid.uuid4())
     jobs[job_id] = {"status": "pending", "url": url}
+    _mark_dirty(job_id)
 
     thread = threading.Thread(
         target=_run_youtube_analysis,
@@ -192,6 +358,39 @@ async def analyze_youtube(
     return {"job_id": job_id}
 
 
+# Manual or automatic captions, fetched with the video; "-orig" is the auto-caption track in
+# the spoken language
+CAPTION_OPTS = {
+    "writesubtitles": True,
+    "writeautomaticsub": True,
+    "subtitleslangs": ["en.*", ".*-orig"],
+    "subtitlesformat": "vtt",
+}
+
+
+def _pick_caption_file(job_id: str) -> Optional[str]:
+    """
+    Choose the caption track yt-dlp wrote for a job and delete every other
+    {job_id}.*.vtt file, empty ones included. Returns the chosen .vtt path,
+    or None to fall back to Whisper.
+    """
+    # Caption files are written next to the video as <job_id>.<lang>.vtt;
+    # prefer manual English, then any English, then the original-language track
+    candidates = list(Path(UPLOAD_DIR).glob(f"{job_id}.*.vtt"))
+    subtitle_files = sorted(
+        (p for p in candidates if p.stat().st_size > 0),
+        key=lambda p: (p.suffixes[-2] != ".en", "-orig" in p.name, p.name),
+    )
+    chosen = subtitle_files[0] if subtitle_files else None
+    for path in candidates:
+        if path != chosen:
+            try:
+                path.unlink()
+            except Exception:
+                pass
+    return str(chosen) if chosen else None
+
+
 def _run_youtube_analysis(job_id: str, url: str, holistic: bool):
     """Download the YouTube video with yt-dlp, then hand off to _run_analysis."""
     try:
@@ -201,6 +400,7 @@ def _run_youtube_analysis(job_id: str, url: str, holistic: bool):
             "status": "error",
             "error": "yt-dlp is not installed. Run: pip install yt-dlp",
         }
+        _mark_dirty(job_id)
         return
 
     video_path = os.path.join(UPLOAD_DIR, f"{job_id}.mp4")
@@ -219,9 +419,19 @@ def _run_youtube_analysis(job_id: str, url: str, holistic: bool):
 
     try:
         jobs[job_id]["status"] = "downloading"
+        _mark_dirty(job_id)
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
+        # Captions come with the same extraction; they are best-effort, so a caption
+        # failure (e.g. HTTP 429 on the timedtext endpoint) retries without them
+        try:
+            with yt_dlp.YoutubeDL({**ydl_opts, **CAPTION_OPTS}) as ydl:
+                info = ydl.extract_info(url, download=True)
+        except Exception as e:
+            print(f"Download with captions failed, retrying without them: {e}")
+            info = None
+        if info is None:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=True)
 
         title         = info.get("title")       or None
         description   = info.get("description") or None
@@ -230,16 +440,21 @@ def _run_youtube_analysis(job_id: str, url: str, holistic: bool):
         # Expose thumbnail so the frontend can show it during analysis
         if thumbnail_url:
             jobs[job_id]["thumbnail_url"] = thumbnail_url
+            _mark_dirty(job_id)
+
+        subtitle_path = _pick_caption_file(job_id)
 
         # yt-dlp may have named the file differently; find the actual path
         actual_path = video_path
         if not os.path.exists(actual_path):
             # Try common suffixes yt-dlp appends when merging streams
             for candidate in Path(UPLOAD_DIR).glob(f"{job_id}.*"):
+                if candidate.suffix == ".vtt":
+                    continue
                 actual_path = str(candidate)
                 break
 
-        _run_analysis(job_id, actual_path, title, description, holistic)
+        _run_analysis(job_id, actual_path, title, description, holistic, subtitle_path)
 
     except Exception as e:
         import traceback
@@ -248,6 +463,7 @@ def _run_youtube_analysis(job_id: str, url: str, holistic: bool):
             "error": str(e),
             "traceback": traceback.format_exc(),
         }
+        _mark_dirty(job_id)
         # Clean up any partial download
         for f in Path(UPLOAD_DIR).glob(f"{job_id}*"):
             try:
@@ -264,10 +480,21 @@ def get_job(job_id: str):
     Returns:
         {"status": "pending"}      — queued, not started yet
         {"status": "downloading"}  — yt-dlp is fetching the YouTube video
-        {"status": "running"}      — AI analysis in progress
+        {"status": "running", "partial_transcript": [...], "partial_verdict": {...}}
+                                   — AI analysis in progress; transcript segments
+                                     appear as each audio window is decoded, and
+                                     partial_verdict (verdict, confidence_score, text)
+                                     as soon as the VLM emits its first token
         {"status": "done", "result": {...}}   — complete
         {"status": "error", "error": "..."}   — failed
     """
-    if job_id not in jobs:
-        raise HTTPException(status_code=404, detail="Job not found")
-    return jobs[job_id]
+    if job_id in jobs:
+        return jobs[job_id]
+    if JOB_DIR:
+        # Started by another preforked worker
+        try:
+            with open(os.path.join(JOB_DIR, f"{os.path.basename(job_id)}.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    raise HTTPException(status_code=404, detail="Job not found")
@@ -0,0 +1,299 @@
+"""
+Spectral-landmark audio fingerprinting for known scam soundtracks.
+
+Recycled scam campaigns reuse the same voice-over across many re-uploads.
+Each track is reduced to pairs of spectrogram peaks (anchor frequency, target
+frequency, time delta) packed into 32-bit hashes. A re-upload shares many
+hashes with the stored track at one consistent time offset, which survives
+trimming, re-encoding and volume changes.
+
+Usage:
+    python audio_fingerprint.py add known_scams.npz scam_video.mp4 --verdict "Yes. ..."
+    python audio_fingerprint.py match known_scams.npz new_upload.mp4
+"""
+
+import os
+import json
+import argparse
+import subprocess
+
+import numpy as np
+
+
+SAMPLE_RATE = 8000
+N_FFT = 1024
+HOP_LENGTH = 256
+# Frequency band edges (FFT bins); one peak per band per frame
+BAND_EDGES = (1, 10, 20, 40, 80, 160, 511)
+FAN_OUT = 5
+MAX_DELTA_FRAMES = 63  # fits in the 6 low bits of the hash
+
+
+def load_audio(path, sample_rate=SAMPLE_RATE, max_seconds=None):
+    """
+    Decode the audio track of any media file to mono float32 using ffmpeg.
+
+    :param path: Path to audio or video file
+    :param sample_rate: Output sample rate
+    :param max_seconds: Only decode the first N seconds (None = whole file)
+    :return: numpy float32 array, or None if decoding failed
+    """
+    command = ['ffmpeg', '-nostdin', '-i', path]
+    if max_seconds:
+        command += ['-t', str(max_seconds)]
+    command += ['-vn', '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le',
+                '-ar', str(sample_rate), '-']
+
+    try:
+        out = subprocess.run(command, check=True, capture_output=True).stdout
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"Error decoding audio for fingerprinting: {e}")
+        return None
+
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def spectrogram(samples, chunk_frames=2048):
+    """
+    Log-magnitude STFT, computed in chunks to bound memory on long tracks.
+
+    :param samples: Mono float32 samples
+    :param chunk_frames: STFT frames per chunk
+    :return: Array of shape (frames, N_FFT // 2 + 1)
+    """
+    if len(samples) < N_FFT:
+        samples = np.pad(samples, (0, N_FFT - len(samples)))
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, N_FFT)[::HOP_LENGTH]
+    window = np.hanning(N_FFT).astype(np.float32)
+
+    chunks = []
+    for i in range(0, len(frames), chunk_frames):
+        magnitude = np.abs(np.fft.rfft(frames[i:i + chunk_frames] * window, axis=1))
+        chunks.append(np.log1p(magnitude).astype(np.float32))
+    return np.concatenate(chunks)
+
+
+def find_peaks(spec):
+    """
+    Pick the strongest bin in each frequency band, keeping those above the frame's band average.
+
+    :param spec: Log-magnitude spectrogram (frames, bins)
+    :return: Tuple of (frame indices, bin indices), sorted by time then frequency
+    """
+    band_bins = []
+    band_values = []
+    for lo, hi in zip(BAND_EDGES[:-1], BAND_EDGES[1:]):
+        band = spec[:, lo:hi]
+        arg = band.argmax(axis=1)
+        band_bins.append(arg + lo)
+        band_values.append(band[np.arange(len(band)), arg])
+
+    bins = np.stack(band_bins, axis=1)
+    values = np.stack(band_values, axis=1)
+
+    # Skip near-silent frames entirely, then keep above-average bands
+    energy = spec.sum(axis=1)
+    audible = energy > np.percentile(energy, 10)
+    keep = (values >= values.mean(axis=1, keepdims=True)) & audible[:, None]
+
+    times, bands = np.nonzero(keep)
+    return times.astype(np.int64), bins[times, bands].astype(np.int64)
+
+
+def landmark_hashes(samples):
+    """
+    Fingerprint audio as (hash, anchor time) landmark pairs.
+
+    :param samples: Mono float32 samples at SAMPLE_RATE
+    :return: Tuple of (uint32 hashes, uint32 anchor frame offsets)
+    """
+    times, freqs = find_peaks(spectrogram(samples))
+
+    all_hashes = []
+    all_times = []
+    for k in range(1, FAN_OUT + 1):
+        dt = times[k:] - times[:-k]
+        valid = (dt > 0) & (dt <= MAX_DELTA_FRAMES)
+        f1, f2 = freqs[:-k][valid], freqs[k:][valid]
+        all_hashes.append((f1 << 16) | (f2 << 6) | dt[valid])
+        all_times.append(times[:-k][valid])
+
+    if not all_hashes:
+        return np.empty(0, np.uint32), np.empty(0, np.uint32)
+
+    return (np.concatenate(all_hashes).astype(np.uint32),
+            np.concatenate(all_times).astype(np.uint32))
+
+
+class AudioFingerprintIndex:
+    def __init__(self, index_path=None, min_aligned_hashes=20, min_match_ratio=0.05,
+                 query_seconds=60):
+        """
+        On-disk hash index of known-scam audio tracks.
+
+        :param index_path: Path to a .npz index (loaded if it exists)
+        :param min_aligned_hashes: Minimum time-aligned hash hits for a confident match
+        :param min_match_ratio: Minimum fraction of query hashes that must align
+        :param query_seconds: Only fingerprint the first N seconds of a query
+        """
+        self.index_path = index_path
+        self.min_aligned_hashes = min_aligned_hashes
+        self.min_match_ratio = min_match_ratio
+        self.query_seconds = query_seconds
+
+        self.hashes = np.empty(0, np.uint32)
+        self.offsets = np.empty(0, np.uint32)
+        self.track_ids = np.empty(0, np.uint32)
+        self.tracks = []
+
+        if index_path and os.path.exists(index_path):
+            self.load(index_path)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def load(self, index_path):
+        """Load hash arrays and track metadata from a .npz index."""
+        data = np.load(index_path)
+        self.hashes = data['hashes']
+        self.offsets = data['offsets']
+        self.track_ids = data['track_ids']
+        self.tracks = json.loads(str(data['tracks']))
+        print(f"Loaded audio fingerprint index: {len(self.tracks)} tracks, "
+              f"{len(self.hashes)} hashes")
+
+    def save(self, index_path=None):
+        """Write the index as compressed uint32 arrays plus JSON track metadata."""
+        index_path = index_path or self.index_path
+        np.savez_compressed(
+            index_path,
+            hashes=self.hashes,
+            offsets=self.offsets,
+            track_ids=self.track_ids,
+            tracks=np.array(json.dumps(self.tracks)),
+        )
+        print(f"Saved audio fingerprint index to: {index_path}")
+
+    def add_track(self, media_path, verdict, is_scam=True, confidence_score=None, name=None):
+        """
+        Fingerprint a known track and add it with its stored verdict.
+
+        :param media_path: Path to audio or video file
+        :param verdict: Verdict text returned on a match
+        :param is_scam: Stored scam flag
+        :param confidence_score: Stored confidence (0-100) or None
+        :param name: Display name (defaults to the file name)
+        :return: Track id, or None if the audio could not be decoded
+        """
+        samples = load_audio(media_path)
+        if samples is None or len(samples) == 0:
+            return None
+
+        hashes, offsets = landmark_hashes(samples)
+        track_id = len(self.tracks)
+        self.tracks.append({
+            'track_id': track_id,
+            'name': name or os.path.basename(media_path),
+            'verdict': verdict,
+            'is_scam': is_scam,
+            'confidence_score': confidence_score,
+            'num_hashes': int(len(hashes)),
+        })
+
+        # Keep the arrays sorted by hash so lookups are a searchsorted
+        hashes = np.concatenate([self.hashes, hashes])
+        order = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[order]
+        self.offsets = np.concatenate([self.offsets, offsets])[order]
+        self.track_ids = np.concatenate(
+            [self.track_ids, np.full(len(offsets), track_id, np.uint32)]
+        )[order]
+
+        print(f"Added '{self.tracks[-1]['name']}' to fingerprint index ({len(offsets)} hashes)")
+        return track_id
+
+    def match(self, media_path):
+        """
+        Look up a query file against the index.
+
+        :param media_path: Path to audio or video file
+        :return: Match dict (track metadata + alignment stats) if confident, else None
+        """
+        if not self.tracks:
+            return None
+
+        samples = load_audio(media_path, max_seconds=self.query_seconds)
+        if samples is None or len(samples) == 0:
+            return None
+
+        query_hashes, query_offsets = landmark_hashes(samples)
+        if len(query_hashes) == 0:
+            return None
+
+        left = np.searchsorted(self.hashes, query_hashes, side='left')
+        right = np.searchsorted(self.hashes, query_hashes, side='right')
+        counts = right - left
+        total = int(counts.sum())
+        if total == 0:
+            return None
+
+        # Expand every query hash into the index rows sharing it
+        starts = np.repeat(left - (np.cumsum(counts) - counts), counts)
+        rows = np.arange(total) + starts
+        deltas = self.offsets[rows].astype(np.int64) - np.repeat(query_offsets, counts).astype(np.int64)
+        tracks = self.track_ids[rows].astype(np.int64)
+
+        # A true match piles up at one (track, offset delta) pair
+        keys = (tracks << 32) | (deltas + (1 << 31))
+        unique_keys, key_counts = np.unique(keys, return_counts=True)
+        best = int(key_counts.argmax())
+        aligned = int(key_counts[best])
+        track_id = int(unique_keys[best] >> 32)
+        ratio = aligned / len(query_hashes)
+
+        if aligned < self.min_aligned_hashes or ratio < self.min_match_ratio:
+            return None
+
+        offset_seconds = float((int(unique_keys[best]) & 0xFFFFFFFF) - (1 << 31)) * HOP_LENGTH / SAMPLE_RATE
+        return {
+            **self.tracks[track_id],
+            'aligned_hashes': aligned,
+            'match_ratio': ratio,
+            'offset_seconds': offset_seconds,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Known-scam audio fingerprint index')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help='Add a known-scam track to the index')
+    add_parser.add_argument('index_path', type=str, help='Path to .npz index (created if missing)')
+    add_parser.add_argument('media_path', type=str, help='Audio or video file')
+    add_parser.add_argument('--verdict', type=str, required=True,
+                            help='Verdict text returned on a match')
+    add_parser.add_argument('--not-scam', action='store_true',
+                            help='Store the track as legitimate instead of scam')
+    add_parser.add_argument('--confidence', type=float, default=None,
+                            help='Stored confidence score (0-100)')
+    add_parser.add_argument('--name', type=str, default=None, help='Display name')
+
+    match_parser = subparsers.add_parser('match', help='Match a file against the index')
+    match_parser.add_argument('index_path', type=str, help='Path to .npz index')
+    match_parser.add_argument('media_path', type=str, help='Audio or video file')
+
+    args = parser.parse_args()
+    index = AudioFingerprintIndex(args.index_path)
+
+    if args.command == 'add':
+        if index.add_track(args.media_path, args.verdict, is_scam=not args.not_scam,
+                           confidence_score=args.confidence, name=args.name) is not None:
+            index.save(args.index_path)
+    else:
+        match = index.match(args.media_path)
+        print(json.dumps(match, indent=2) if match else "No confident match.")
+
+
+if __name__ == "__main__":
+    main()
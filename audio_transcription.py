@@ -4,22 +4,79 @@ import json
 import torch
 from pathlib import Path
 
+from timeline_index import IntervalList
+
+
+# Named decoding profiles for Whisper.
+#   word_timestamps  — run the cross-attention alignment pass for word-level timing
+#   beam_size        — None = greedy decoding
+#   temperature      — a single 0.0 disables the temperature-fallback re-decodes
+#   detect_language  — 'once' detects on the first 30 s window and pins the result,
+#                      'auto' leaves detection to Whisper
+TRANSCRIPTION_PROFILES = {
+    'fast': {
+        'word_timestamps': False,
+        'beam_size': None,
+        'temperature': 0.0,
+        'detect_language': 'once',
+    },
+    'balanced': {
+        'word_timestamps': False,
+        'beam_size': None,
+        'temperature': (0.0, 0.4, 0.8),
+        'detect_language': 'auto',
+    },
+    'accurate': {
+        'word_timestamps': True,
+        'beam_size': 5,
+        'temperature': (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        'detect_language': 'auto',
+    },
+}
+
+
 class AudioTranscriber:
-    def __init__(self, model_size="base", device=None, language=None):
+    def __init__(self, model_size="base", device=None, language=None, profile="balanced",
+                 model_path=None):
         """
         Initialize Whisper audio transcription.
 
         :param model_size: Whisper model size (tiny, base, small, medium, large)
         :param device: Device to run on (cuda/cpu)
         :param language: Language code (e.g., 'en', 'es') or None for auto-detect
+        :param profile: Transcription profile name (fast, balanced, accurate)
+        :param model_path: Whisper directory from a model bundle (safetensors + dims), loaded
+                           instead of downloading model_size
         """
+        if profile not in TRANSCRIPTION_PROFILES:
+            raise ValueError(
+                f"Unknown transcription profile '{profile}'. "
+                f"Choose from: {', '.join(TRANSCRIPTION_PROFILES)}"
+            )
+
         self.model_size = model_size
+        self.model_path = model_path
         self.language = language
+        self.profile = profile
         self.device = device if device else ("cuda" if torch.cuda.is_available() else "cpu")
-
-        print(f"Loading Whisper {model_size} model on {self.device}...")
-        self.model = whisper.load_model(model_size, device=self.device)
-        print(f"Whisper model loaded successfully on {self.device}")
+        # (transcription_result, IntervalList) for the last result queried by timestamp
+        self._timeline_cache = (None, None)
+
+        # Weights load on the first transcription, so caption-track runs never pay for them
+        self._model = None
+
+    @property
+    def model(self):
+        """Whisper model, loaded on first use."""
+        if self._model is None:
+            print(f"Loading Whisper {self.model_size} model on {self.device}...")
+            if self.model_path:
+                from model_bundle import load_whisper
+                self._model = load_whisper(self.model_path, device=self.device)
+            else:
+                self._model = whisper.load_model(self.model_size, device=self.device)
+            print(f"Whisper model loaded successfully on {self.device}")
+        return self._model
 
     def extract_audio_from_video(self, video_path, output_audio_path=None):
         """
@@ -54,27 +111,142 @@ class AudioTranscriber:
             print(f"Error extracting audio: {e}")
             return None
 
-    def transcribe_audio(self, audio_path, word_timestamps=True):
+    def detect_language(self, audio):
+        """
+        Detect the spoken language from the first 30 s window only.
+
+        :param audio: Path to audio file or float32 waveform at 16 kHz
+        :return: Language code (e.g., 'en')
+        """
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+
+        window = whisper.pad_or_trim(audio)
+        mel = whisper.log_mel_spectrogram(window, n_mels=self.model.dims.n_mels).to(self.model.device)
+        _, probs = self.model.detect_language(mel)
+        language = max(probs, key=probs.get)
+        print(f"Detected language: {language} (p={probs[language]:.2f})")
+        return language
+
+    def _decode_options(self, audio, word_timestamps=None, language=None):
         """
-        Transcribe audio file with Whisper.
+        Build Whisper transcribe() keyword arguments from the active profile.
+
+        :param audio: Path to audio file or float32 waveform at 16 kHz
+        :param word_timestamps: Override the profile's word timestamp setting
+        :param language: Language code already known for this audio (skips detection)
+        :return: Tuple of (audio, options dict); audio is decoded once if language detection needs it
+        """
+        settings = TRANSCRIPTION_PROFILES[self.profile]
+
+        if word_timestamps is None:
+            word_timestamps = settings['word_timestamps']
+
+        language = language or self.language
+        if language is None and settings['detect_language'] == 'once':
+            if isinstance(audio, str):
+                audio = whisper.load_audio(audio)
+            language = self.detect_language(audio)
+
+        options = {
+            'language': language,
+            'word_timestamps': word_timestamps,
+            'temperature': settings['temperature'],
+            'fp16': self.device == "cuda",
+            'verbose': False,
+        }
+        if settings['beam_size'] is not None:
+            options['beam_size'] = settings['beam_size']
+            options['best_of'] = settings['beam_size']
+
+        return audio, options
+
+    def transcribe_audio(self, audio_path, word_timestamps=None):
+        """
+        Transcribe audio file with Whisper using the active profile.
 
         :param audio_path: Path to audio file
-        :param word_timestamps: Include word-level timestamps
+        :param word_timestamps: Include word-level timestamps (None = profile default)
         :return: Transcription result with timestamps
         """
-        print(f"Transcribing audio: {audio_path}")
+        print(f"Transcribing audio: {audio_path} (profile: {self.profile})")
 
-        result = self.model.transcribe(
-            audio_path,
-            language=self.language,
-            word_timestamps=word_timestamps,
-            verbose=False
-        )
+        audio, options = self._decode_options(audio_path, word_timestamps)
+        result = self.model.transcribe(audio, **options)
 
         return result
 
+    def iter_transcribe_audio(self, audio, language=None, word_timestamps=None,
+                              chunk_seconds=30, on_segment=None, info=None):
+        """
+        Transcribe audio window by window, yielding segments as each window is decoded.
+
+        Windows end on segment boundaries, as in Whisper's own seek loop: the last
+        segment of a window can be cut off mid-word at the window edge, so it is
+        dropped and the next window starts where it began. The language follows the
+        profile: pinned up front with detect_language='once' (or when configured),
+        otherwise detected by Whisper on the first window and then kept. The tail
+        of each window's text is passed as the prompt for the next one.
+
+        :param audio: Path to audio file or float32 waveform at 16 kHz
+        :param language: Language code to pin (None = configured language or profile detection)
+        :param word_timestamps: Include word-level timestamps (None = profile default)
+        :param chunk_seconds: Window length in seconds
+        :param on_segment: Optional callback invoked with each segment as it is decoded
+        :param info: Optional dict that receives the resolved 'language'
+        :return: Generator of segment dicts with absolute timestamps
+        """
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+
+        audio, options = self._decode_options(audio, word_timestamps, language)
+
+        sample_rate = whisper.audio.SAMPLE_RATE
+        window_samples = int(chunk_seconds * sample_rate)
+        segment_id = 0
+        prompt = None
+        start_sample = 0
+
+        while start_sample < len(audio):
+            window = audio[start_sample:start_sample + window_samples]
+            offset = start_sample / sample_rate
+            is_last = start_sample + window_samples >= len(audio)
+
+            result = self.model.transcribe(window, initial_prompt=prompt, **options)
+            if options['language'] is None:
+                options['language'] = result.get('language')
+
+            segments = result['segments']
+            next_start = start_sample + len(window)
+            # Re-decode a trailing segment in the next window unless that would barely advance
+            if not is_last and len(segments) > 1 and segments[-1]['start'] >= chunk_seconds / 2:
+                next_start = start_sample + int(segments[-1]['start'] * sample_rate)
+                segments = segments[:-1]
+
+            for segment in segments:
+                segment = dict(segment)
+                segment['id'] = segment_id
+                segment['start'] += offset
+                segment['end'] += offset
+                if segment.get('words'):
+                    segment['words'] = [
+                        {**word, 'start': word['start'] + offset, 'end': word['end'] + offset}
+                        for word in segment['words']
+                    ]
+                segment_id += 1
+
+                if on_segment is not None:
+                    on_segment(segment)
+                yield segment
+
+            prompt = ''.join(segment['text'] for segment in segments)[-200:].strip() or None
+            start_sample = next_start
+
+        if info is not None:
+            info['language'] = options['language']
+
     def transcribe_video(self, video_path, extract_audio=True, temp_audio_path=None,
-                         cleanup_audio=True):
+                         cleanup_audio=True, word_timestamps=None, on_segment=None):
         """
         Transcribe audio from video file.
 
@@ -82,6 +254,10 @@ class AudioTranscriber:
         :param extract_audio: Whether to extract audio first
         :param temp_audio_path: Path for temporary audio file
         :param cleanup_audio: Delete temporary audio file after transcription
+        :param word_timestamps: Include word-level timestamps (None = profile default)
+        :param on_segment: Optional callback receiving segments as they are decoded;
+                           switches to window-by-window streaming transcription (windows
+                           are cut on segment boundaries, same profile settings)
         :return: Transcription result with timestamps
         """
         if extract_audio:
@@ -91,7 +267,18 @@ class AudioTranscriber:
         else:
             audio_path = video_path
 
-        result = self.transcribe_audio(audio_path)
+        if on_segment is not None:
+            info = {}
+            segments = list(self.iter_transcribe_audio(
+                audio_path, word_timestamps=word_timestamps, on_segment=on_segment, info=info
+            ))
+            result = {
+                'text': ''.join(segment['text'] for segment in segments),
+                'segments': segments,
+                'language': info.get('language'),
+            }
+        else:
+            result = self.transcribe_audio(audio_path, word_timestamps=word_timestamps)
 
         # Cleanup temporary audio file
         if extract_audio and cleanup_audio and os.path.exists(audio_path):
@@ -130,13 +317,13 @@ class AudioTranscriber:
         :param timestamp: Time in seconds
         :return: Text active at that timestamp
         """
-        timeline = self.get_transcription_timeline(transcription_result)
-
-        for segment in timeline:
-            if segment['start'] <= timestamp <= segment['end']:
-                return segment['text']
+        cached_result, index = self._timeline_cache
+        if cached_result is not transcription_result:
+            index = IntervalList(self.get_transcription_timeline(transcription_result))
+            self._timeline_cache = (transcription_result, index)
 
-        return None
+        segments = index.at(timestamp)
+        return segments[0]['text'] if segments else None
 
     def export_transcription(self, transcription_result, output_path, format='txt'):
         """
@@ -0,0 +1,102 @@
+"""
+Throughput of the full pipeline under N concurrent jobs, with and without the
+CPU resource governor.
+
+Each (mode, N) pair runs in a fresh process, so thread pools sized by an
+earlier run never leak into the next. In "unmanaged" mode every library
+keeps its default all-core pools. In "governed" mode the governor sizes
+the pools for N concurrent jobs (optionally pinning each job). Models are
+loaded and warmed up before timing starts.
+
+Usage:
+    python benchmark_concurrency.py video.mp4 --jobs 1 2 4 --rounds 2
+    python benchmark_concurrency.py video.mp4 --jobs 4 --pin
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_child(video_path, mode, jobs, rounds, pin):
+    """Run jobs * rounds analyses, jobs at a time, and print one JSON result line."""
+    from main import OptiScamAnalyzer
+
+    analyzer = OptiScamAnalyzer(config={
+        'resource_governor': mode == 'governed',
+        'max_concurrent_jobs': jobs if mode == 'governed' else None,
+        'cpu_pin_jobs': pin,
+        'use_vlm_scheduler': True,
+        'vlm_reasoning': 'never',
+        'device': 'cpu',
+    })
+    analyzer.preload_models()
+    analyzer.warm_up()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        def analyze(i):
+            started = time.perf_counter()
+            analyzer.process_video(
+                video_path,
+                title="Benchmark",
+                output_dir=os.path.join(tmp_dir, f"job_{i}"),
+            )
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            latencies = list(pool.map(analyze, range(jobs * rounds)))
+        elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        'mode': mode,
+        'jobs': jobs,
+        'videos': len(latencies),
+        'elapsed': elapsed,
+        'videos_per_min': 60 * len(latencies) / elapsed,
+        'mean_latency': statistics.mean(latencies),
+        'max_latency': max(latencies),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline throughput under concurrent jobs')
+    parser.add_argument('video', type=str, help='Video analysed by every job')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4], help='Concurrent job counts')
+    parser.add_argument('--rounds', type=int, default=2, help='Videos per concurrent slot')
+    parser.add_argument('--modes', nargs='+', default=['unmanaged', 'governed'],
+                        choices=['unmanaged', 'governed'])
+    parser.add_argument('--pin', action='store_true', help='Pin each governed job to its own cores')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.video, args.modes[0], args.jobs[0], args.rounds, args.pin)
+        return
+
+    results = []
+    for jobs in args.jobs:
+        for mode in args.modes:
+            print(f"Running {mode} with {jobs} concurrent job(s)...")
+            command = [sys.executable, os.path.abspath(__file__), args.video, '--child',
+                       '--modes', mode, '--jobs', str(jobs), '--rounds', str(args.rounds)]
+            if args.pin:
+                command.append('--pin')
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            # The result is the last line; everything before it is pipeline logging
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"\n{'mode':<10} {'jobs':>4} {'videos':>6} {'wall':>8} {'videos/min':>10} {'mean lat':>9} {'max lat':>8}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['jobs']:>4} {r['videos']:>6} {r['elapsed']:>7.1f}s {r['videos_per_min']:>10.2f} "
+              f"{r['mean_latency']:>8.1f}s {r['max_latency']:>7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+CPU latency benchmark for Qwen3VLModel.classify_video.
+
+Loads the model on CPU (no bitsandbytes) and times per-video classification
+over a directory of frames, or synthetic frames if none is given.
+
+Usage:
+    python benchmark_cpu_inference.py --frames-dir output_x/frames --runs 5
+    python benchmark_cpu_inference.py --quantization int8 --threads 8
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+import cv2
+
+from Qwen3_VL_2B import Qwen3VLModel
+
+
+def synthetic_frames(output_dir, count=6, size=(640, 360)):
+    """Write simple frames with text so the benchmark runs without a real video."""
+    paths = []
+    for i in range(count):
+        frame = np.full((size[1], size[0], 3), 40 + 30 * i, dtype=np.uint8)
+        cv2.putText(frame, f"LIMITED OFFER {i}: 500% RETURNS", (20, size[1] // 2),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
+        path = os.path.join(output_dir, f"frame_{i:04d}.jpg")
+        cv2.imwrite(path, frame)
+        paths.append(path)
+    return paths
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Qwen3-VL classification latency on CPU')
+    parser.add_argument('--model', type=str, default='Qwen/Qwen3-VL-2B-Instruct')
+    parser.add_argument('--frames-dir', type=str, default=None,
+                        help='Directory of frame images (default: synthetic frames)')
+    parser.add_argument('--quantization', type=str, default='none', choices=['int8', 'none'])
+    parser.add_argument('--dtype', type=str, default='bfloat16', choices=['bfloat16', 'float32'])
+    parser.add_argument('--threads', type=int, default=None, help='Intra-op threads (default: all cores)')
+    parser.add_argument('--runs', type=int, default=3, help='Timed runs per mode')
+    parser.add_argument('--max-frames', type=int, default=6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.frames_dir:
+            frame_paths = sorted(
+                os.path.join(args.frames_dir, name) for name in os.listdir(args.frames_dir)
+                if name.lower().endswith(('.jpg', '.jpeg', '.png'))
+            )
+        else:
+            frame_paths = synthetic_frames(tmp_dir, count=args.max_frames)
+
+        load_start = time.perf_counter()
+        model = Qwen3VLModel(
+            model_name=args.model,
+            device='cpu',
+            cpu_quantization=args.quantization,
+            cpu_dtype=args.dtype,
+            num_threads=args.threads,
+        )
+        print(f"Model load: {time.perf_counter() - load_start:.1f}s\n")
+
+        title = "Make $10,000 Per Day - Guaranteed Returns!"
+        description = "Join my exclusive trading group. Limited spots, DM on Telegram."
+
+        # Warm-up (first call pays one-off allocation and prefix-cache cost)
+        model.classify_video(frame_paths, title, description, max_frames=args.max_frames, reasoning='never')
+
+        print(f"{'mode':<10} {'mean':>8} {'p50':>8} {'p95':>8}   ({args.runs} runs, {len(frame_paths)} frames)")
+        for mode in ('never', 'always'):
+            latencies = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                model.classify_video(frame_paths, title, description,
+                                     max_frames=args.max_frames, reasoning=mode)
+                latencies.append(time.perf_counter() - start)
+            print(f"{mode:<10} {statistics.mean(latencies):>7.2f}s {percentile(latencies, 50):>7.2f}s "
+                  f"{percentile(latencies, 95):>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import re
+
+from scam_signals import count_signals, lexicon_hits
+
+
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+_WORD_RE = re.compile(r'[a-z0-9]{4,}')
+_STOPWORDS = {'this', 'that', 'with', 'from', 'your', 'have', 'will', 'they', 'what', 'when',
+              'just', 'more', 'about', 'there', 'their', 'video', 'here', 'like'}
+
+
+class ContextBuilder:
+    def __init__(self, tokenizer=None, max_tokens=1536, ocr_share=0.35, max_sentence_tokens=64):
+        """
+        Fit transcript and OCR text into a token budget for holistic prompts.
+
+        OCR spans are deduplicated (the same caption is read on many frames),
+        then transcript sentences are ranked by scam signals, scam-lexicon words
+        and overlap with the title/description, and kept best-first until the
+        budget is spent. Kept sentences are restored to spoken order. Runs
+        without punctuation are split into word windows, and the best item that
+        no longer fits whole is truncated to the tokens left.
+
+        :param tokenizer: Model tokenizer used to count tokens (None = ~4 characters per token)
+        :param max_tokens: Token budget for transcript + OCR text together
+        :param ocr_share: Fraction of the budget reserved for OCR text; unused OCR budget
+                          goes to the transcript
+        :param max_sentence_tokens: Longer sentences (e.g. unpunctuated transcripts) are split
+                                    into word windows of about this many tokens
+        """
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.ocr_share = ocr_share
+        self.max_sentence_tokens = max_sentence_tokens
+
+    def count_tokens(self, text):
+        """Token count of text under the model tokenizer."""
+        if not text:
+            return 0
+        if self.tokenizer is None:
+            return max(1, len(text) // 4)
+        return len(self.tokenizer(text, add_special_tokens=False).input_ids)
+
+    @staticmethod
+    def _normalize(text):
+        return ' '.join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+
+    def dedupe_ocr(self, spans):
+        """
+        Drop repeated OCR spans, including spans contained in a longer kept span.
+
+        :param spans: OCR strings in time order
+        :return: Tuple of (kept spans in first-seen order, number dropped)
+        """
+        spans = [span.strip() for span in spans if span and span.strip()]
+        # Exact repeats first: one entry per normalized key, at its first occurrence
+        first_seen = {}
+        for i, span in enumerate(spans):
+            first_seen.setdefault(self._normalize(span), i)
+        first_seen.pop('', None)
+
+        # Longest first, so a partial read of a caption is absorbed by the full read. Keys hold
+        # no newlines, so one substring search over the joined kept keys checks them all
+        kept = []
+        kept_keys = ''
+        for key in sorted(first_seen, key=len, reverse=True):
+            if key not in kept_keys:
+                kept.append(first_seen[key])
+                kept_keys += '\n' + key
+
+        kept.sort()
+        return [spans[i] for i in kept], len(spans) - len(kept)
+
+    def score_sentence(self, sentence, keywords):
+        """
+        Relevance of a transcript sentence.
+
+        :param sentence: Sentence text
+        :param keywords: Lowercase words from the title and description
+        :return: Score (higher = keep first)
+        """
+        words = set(_WORD_RE.findall(sentence.lower()))
+        return 3.0 * count_signals(sentence) + lexicon_hits(sentence) + 0.5 * len(words & keywords)
+
+    def truncate(self, text, max_tokens):
+        """
+        Cut text to at most max_tokens tokens, at a word boundary where possible.
+
+        :param text: Text to cut
+        :param max_tokens: Token limit
+        :return: Truncated text ('' if nothing fits)
+        """
+        if max_tokens <= 0:
+            return ''
+        if self.tokenizer is None:
+            cut = text[:max_tokens * 4]
+        else:
+            ids = self.tokenizer(text, add_special_tokens=False).input_ids[:max_tokens]
+            cut = self.tokenizer.decode(ids)
+        if len(cut) < len(text) and ' ' in cut:
+            cut = cut[:cut.rindex(' ')]
+        return cut.strip()
+
+    def split_sentences(self, text):
+        """
+        Split text into sentences, and sentences over max_sentence_tokens into word windows.
+
+        :param text: Transcript text
+        :return: List of (sentence, tokens) pairs in spoken order
+        """
+        pieces = []
+        for sentence in _SENTENCE_RE.split(text or ''):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            tokens = self.count_tokens(sentence)
+            words = sentence.split()
+            if tokens <= self.max_sentence_tokens or len(words) < 2:
+                pieces.append((sentence, tokens))
+                continue
+            # Window size from the sentence's own tokens-per-word ratio
+            window = max(1, len(words) * self.max_sentence_tokens // tokens)
+            for start in range(0, len(words), window):
+                piece = ' '.join(words[start:start + window])
+                pieces.append((piece, self.count_tokens(piece)))
+        return pieces
+
+    def _fit(self, items, budget):
+        """
+        Greedily keep (score, index, text, tokens) items best-first within budget; the best
+        item that did not fit whole is then truncated to the tokens left.
+
+        :return: Tuple of (kept (index, text) pairs in index order, tokens used)
+        """
+        kept = []
+        used = 0
+        overflow = None
+        for score, index, text, tokens in sorted(items, key=lambda item: (-item[0], item[1])):
+            if used + tokens <= budget:
+                kept.append((index, text))
+                used += tokens
+            elif overflow is None:
+                overflow = (index, text)
+        if overflow is not None and budget - used > 0:
+            text = self.truncate(overflow[1], budget - used)
+            tokens = self.count_tokens(text)
+            if text and used + tokens <= budget:
+                kept.append((overflow[0], text))
+                used += tokens
+        kept.sort()
+        return kept, used
+
+    def build(self, transcription=None, ocr_text=None, title=None, description=None):
+        """
+        Compress transcript and OCR text to the token budget.
+
+        :param transcription: Full transcript text
+        :param ocr_text: OCR text as one string or a list of spans
+        :param title: Video title (its words boost matching sentences)
+        :param description: Video description (same)
+        :return: Dict with 'transcription', 'ocr_text', 'tokens' and a 'dropped' report
+        """
+        if isinstance(ocr_text, str):
+            ocr_spans = ocr_text.split('\n')
+        else:
+            ocr_spans = list(ocr_text or [])
+        ocr_spans, duplicate_spans = self.dedupe_ocr(ocr_spans)
+
+        keywords = set(_WORD_RE.findall(f"{title or ''} {description or ''}".lower())) - _STOPWORDS
+
+        ocr_items = [
+            (3.0 * count_signals(span) + lexicon_hits(span), i, span, self.count_tokens(span))
+            for i, span in enumerate(ocr_spans)
+        ]
+        kept_ocr, ocr_tokens = self._fit(ocr_items, int(self.max_tokens * self.ocr_share))
+
+        sentences = self.split_sentences(transcription)
+        sentence_items = [
+            (self.score_sentence(sentence, keywords), i, sentence, tokens)
+            for i, (sentence, tokens) in enumerate(sentences)
+        ]
+        kept_sentences, transcript_tokens = self._fit(sentence_items, self.max_tokens - ocr_tokens)
+
+        # Mark gaps so the model knows the transcript is an excerpt
+        parts = []
+        previous = -1
+        for index, sentence in kept_sentences:
+            if index != previous + 1:
+                parts.append('[...]')
+            parts.append(sentence)
+            previous = index
+        if sentences and previous != len(sentences) - 1:
+            parts.append('[...]')
+
+        return {
+            'transcription': ' '.join(parts),
+            'ocr_text': '\n'.join(span for _, span in kept_ocr),
+            'tokens': ocr_tokens + transcript_tokens,
+            'dropped': {
+                'transcript_sentences': len(sentences) - len(kept_sentences),
+                'transcript_tokens': sum(item[3] for item in sentence_items) - transcript_tokens,
+                'ocr_duplicate_spans': duplicate_spans,
+                'ocr_spans_over_budget': len(ocr_spans) - len(kept_ocr),
+                'ocr_tokens': sum(item[3] for item in ocr_items) - ocr_tokens,
+            },
+        }
@@ -0,0 +1,77 @@
+"""
+Compare frame selection strategies and frame counts on a local labeled set.
+
+Each labeled entry needs a "report" (analysis_report.json from a previous
+run) so the selector can use the sampled frames and their OCR text. For
+every (strategy, max_frames) pair the script reports accuracy, mean
+latency and prompt tokens per video. See labeled_set.py for the JSONL format.
+
+Usage:
+    python evaluate_frame_selection.py labeled.jsonl --strategies uniform ranked --frames 6 3
+"""
+
+import time
+import argparse
+import statistics
+
+from labeled_set import load_labeled_set
+from frame_selection import FrameSelector
+from Qwen3_VL_2B import Qwen3VLModel
+
+
+def text_detections_from_report(item):
+    """Rebuild per-frame OCR detections from a report's text timeline."""
+    frame_ids = {float(f['timestamp']): f['frame_id'] for f in item['frames']}
+    detections = []
+    for timestamp, texts in item.get('text_timeline', {}).items():
+        frame_id = frame_ids.get(float(timestamp))
+        for text_item in texts:
+            detections.append({**text_item, 'frame_id': frame_id, 'timestamp': float(timestamp)})
+    return detections
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate frame selection strategies')
+    parser.add_argument('labeled_set', type=str, help='Labeled JSONL file (entries need a "report")')
+    parser.add_argument('--strategies', type=str, nargs='+', default=['uniform', 'ranked'],
+                        choices=['uniform', 'ranked'])
+    parser.add_argument('--frames', type=int, nargs='+', default=[6, 3])
+    parser.add_argument('--model', type=str, default='Qwen/Qwen3-VL-2B-Instruct')
+    parser.add_argument('--device', type=str, default=None, choices=['cuda', 'cpu'])
+    args = parser.parse_args()
+
+    items = [item for item in load_labeled_set(args.labeled_set) if item.get('frames')]
+    print(f"Loaded {len(items)} labeled videos with reports\n")
+    for item in items:
+        item['text_detections'] = text_detections_from_report(item)
+
+    model = Qwen3VLModel(model_name=args.model, device=args.device)
+
+    # Warm-up so the first configuration does not pay one-off costs
+    model.classify_video(items[0]['image_paths'][:1], items[0]['title'], items[0]['description'],
+                         reasoning='never')
+
+    print(f"{'strategy':>9} {'frames':>7} {'accuracy':>9} {'latency':>9} {'tokens':>8}")
+    for strategy in args.strategies:
+        for max_frames in args.frames:
+            selector = FrameSelector(max_frames=max_frames, strategy=strategy)
+            correct = 0
+            latencies = []
+            tokens = []
+            for item in items:
+                frames, budgets = selector.select(item['frames'], item['text_detections'])
+                start = time.perf_counter()
+                verdict, _ = model.classify_video(
+                    [f['path'] for f in frames], item['title'], item['description'],
+                    max_frames=max_frames, reasoning='never', pixel_budgets=budgets,
+                )
+                latencies.append(time.perf_counter() - start)
+                tokens.append(model.last_generation_stats['prompt_tokens'])
+                correct += verdict.lower().startswith('yes') == item['is_scam']
+
+            print(f"{strategy:>9} {max_frames:>7} {correct / len(items):>8.1%} "
+                  f"{statistics.mean(latencies):>8.3f}s {statistics.mean(tokens):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Latency / accuracy trade-off of visual token pruning on a local labeled set.
+
+Runs the verdict-only classification (single forward pass) at several
+visual_keep_ratio values and reports accuracy, mean latency and prompt
+tokens per video. See labeled_set.py for the JSONL format.
+
+Usage:
+    python evaluate_token_pruning.py labeled.jsonl --ratios 1.0 0.75 0.5 0.25
+    python evaluate_token_pruning.py labeled.jsonl --ratios 1.0 --device cpu --cpu-quantization int8
+"""
+
+import time
+import argparse
+import statistics
+
+from labeled_set import load_labeled_set
+from Qwen3_VL_2B import Qwen3VLModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate visual token pruning keep ratios')
+    parser.add_argument('labeled_set', type=str, help='Labeled JSONL file')
+    parser.add_argument('--ratios', type=float, nargs='+', default=[1.0, 0.75, 0.5, 0.25])
+    parser.add_argument('--model', type=str, default='Qwen/Qwen3-VL-2B-Instruct')
+    parser.add_argument('--device', type=str, default=None, choices=['cuda', 'cpu'])
+    parser.add_argument('--max-frames', type=int, default=6)
+    parser.add_argument('--cpu-quantization', type=str, default='none', choices=['none', 'int8'],
+                        help='CPU weights; compare int8 accuracy against none (bf16)')
+    args = parser.parse_args()
+
+    items = load_labeled_set(args.labeled_set)
+    print(f"Loaded {len(items)} labeled videos\n")
+
+    model = Qwen3VLModel(model_name=args.model, device=args.device, cpu_quantization=args.cpu_quantization)
+
+    # Warm-up so the first ratio does not pay one-off costs
+    model.classify_video(items[0]['image_paths'], items[0]['title'], items[0]['description'],
+                         max_frames=args.max_frames, reasoning='never')
+
+    print(f"{'keep':>6} {'accuracy':>9} {'latency':>9} {'tokens':>8}")
+    for ratio in args.ratios:
+        correct = 0
+        latencies = []
+        tokens = []
+        for item in items:
+            start = time.perf_counter()
+            verdict, _ = model.classify_video(
+                item['image_paths'], item['title'], item['description'],
+                max_frames=args.max_frames, reasoning='never', visual_keep_ratio=ratio,
+            )
+            latencies.append(time.perf_counter() - start)
+            tokens.append(model.last_generation_stats['prompt_tokens'])
+            correct += verdict.lower().startswith('yes') == item['is_scam']
+
+        print(f"{ratio:>6.2f} {correct / len(items):>8.1%} {statistics.mean(latencies):>8.3f}s "
+              f"{statistics.mean(tokens):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from image_processing import ImageProcessing
 from text_extraction import TextExtractor
 from audio_transcription import AudioTranscriber
 from Qwen3_VL_2B import Qwen3VLModel
+from timeline_index import TimelineIndex
 import json
 
 
@@ -144,29 +145,19 @@ def example_5_context_aware_analysis():
     Provide specific evidence for any red flags found.
     """
 
-    for frame_info in results['frames'][:3]:  # First 3 frames
+    # Look up what was said and shown around every frame in one batch
+    index = TimelineIndex.from_results(results)
+
+    for frame_info, window in index.for_frames()[:3]:  # First 3 frames
         timestamp = frame_info['timestamp']
 
         # Build context
         context = {
             'timestamp': timestamp,
-            'ocr_text': '',
-            'transcription': ''
+            'ocr_text': window['ocr_text'],
+            'transcription': window['transcript']
         }
 
-        # Add OCR text
-        if timestamp in results['text_timeline']:
-            texts = [item['text'] for item in results['text_timeline'][timestamp]]
-            context['ocr_text'] = ' '.join(texts)
-
-        # Add audio transcription
-        if results.get('audio_transcription'):
-            audio_text = analyzer.audio_transcriber.get_text_at_timestamp(
-                results['audio_transcription'], timestamp
-            )
-            if audio_text:
-                context['transcription'] = audio_text
-
         # Analyze with context
         analysis = vision_model.analyze_with_context(
             frame_info['path'],
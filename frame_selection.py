@@ -0,0 +1,270 @@
+import math
+from collections import defaultdict
+
+import cv2
+
+from image_processing import ImageProcessing
+from scam_signals import count_signals, find_signals
+from timeline_index import TimelineIndex
+
+
+# Qwen3-VL merges 2x2 patches of 16 px into one visual token
+PIXELS_PER_VISUAL_TOKEN = 32 * 32
+
+
+class FrameSelector:
+    def __init__(self, max_frames=6, total_pixels=6 * 448 * 448, min_pixels=224 * 224,
+                 max_pixels=896 * 896, small_text_height=0.05, strategy='ranked',
+                 min_hash_distance=10, sharpness_weight=1.0, text_weight=1.0, signal_weight=2.0):
+        """
+        Choose which frames go to the VLM and how many pixels each one gets.
+
+        :param max_frames: Maximum number of frames sent to the VLM
+        :param total_pixels: Pixel budget shared by all selected frames (bounds visual tokens)
+        :param min_pixels: Floor per frame (enough for talking-head / scene frames)
+        :param max_pixels: Ceiling per frame
+        :param small_text_height: Text boxes shorter than this fraction of the frame height
+                                  count as small text that needs extra resolution
+        :param strategy: 'ranked' (informativeness + diversity) or 'uniform' (evenly spaced)
+        :param min_hash_distance: Minimum dHash Hamming distance (of 64 bits) between selected frames
+        :param sharpness_weight: Weight of relative sharpness in the informativeness score
+        :param text_weight: Weight of OCR text amount in the informativeness score
+        :param signal_weight: Weight of suspicious OCR patterns (URLs, phone numbers, wallets...)
+        """
+        if strategy not in ('ranked', 'uniform'):
+            raise ValueError(f"Unknown frame selection strategy: {strategy}")
+
+        self.max_frames = max_frames
+        self.total_pixels = total_pixels
+        self.min_pixels = min_pixels
+        self.max_pixels = max_pixels
+        self.small_text_height = small_text_height
+        self.strategy = strategy
+        self.min_hash_distance = min_hash_distance
+        self.sharpness_weight = sharpness_weight
+        self.text_weight = text_weight
+        self.signal_weight = signal_weight
+
+    def subsample_uniform(self, frame_metadata):
+        """
+        Evenly spaced subset of frames.
+
+        :param frame_metadata: List of frame metadata dicts
+        :return: At most max_frames frames, in time order
+        """
+        if len(frame_metadata) <= self.max_frames:
+            return list(frame_metadata)
+        step = len(frame_metadata) / self.max_frames
+        return [frame_metadata[int(i * step)] for i in range(self.max_frames)]
+
+    @staticmethod
+    def frame_hash(frame):
+        """dHash of a frame, from its metadata or computed from the image file."""
+        if frame.get('dhash') is not None:
+            return frame['dhash']
+        image = cv2.imread(frame['path'], cv2.IMREAD_GRAYSCALE)
+        return ImageProcessing.difference_hash(image) if image is not None else None
+
+    @staticmethod
+    def _group_by_frame(text_detections):
+        """OCR detections keyed by frame_id."""
+        by_frame = defaultdict(list)
+        for detection in text_detections or []:
+            by_frame[detection.get('frame_id')].append(detection)
+        return by_frame
+
+    def rank_frames(self, frame_metadata, text_detections=None):
+        """
+        Score frames by how much evidence they are likely to carry.
+
+        The score adds relative sharpness (log-scaled against the sharpest
+        frame), the amount of OCR text, and hits on suspicious patterns in
+        that text, so the frame showing a URL or wallet address outranks a
+        blurry transition.
+
+        :param frame_metadata: Candidate frames
+        :param text_detections: OCR detections for those frames
+        :return: Copies of the frames with an 'informativeness' key, best first
+        """
+        by_frame = self._group_by_frame(text_detections)
+        max_sharpness = max((f.get('sharpness') or 0.0 for f in frame_metadata), default=0.0)
+
+        ranked = []
+        for frame in frame_metadata:
+            sharpness = frame.get('sharpness') or 0.0
+            sharpness_score = math.log1p(sharpness) / math.log1p(max_sharpness) if max_sharpness > 0 else 0.0
+
+            text = ' '.join(d.get('text_trocr', d['text']) for d in by_frame.get(frame.get('frame_id'), []))
+            text_score = min(1.0, len(text) / 200.0)
+            signal_score = min(1.0, count_signals(text) / 2.0)
+
+            score = (self.sharpness_weight * sharpness_score
+                     + self.text_weight * text_score
+                     + self.signal_weight * signal_score)
+            ranked.append({**frame, 'informativeness': round(score, 4)})
+
+        ranked.sort(key=lambda f: f['informativeness'], reverse=True)
+        return ranked
+
+    def subsample_ranked(self, frame_metadata, text_detections=None):
+        """
+        Most informative frames that are visually distinct from each other.
+
+        Frames are taken best-first and skipped when their dHash lies within
+        min_hash_distance of an already selected frame. Videos with fewer
+        distinct scenes than max_frames get fewer frames.
+
+        :param frame_metadata: Candidate frames
+        :param text_detections: OCR detections for those frames
+        :return: At most max_frames frames, in time order
+        """
+        selected = []
+        hashes = []
+        for frame in self.rank_frames(frame_metadata, text_detections):
+            if len(selected) >= self.max_frames:
+                break
+            frame_hash = self.frame_hash(frame)
+            if frame_hash is not None and any(
+                    bin(frame_hash ^ other).count('1') < self.min_hash_distance for other in hashes):
+                continue
+            selected.append(frame)
+            if frame_hash is not None:
+                hashes.append(frame_hash)
+
+        return sorted(selected, key=lambda f: f['timestamp'])
+
+    @staticmethod
+    def flag_suspicious_frames(frame_metadata, text_timeline=None, transcript_timeline=None,
+                               radius=2.0, max_frames=3):
+        """
+        Frames worth a dedicated VLM look, found with cheap regex signals.
+
+        A frame is flagged when its own OCR text, or the speech within radius
+        seconds of it, contains a URL, phone number, crypto address, urgency or
+        money-promise phrase (see scam_signals). OCR hits count double. Frames
+        that repeat an already flagged set of hits (the same caption held on
+        screen) are skipped.
+
+        :param frame_metadata: Sampled frames
+        :param text_timeline: OCR timeline from TextExtractor.get_text_timeline
+        :param transcript_timeline: Segments from AudioTranscriber.get_transcription_timeline
+        :param radius: Seconds of speech on each side of a frame to check
+        :param max_frames: Cap on flagged frames per video
+        :return: Copies of the strongest flagged frames with a 'signals' dict ({'ocr', 'transcript'})
+                 and 'signal_score', in time order
+        """
+        index = TimelineIndex(segments=transcript_timeline, frames=frame_metadata,
+                              text_timeline=text_timeline)
+
+        candidates = []
+        for frame, window in index.for_frames(radius):
+            ocr_hits = find_signals(index.at(frame['timestamp'])['ocr_text'])
+            speech_hits = find_signals(window['transcript'])
+            if not ocr_hits and not speech_hits:
+                continue
+            score = (2 * sum(len(m) for m in ocr_hits.values())
+                     + sum(len(m) for m in speech_hits.values()))
+            frame = {k: v for k, v in frame.items() if k not in ('start', 'end')}
+            candidates.append({**frame, 'signals': {'ocr': ocr_hits, 'transcript': speech_hits},
+                               'signal_score': score})
+
+        flagged = []
+        seen = set()
+        for frame in sorted(candidates, key=lambda f: (-f['signal_score'], f['timestamp'])):
+            if len(flagged) >= max_frames:
+                break
+            hits = frozenset(
+                match.lower() for source in frame['signals'].values()
+                for matches in source.values() for match in matches
+            )
+            if hits in seen:
+                continue
+            seen.add(hits)
+            flagged.append(frame)
+
+        return sorted(flagged, key=lambda f: f['timestamp'])
+
+    @staticmethod
+    def _box_extent(bbox):
+        """Width and height of a 4-point OCR box."""
+        xs = [point[0] for point in bbox]
+        ys = [point[1] for point in bbox]
+        return max(xs) - min(xs), max(ys) - min(ys)
+
+    def text_detail_demand(self, frame, detections):
+        """
+        How much a frame benefits from extra resolution, from its OCR boxes.
+
+        Demand grows with the fraction of the frame covered by text and with
+        how small that text is relative to the frame height.
+
+        :param frame: Frame metadata dict (uses 'width'/'height' when present)
+        :param detections: OCR detections for this frame
+        :return: Non-negative demand score (0 = no text)
+        """
+        if not detections:
+            return 0.0
+
+        extents = [self._box_extent(d['bbox']) for d in detections]
+        width = frame.get('width') or max(w for w, _ in extents)
+        height = frame.get('height') or max(h for _, h in extents)
+
+        text_area = sum(w * h for w, h in extents) / float(width * height)
+        heights = sorted(h for _, h in extents)
+        median_height = heights[len(heights) // 2] / float(height)
+        smallness = min(4.0, max(1.0, self.small_text_height / max(median_height, 1e-6)))
+
+        return min(1.0, text_area) * smallness
+
+    def allocate_pixel_budgets(self, frames, text_detections):
+        """
+        Split total_pixels across frames in proportion to their text detail demand.
+
+        Every frame gets min_pixels; the remainder is water-filled by demand and
+        capped at max_pixels, with any overflow passed to the remaining frames.
+        With no text anywhere the budget is split evenly.
+
+        :param frames: Selected frame metadata dicts
+        :param text_detections: OCR detections from TextExtractor.extract_text_from_frames
+        :return: List of max_pixels values aligned with frames
+        """
+        if not frames:
+            return []
+
+        by_frame = self._group_by_frame(text_detections)
+        demands = [self.text_detail_demand(f, by_frame.get(f.get('frame_id'), [])) for f in frames]
+        budgets = [self.min_pixels] * len(frames)
+        remaining = max(0, self.total_pixels - self.min_pixels * len(frames))
+
+        if not any(demands):
+            demands = [1.0] * len(frames)
+
+        open_frames = [i for i, d in enumerate(demands) if d > 0]
+        while remaining > 0 and open_frames:
+            total_demand = sum(demands[i] for i in open_frames)
+            overflow = 0
+            for i in open_frames:
+                share = remaining * demands[i] / total_demand
+                room = self.max_pixels - budgets[i]
+                budgets[i] += min(share, room)
+                overflow += max(0.0, share - room)
+            open_frames = [i for i in open_frames if budgets[i] < self.max_pixels]
+            remaining = overflow
+
+        return [int(b) for b in budgets]
+
+    def select(self, frame_metadata, text_detections=None, budget_pixels=True):
+        """
+        Select frames for the VLM and assign their pixel budgets.
+
+        :param frame_metadata: All sampled frames
+        :param text_detections: OCR detections for those frames
+        :param budget_pixels: Allocate pixels by text density (False = no per-frame budgets)
+        :return: Tuple of (selected frames, list of max_pixels or None)
+        """
+        if self.strategy == 'ranked':
+            frames = self.subsample_ranked(frame_metadata, text_detections)
+        else:
+            frames = self.subsample_uniform(frame_metadata)
+        budgets = self.allocate_pixel_budgets(frames, text_detections) if budget_pixels else None
+        return frames, budgets
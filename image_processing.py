@@ -31,6 +31,21 @@ class ImageProcessing:
         enhanced_lab = cv2.merge((l_enhanced, a, b))
         return cv2.cvtColor(enhanced_lab, cv2.COLOR_LAB2BGR)
 
+    @staticmethod
+    def difference_hash(image, hash_size=8):
+        """
+        Perceptual difference hash (dHash) for near-duplicate frame detection.
+
+        :param image: BGR or grayscale image
+        :param hash_size: Hash is hash_size * hash_size bits
+        :return: Hash as a Python int
+        """
+        if len(image.shape) == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return sum(1 << i for i, bit in enumerate(bits) if bit)
+
     def sample_frames_by_sharpness(self, video_path, interval=10, output_dir="sampled_frames",
                                     use_sharpness_filter=True):
         """
@@ -46,7 +61,7 @@ class ImageProcessing:
         :param interval: Extract every 'n' frames for evaluation.
         :param output_dir: Folder to save the CLAHE-processed frames.
         :param use_sharpness_filter: If True, only save frames above sharpness threshold.
-        :return: List of dicts with frame info (path, timestamp, sharpness)
+        :return: List of dicts with frame info (path, timestamp, sharpness, dhash)
         """
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
@@ -84,7 +99,10 @@ class ImageProcessing:
                     'original_frame_number': frame_count,
                     'path': save_path,   # full-res CLAHE frame (OCR + vision model both read this)
                     'timestamp': timestamp,
-                    'sharpness': sharpness
+                    'sharpness': sharpness,
+                    'dhash': self.difference_hash(frame),
+                    'width': frame.shape[1],
+                    'height': frame.shape[0]
                 })
 
                 saved_count += 1
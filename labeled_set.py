@@ -0,0 +1,64 @@
+"""
+Loader for local labeled evaluation/training sets.
+
+A labeled set is a JSONL file with one video per line:
+
+    {"frames_dir": "output_x/frames", "title": "...", "description": "...", "is_scam": true}
+
+Instead of "frames_dir" a line may list "image_paths" directly. An optional
+"report" key can point at an analysis_report.json from a previous run, whose
+OCR and transcript are then available as "text_timeline" / "audio_transcription".
+Relative paths are resolved against the JSONL file's directory.
+"""
+
+import os
+import json
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def load_labeled_set(path):
+    """
+    Load a labeled set.
+
+    :param path: Path to JSONL file
+    :return: List of dicts with image_paths, title, description, is_scam and optional report fields
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    items = []
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+
+            if 'is_scam' not in entry:
+                raise ValueError(f"{path}:{line_number}: missing 'is_scam' label")
+
+            image_paths = [os.path.join(base_dir, p) for p in entry.get('image_paths', [])]
+            if 'frames_dir' in entry:
+                frames_dir = os.path.join(base_dir, entry['frames_dir'])
+                image_paths = sorted(
+                    os.path.join(frames_dir, name) for name in os.listdir(frames_dir)
+                    if name.lower().endswith(IMAGE_EXTENSIONS)
+                )
+
+            item = {
+                'image_paths': image_paths,
+                'title': entry.get('title'),
+                'description': entry.get('description'),
+                'is_scam': bool(entry['is_scam']),
+            }
+
+            if 'report' in entry:
+                with open(os.path.join(base_dir, entry['report']), 'r', encoding='utf-8') as report_file:
+                    report = json.load(report_file)
+                item['text_timeline'] = report.get('text_timeline', {})
+                item['audio_transcription'] = report.get('audio_transcription')
+                item['frames'] = report.get('frames', [])
+
+            items.append(item)
+
+    return items
@@ -1,5 +1,7 @@
 import os
 import json
+import time
+import tempfile
 from datetime import datetime
 from pathlib import Path
 import argparse
@@ -7,7 +9,15 @@ import argparse
 from image_processing import ImageProcessing
 from text_extraction import TextExtractor
 from audio_transcription import AudioTranscriber
-from Qwen3_VL_2B import Qwen3VLModel
+from subtitle_extraction import SubtitleExtractor
+from audio_fingerprint import AudioFingerprintIndex
+from vlm_scheduler import VLMScheduler
+from frame_selection import FrameSelector
+from text_cascade import TextScamScorer
+from model_manager import ModelManager
+from model_bundle import read_manifest
+from resource_governor import ResourceGovernor
+from Qwen3_VL_2B import Qwen3VLModel, parse_structured_verdict
 
 
 class OptiScamAnalyzer:
@@ -29,29 +39,205 @@ class OptiScamAnalyzer:
             sharpness_threshold=self.config.get('sharpness_threshold', 100.0)
         )
 
+        # One thread budget per concurrent job for OpenCV, ONNX Runtime and PyTorch. Off unless
+        # asked for (or implied by a governor setting): it changes process-wide thread counts
+        governor_configured = bool(self.config.get('max_concurrent_jobs') or self.config.get('cpu_pin_jobs')
+                                   or self.config.get('cpu_cores'))
+        self.governor = None
+        if self.config.get('resource_governor', governor_configured):
+            self.governor = ResourceGovernor(
+                max_concurrent_jobs=self.config.get('max_concurrent_jobs', None),
+                cores=self.config.get('cpu_cores', None),
+                torch_threads=self.config.get('cpu_threads', None),
+                pin_jobs=self.config.get('cpu_pin_jobs', False)
+            )
+
+        # OCR, Whisper and the VLM load on first use and are unloaded least recently used
+        # first when model_memory_limit_mb is set; the attributes below are stand-ins
+        self.models = ModelManager(max_memory_mb=self.config.get('model_memory_limit_mb', None))
+
+        # A model bundle (model_bundle.py) replaces every Hub download with local safetensors
+        bundle = None
+        if self.config.get('model_bundle_dir'):
+            bundle = read_manifest(self.config['model_bundle_dir'])['models']
+            print(f"Using model bundle: {self.config['model_bundle_dir']}")
+        self.load_times = {}
+
         # Text extraction with RapidOCR + TrOCR
-        self.text_extractor = TextExtractor(
+        self.models.register('ocr', lambda: TextExtractor(
             use_trocr_fallback=self.config.get('use_trocr_fallback', True),
-            trocr_confidence_threshold=self.config.get('trocr_confidence_threshold', 0.8)
-        )
+            trocr_confidence_threshold=self.config.get('trocr_confidence_threshold', 0.8),
+            device=self.config.get('device', None),
+            trocr_model_name=bundle['trocr']['path'] if bundle else 'microsoft/trocr-small-printed',
+            local_files_only=bundle is not None,
+            ocr_threads=self.governor.ort_threads if self.governor else None
+        ), grows=True, cls=TextExtractor)
+        self.text_extractor = self.models.proxy('ocr')
 
         # Audio transcription with Whisper
-        self.audio_transcriber = AudioTranscriber(
-            model_size=self.config.get('whisper_model_size', 'tiny'),
+        self.models.register('whisper', lambda: AudioTranscriber(
+            model_size=bundle['whisper']['model_size'] if bundle else self.config.get('whisper_model_size', 'tiny'),
             language=self.config.get('whisper_language', None),
-            device=self.config.get('device', None)
-        )
+            device=self.config.get('device', None),
+            profile=self.config.get('transcription_profile', 'balanced'),
+            model_path=bundle['whisper']['path'] if bundle else None
+        ), grows=True, cls=AudioTranscriber)
+        self.audio_transcriber = self.models.proxy('whisper')
 
         # Qwen3-VL-2B for visual analysis
-        self.vision_model = Qwen3VLModel(
-            model_name=self.config.get('vision_model_name', 'Qwen/Qwen3-VL-2B-Instruct'),
-            device=self.config.get('device', None)
+        self.models.register('vlm', lambda: Qwen3VLModel(
+            model_name=bundle['vlm']['path'] if bundle else self.config.get('vision_model_name', 'Qwen/Qwen3-VL-2B-Instruct'),
+            device=self.config.get('device', None),
+            use_prefix_cache=self.config.get('vlm_prefix_cache', True),
+            cpu_quantization=self.config.get('vlm_cpu_quantization', 'none'),
+            cpu_dtype=self.config.get('vlm_cpu_dtype', 'bfloat16'),
+            num_threads=self.governor.torch_threads if self.governor else self.config.get('cpu_threads', None),
+            vision_cache_mb=self.config.get('vlm_vision_cache_mb', 256),
+            vision_cache_dir=self.config.get('vlm_vision_cache_dir', None),
+            vision_cache_disk_mb=self.config.get('vlm_vision_cache_disk_mb', 2048),
+            local_files_only=bundle is not None
+        ), cls=Qwen3VLModel, metadata={
+            # Read by stats/health code; none of these should load the VLM
+            'use_prefix_cache': self.config.get('vlm_prefix_cache', True),
+            'last_generation_stats': {'prompt_tokens': 0, 'generated_tokens': 0},
+            'last_context_report': None,
+            'vision_cache': None,
+        })
+        self.vision_model = self.models.proxy('vlm')
+
+        if not self.config.get('lazy_model_loading', True):
+            self.preload_models()
+        if self.config.get('warm_up', False):
+            self.warm_up()
+
+        # Caption tracks that can replace Whisper when present
+        self.subtitle_extractor = SubtitleExtractor(
+            min_segments=self.config.get('subtitle_min_segments', 3),
+            min_characters=self.config.get('subtitle_min_characters', 40)
+        )
+
+        # Known-scam soundtrack index (optional; skipped when no index is configured)
+        self.fingerprint_index = None
+        if self.config.get('fingerprint_index_path'):
+            self.fingerprint_index = AudioFingerprintIndex(
+                index_path=self.config['fingerprint_index_path'],
+                min_aligned_hashes=self.config.get('fingerprint_min_aligned_hashes', 20),
+                min_match_ratio=self.config.get('fingerprint_min_match_ratio', 0.05)
+            )
+
+        # Frame choice and per-frame pixel budgets for the VLM
+        self.frame_selector = FrameSelector(
+            max_frames=self.config.get('vlm_max_frames', 6),
+            total_pixels=self.config.get('vlm_total_pixels', 6 * 448 * 448),
+            min_pixels=self.config.get('vlm_min_pixels', 224 * 224),
+            max_pixels=self.config.get('vlm_max_pixels', 896 * 896),
+            strategy=self.config.get('vlm_frame_selection', 'ranked'),
+            min_hash_distance=self.config.get('vlm_min_hash_distance', 10)
         )
 
+        # Optional text-signal first stage; the VLM only sees videos it cannot settle
+        self.text_scorer = None
+        if self.config.get('use_text_cascade', False):
+            self.text_scorer = TextScamScorer(
+                model_path=self.config.get('text_cascade_model_path', None),
+                low=self.config.get('text_cascade_low', None),
+                high=self.config.get('text_cascade_high', None)
+            )
+
+        # Shared request queue in front of the VLM for concurrent jobs (API server)
+        self.vlm_scheduler = None
+        if self.config.get('use_vlm_scheduler', False):
+            self.vlm_scheduler = VLMScheduler(
+                self.vision_model,
+                max_batch_size=self.config.get('vlm_max_batch_size', 4),
+                max_wait_ms=self.config.get('vlm_max_wait_ms', 50)
+            )
+
         print("All components initialized successfully!\n")
 
+    def set_cpu_cores(self, cores, torch_threads=None):
+        """
+        Re-apply the thread budgets for a new set of cores (a preforked worker's share).
+
+        :param cores: Core IDs for this process
+        :param torch_threads: Override for the PyTorch budget (None = one job's share)
+        """
+        if self.governor is None:
+            return
+        self.governor.resize(cores, torch_threads)
+        text_extractor = self.models.loaded('ocr')
+        if text_extractor is not None:
+            # RapidOCR's session is created on first use, after this
+            text_extractor.ocr_threads = self.governor.ort_threads
+
+    def preload_models(self, include_onnx=True):
+        """
+        Load every model now instead of on first use, printing each model's load time.
+
+        :param include_onnx: Also create the RapidOCR ONNX Runtime session; preforking
+                             servers pass False because the session does not survive fork
+        :return: Dict of model name -> load seconds (also kept in self.load_times)
+        """
+        steps = [
+            ('vlm', lambda: self.models.get('vlm')),
+            ('whisper', lambda: self.audio_transcriber.model),
+        ]
+        if self.config.get('use_trocr_fallback', True):
+            steps.append(('trocr', self.text_extractor.load_trocr))
+        if include_onnx:
+            steps.append(('rapidocr', lambda: self.text_extractor.rapid_ocr))
+
+        for name, load in steps:
+            started = time.perf_counter()
+            load()
+            self.load_times[name] = time.perf_counter() - started
+            print(f"  {name}: loaded in {self.load_times[name]:.1f}s")
+        # Whisper's weights were loaded through a property, outside a tracked call
+        self.models.refresh('whisper')
+        return dict(self.load_times)
+
+    def warm_up(self, include_onnx=True):
+        """
+        Run one inference per model on a synthetic frame and a silent clip, so the first real
+        request does not pay for lazy initialisation (kernels, allocator, prompt prefix cache).
+
+        :param include_onnx: Also warm RapidOCR (False in a preforking parent)
+        :return: Dict of model name -> seconds
+        """
+        import cv2
+        import numpy as np
+
+        print("Warming up models...")
+        timings = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            frame = np.full((448, 448, 3), 255, dtype=np.uint8)
+            cv2.putText(frame, "WARM UP 1234", (40, 230), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0, 0, 0), 3)
+            frame_path = os.path.join(tmp_dir, "warmup.jpg")
+            cv2.imwrite(frame_path, frame)
+
+            steps = [
+                ('vlm', lambda: (self.vision_model.classify_video(
+                    [frame_path], title="Warm-up", max_frames=1, reasoning='never'),
+                    self.vision_model.precompute_prefix_caches())),
+                ('whisper', lambda: self.audio_transcriber.model.transcribe(
+                    np.zeros(16000 * 2, dtype=np.float32), fp16=self.audio_transcriber.device == 'cuda')),
+            ]
+            if self.config.get('use_trocr_fallback', True):
+                steps.append(('trocr', lambda: self.text_extractor.extract_with_trocr(frame_path)))
+            if include_onnx:
+                steps.append(('rapidocr', lambda: self.text_extractor.extract_with_rapidocr(frame_path)))
+
+            for name, run in steps:
+                started = time.perf_counter()
+                run()
+                timings[name] = time.perf_counter() - started
+                print(f"  {name}: warm-up inference {timings[name]:.1f}s")
+        self.models.refresh('whisper')
+        return timings
+
     def process_video(self, video_path, title=None, description=None, output_dir=None,
-                      frame_interval=30, use_sharpness_filter=True):
+                      frame_interval=30, use_sharpness_filter=True, on_transcript_segment=None,
+                      subtitle_path=None, on_vlm_token=None, holistic_report=False):
         """
         Process a video through the complete analysis pipeline.
         Extracts frames, runs OCR and audio transcription, then classifies
@@ -63,8 +249,30 @@ class OptiScamAnalyzer:
         :param output_dir: Directory for outputs (created if doesn't exist)
         :param frame_interval: Extract every N frames
         :param use_sharpness_filter: Use Laplacian Variance sharpness filtering
+        :param on_transcript_segment: Optional callback receiving transcript segments
+                                      as soon as each audio window is decoded
+        :param subtitle_path: Caption file (.srt/.vtt) for this video, e.g. fetched by yt-dlp;
+                              used instead of Whisper when usable
+        :param on_vlm_token: Optional callback receiving the verdict as soon as it is decoded,
+                             then the reasoning as it streams (see Qwen3VLModel.classify_video)
+        :param holistic_report: Also write a free-form holistic analysis from the sampled frames,
+                                transcript and OCR text (step 4c)
         :return: Complete analysis results
         """
+        if self.governor is None:
+            return self._run_pipeline(video_path, title, description, output_dir, frame_interval,
+                                      use_sharpness_filter, on_transcript_segment, subtitle_path,
+                                      on_vlm_token, holistic_report)
+        # Waits for a free job slot when max_concurrent_jobs is set
+        with self.governor.job():
+            return self._run_pipeline(video_path, title, description, output_dir, frame_interval,
+                                      use_sharpness_filter, on_transcript_segment, subtitle_path,
+                                      on_vlm_token, holistic_report)
+
+    def _run_pipeline(self, video_path, title, description, output_dir, frame_interval,
+                      use_sharpness_filter, on_transcript_segment, subtitle_path, on_vlm_token,
+                      holistic_report=False):
+        """Steps 0-5 of process_video (see there for the parameters)."""
         print(f"\n{'='*60}")
         print(f"Processing video: {video_path}")
         print(f"{'='*60}\n")
@@ -87,6 +295,28 @@ class OptiScamAnalyzer:
             'config': self.config
         }
 
+        # Step 0: Short-circuit on a confident match against known-scam soundtracks
+        if self.fingerprint_index is not None and len(self.fingerprint_index):
+            print("Step 0: Matching audio against known-scam fingerprint index...")
+            match = self.fingerprint_index.match(video_path)
+            if match:
+                print(f"  Fingerprint match: '{match['name']}' "
+                      f"({match['aligned_hashes']} aligned hashes) — skipping full pipeline\n")
+                results.update({
+                    'frames': [],
+                    'text_detections': [],
+                    'text_timeline': {},
+                    'audio_transcription': None,
+                    'fingerprint_match': match,
+                    'verdict': match['verdict'],
+                    'is_scam': match['is_scam'],
+                    'confidence_score': match['confidence_score'],
+                    'decided_by': 'fingerprint',
+                })
+                self._save_results(results, output_dir)
+                return results
+            print("  No fingerprint match\n")
+
         # Step 1: Extract and process frames with sharpness filtering
         print("Step 1: Extracting frames with CLAHE and sharpness filtering...")
         frame_metadata = self.image_processor.sample_frames_by_sharpness(
@@ -107,20 +337,36 @@ class OptiScamAnalyzer:
         results['text_timeline'] = text_timeline
         print(f"Detected text in {len(text_timeline)} timestamps\n")
 
-        # Step 3: Transcribe audio with Whisper
-        print("Step 3: Transcribing audio with Whisper...")
-        transcription = self.audio_transcriber.transcribe_video(
-            video_path=video_path,
-            extract_audio=True,
-            temp_audio_path=os.path.join(output_dir, "temp_audio.mp3")
-        )
+        # Step 3: Use caption tracks when available, otherwise transcribe with Whisper
+        transcription = None
+        if subtitle_path:
+            transcription = self.subtitle_extractor.load_transcription(subtitle_path)
+        if transcription is None and self.config.get('use_embedded_subtitles', True):
+            transcription = self.subtitle_extractor.transcription_from_video(video_path, output_dir)
+
+        if transcription:
+            print("Step 3: Using caption track instead of Whisper transcription...")
+            if on_transcript_segment is not None:
+                for segment in transcription['segments']:
+                    on_transcript_segment(segment)
+        else:
+            print("Step 3: Transcribing audio with Whisper...")
+            transcription = self.audio_transcriber.transcribe_video(
+                video_path=video_path,
+                extract_audio=True,
+                temp_audio_path=os.path.join(output_dir, "temp_audio.mp3"),
+                # Word-level timing is only computed when a consumer asks for it
+                word_timestamps=self.config.get('word_timestamps', None),
+                on_segment=on_transcript_segment
+            )
 
         if transcription:
             audio_timeline = self.audio_transcriber.get_transcription_timeline(transcription)
             results['audio_transcription'] = {
                 'full_text': transcription['text'],
                 'timeline': audio_timeline,
-                'language': transcription.get('language', 'unknown')
+                'language': transcription.get('language', 'unknown'),
+                'source': transcription.get('source', 'whisper')
             }
             transcription_file = os.path.join(output_dir, "transcription.txt")
             self.audio_transcriber.export_transcription(
@@ -131,20 +377,121 @@ class OptiScamAnalyzer:
             results['audio_transcription'] = None
             print("No audio transcription available\n")
 
+        # Step 3b: Cheap text-signal stage settles clear-cut videos without the VLM
+        decision = None
+        if self.text_scorer is not None:
+            decision = self._run_text_cascade(results, title, description, text_timeline)
+
+        if decision is None:
+            self._classify_with_vlm(results, frame_metadata, text_detections, text_timeline,
+                                    title, description, on_vlm_token)
+
+        if holistic_report:
+            self._run_holistic(results, frame_metadata, text_timeline, title, description)
+
+        # Step 5: Save results
+        print("Step 5: Saving results...")
+        self._save_results(results, output_dir)
+
+        return results
+
+    def _run_text_cascade(self, results, title, description, text_timeline):
+        """
+        Score the gathered text and settle the verdict when the score is outside the uncertainty band.
+
+        :param results: Results dict (reads the transcription, writes verdict fields)
+        :param title: Video title
+        :param description: Video description
+        :param text_timeline: OCR timeline
+        :return: True / False when decided, None when the VLM should decide
+        """
+        print("Step 3b: Scoring title, description, OCR and transcript signals...")
+        ocr_text = ' '.join(dict.fromkeys(
+            item['text'] for texts in text_timeline.values() for item in texts
+        ))
+        transcript = (results.get('audio_transcription') or {}).get('full_text')
+
+        probability = self.text_scorer.score(title, description, ocr_text, transcript)
+        decision = self.text_scorer.decide(probability)
+        results['text_score'] = probability
+        if decision is None:
+            print(f"  Text score {probability:.2f} inside uncertainty band — escalating to the VLM\n")
+            return None
+
+        if decision:
+            evidence = self.text_scorer.explain(title, description, ocr_text, transcript)
+            found = '; '.join(f"{name}: {', '.join(matches)}" for name, matches in evidence)
+            verdict = ("Yes. The title, description, on-screen text and speech carry decisive scam signals"
+                       + (f" ({found})." if found else "."))
+        else:
+            verdict = "No. The title, description, on-screen text and speech carry no scam signals."
+
+        results.update({
+            'verdict': verdict,
+            'is_scam': decision,
+            'confidence_score': (probability if decision else 1.0 - probability) * 100,
+            'decided_by': 'text_cascade',
+        })
+        print(f"  Text score {probability:.2f} — decided {'SCAM' if decision else 'NOT SCAM'} "
+              f"without the VLM\n")
+        return decision
+
+    def _classify_with_vlm(self, results, frame_metadata, text_detections, text_timeline,
+                           title, description, on_vlm_token=None):
+        """
+        Classify with the VLM (step 4) and run targeted frame analysis (step 4b) if enabled.
+
+        :param results: Results dict to fill
+        :param frame_metadata: Sampled frames
+        :param text_detections: OCR detections
+        :param text_timeline: OCR timeline
+        :param title: Video title
+        :param description: Video description
+        :param on_vlm_token: Optional stream callback for the verdict and reasoning
+        """
+        results['decided_by'] = 'vlm'
+
         # Step 4: Classify all frames together with title + description
         print("Step 4: Classifying video with Qwen3-VL-2B-Instruct...")
         print(f"  Frames: {len(frame_metadata)}  |  Title: {'yes' if title else 'none'}  |  Description: {'yes' if description else 'none'}\n")
 
-        frame_paths = [f['path'] for f in frame_metadata]
-
+        # Pick informative, distinct frames; give text-dense ones more pixels under a fixed budget
+        selected_frames, pixel_budgets = self.frame_selector.select(
+            frame_metadata, text_detections,
+            budget_pixels=self.config.get('vlm_pixel_budgeting', True)
+        )
+        frame_paths = [f['path'] for f in selected_frames]
+        results['vlm_frames'] = [
+            {'frame_id': f['frame_id'], 'timestamp': f['timestamp'],
+             'informativeness': f.get('informativeness'),
+             'max_pixels': pixel_budgets[i] if pixel_budgets else None}
+            for i, f in enumerate(selected_frames)
+        ]
+
+        classifier = self.vlm_scheduler or self.vision_model
+        reasoning = self.config.get('vlm_reasoning', 'always')
         try:
-            verdict, confidence_pct = self.vision_model.classify_video(
+            verdict, confidence_pct = classifier.classify_video(
                 image_paths=frame_paths,
                 title=title,
                 description=description,
+                max_frames=self.frame_selector.max_frames,
+                reasoning=reasoning,
+                visual_keep_ratio=self.config.get('vlm_visual_keep_ratio', 1.0),
+                pixel_budgets=pixel_budgets,
+                on_token=on_vlm_token,
+                **({'max_evidence': self.config.get('vlm_max_evidence', 3),
+                    'max_evidence_tokens': self.config.get('vlm_max_evidence_tokens', 16)}
+                   if reasoning == 'structured' else {}),
             )
             results['verdict'] = verdict
-            is_scam = verdict.strip().lower().startswith('yes')
+            if reasoning == 'structured':
+                structured = parse_structured_verdict(verdict)
+                is_scam = structured['is_scam']
+                results['scam_type'] = structured['scam_type']
+                results['evidence'] = structured['evidence']
+            else:
+                is_scam = verdict.strip().lower().startswith('yes')
             results['is_scam'] = is_scam
             results['confidence_score'] = confidence_pct  # float 0-100 or None
 
@@ -157,8 +504,78 @@ class OptiScamAnalyzer:
             results['confidence_score'] = None
             print(f"  Error: {error_msg}\n")
 
-        # Step 5: Save results
-        print("Step 5: Saving results...")
+        # Step 4b: Targeted per-frame analysis where cheap signals fire
+        if self.config.get('targeted_frame_analysis', False):
+            audio = results.get('audio_transcription') or {}
+            flagged = self.frame_selector.flag_suspicious_frames(
+                frame_metadata, text_timeline, audio.get('timeline'),
+                radius=self.config.get('targeted_context_seconds', 2.0),
+                max_frames=self.config.get('targeted_max_frames', 3)
+            )
+            print(f"Step 4b: Targeted analysis of {len(flagged)} flagged frame(s)...")
+            if flagged:
+                max_new_tokens = self.config.get('targeted_max_new_tokens', 256)
+                if self.vlm_scheduler is not None:
+                    results['frame_analyses'] = self.vlm_scheduler.run_exclusive(
+                        self.vision_model.analyze_flagged_frames, flagged, max_new_tokens=max_new_tokens
+                    )
+                else:
+                    results['frame_analyses'] = self.vision_model.analyze_flagged_frames(
+                        flagged, max_new_tokens=max_new_tokens
+                    )
+            else:
+                results['frame_analyses'] = []
+            print()
+
+    def _run_holistic(self, results, frame_metadata, text_timeline, title, description):
+        """
+        Write the free-form holistic analysis (step 4c) from the frames and text already extracted.
+
+        :param results: Results dict (reads the transcription, writes holistic_analysis and
+                        context_report)
+        :param frame_metadata: Sampled frames, reused instead of decoding the video again
+        :param text_timeline: OCR timeline
+        :param title: Video title
+        :param description: Video description
+        """
+        print("Step 4c: Holistic analysis of frames, transcript and on-screen text...")
+        ocr_spans = list(dict.fromkeys(
+            item['text'] for _, texts in sorted(text_timeline.items()) for item in texts
+        ))
+        transcript = (results.get('audio_transcription') or {}).get('full_text')
+        kwargs = dict(
+            title=title,
+            description=description,
+            transcription=transcript,
+            ocr_text=ocr_spans,
+            frames=frame_metadata,
+            max_frames=self.config.get('holistic_max_frames', 16),
+            context_budget=self.config.get('holistic_context_budget', 1536),
+            max_new_tokens=self.config.get('holistic_max_new_tokens', 1024),
+        )
+
+        def run():
+            # Read the report in the same exclusive call, before another job overwrites it
+            analysis = self.vision_model.analyze_video_holistic(**kwargs)
+            return analysis, self.vision_model.last_context_report
+
+        try:
+            if self.vlm_scheduler is not None:
+                analysis, report = self.vlm_scheduler.run_exclusive(run)
+            else:
+                analysis, report = run()
+            results['holistic_analysis'] = analysis
+            results['context_report'] = report
+            if results['context_report']:
+                print(f"  Context: {results['context_report']['tokens']} tokens, "
+                      f"dropped {results['context_report']['dropped']}\n")
+        except Exception as e:
+            results['holistic_analysis'] = f"Error during holistic analysis: {str(e)}"
+            results['context_report'] = None
+            print(f"  Error: {results['holistic_analysis']}\n")
+
+    def _save_results(self, results, output_dir):
+        """Write the JSON report and human-readable summary."""
         report_path = os.path.join(output_dir, "analysis_report.json")
         with open(report_path, 'w', encoding='utf-8') as f:
             json.dump(results, f, indent=2, ensure_ascii=False)
@@ -170,17 +587,20 @@ class OptiScamAnalyzer:
         print(f"Analysis complete! Results saved to: {output_dir}")
         print(f"{'='*60}\n")
 
-        return results
-
-    def analyze_video_holistic(self, video_path, title=None, description=None, output_dir=None):
+    def analyze_video_holistic(self, video_path, title=None, description=None, output_dir=None,
+                               on_transcript_segment=None, subtitle_path=None, on_vlm_token=None):
         """
-        Holistic analysis — alias for process_video with a holistic output directory suffix.
-        Kept for CLI backward compatibility.
+        Holistic analysis — process_video at a lower frame rate plus the free-form holistic
+        write-up (results['holistic_analysis'], with results['context_report'] recording how
+        the transcript and OCR text were fitted into the context budget).
 
         :param video_path: Path to video file
         :param title: Video title
         :param description: Video description
         :param output_dir: Directory for outputs (created if doesn't exist)
+        :param on_transcript_segment: Optional callback receiving transcript segments
+        :param subtitle_path: Caption file (.srt/.vtt) used instead of Whisper when usable
+        :param on_vlm_token: Optional callback receiving the streamed verdict and reasoning
         :return: Analysis results
         """
         if output_dir is None:
@@ -195,6 +615,10 @@ class OptiScamAnalyzer:
             output_dir=output_dir,
             frame_interval=60,
             use_sharpness_filter=True,
+            on_transcript_segment=on_transcript_segment,
+            subtitle_path=subtitle_path,
+            on_vlm_token=on_vlm_token,
+            holistic_report=True,
         )
 
     def _generate_summary(self, results, output_path):
@@ -228,8 +652,28 @@ class OptiScamAnalyzer:
                 f.write(f"RESULT: NO — This video does not appear to be a scam.{conf_str}\n\n")
             else:
                 f.write("RESULT: UNKNOWN (error during classification)\n\n")
+            if results.get('decided_by') == 'text_cascade':
+                f.write(f"Decided from text signals (score {results['text_score']:.2f}) without the VLM\n\n")
+            if results.get('fingerprint_match'):
+                f.write(f"Matched known soundtrack: {results['fingerprint_match']['name']}\n\n")
             f.write(results.get('verdict', 'No verdict available') + "\n\n")
 
+            # Holistic write-up
+            if results.get('holistic_analysis'):
+                f.write("-" * 60 + "\n")
+                f.write("HOLISTIC ANALYSIS\n")
+                f.write("-" * 60 + "\n")
+                f.write(results['holistic_analysis'] + "\n\n")
+
+            # Targeted frame analyses
+            if results.get('frame_analyses'):
+                f.write("-" * 60 + "\n")
+                f.write("FLAGGED FRAMES\n")
+                f.write("-" * 60 + "\n")
+                for item in results['frame_analyses']:
+                    f.write(f"\n[{item['timestamp']:.2f}s] {item['analysis']}\n")
+                f.write("\n")
+
             # Audio transcription
             f.write("-" * 60 + "\n")
             f.write("AUDIO TRANSCRIPTION\n")
@@ -274,7 +718,7 @@ def main():
 
     # Analysis mode
     parser.add_argument('--holistic', action='store_true',
-                        help='Use holistic mode (lower frame rate, same classification method)')
+                        help='Use holistic mode (lower frame rate plus a free-form holistic analysis)')
 
     # Frame extraction options
     parser.add_argument('--frame-interval', type=int, default=30,
@@ -288,6 +732,18 @@ def main():
     parser.add_argument('--whisper-model', type=str, default='tiny',
                         choices=['tiny', 'base', 'small', 'medium', 'large'],
                         help='Whisper model size (default: tiny)')
+    parser.add_argument('--transcription-profile', type=str, default='balanced',
+                        choices=['fast', 'balanced', 'accurate'],
+                        help='Whisper decoding profile (default: balanced)')
+    parser.add_argument('--word-timestamps', action='store_true',
+                        help='Compute word-level timestamps regardless of profile')
+    parser.add_argument('--reasoning', type=str, default='always',
+                        choices=['always', 'positive', 'never', 'structured'],
+                        help='When to generate written reasoning; "never" returns the verdict '
+                             'from a single forward pass, "structured" a constrained short answer '
+                             '(verdict, scam type, evidence) (default: always)')
+    parser.add_argument('--fingerprint-index', type=str, default=None,
+                        help='Known-scam audio fingerprint index (.npz) checked before analysis')
     parser.add_argument('--device', type=str, default=None,
                         choices=['cuda', 'cpu'],
                         help='Device to run models on (default: auto-detect GPU)')
@@ -297,6 +753,10 @@ def main():
     config = {
         'sharpness_threshold': args.sharpness_threshold,
         'whisper_model_size': args.whisper_model,
+        'transcription_profile': args.transcription_profile,
+        'word_timestamps': True if args.word_timestamps else None,
+        'fingerprint_index_path': args.fingerprint_index,
+        'vlm_reasoning': args.reasoning,
         'device': args.device,
     }
 
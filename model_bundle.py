@@ -0,0 +1,178 @@
+"""
+Offline model bundle: every model the pipeline loads, in one local directory.
+
+    <bundle>/
+        manifest.json        models, their sources and file sizes
+        vlm/                 Qwen3-VL weights (safetensors), processor and tokenizer
+        trocr/               TrOCR weights (safetensors) and processor
+        whisper/             Whisper weights (safetensors) and config.json (dims, alignment heads)
+
+RapidOCR's ONNX models ship inside the rapidocr_onnxruntime package and need
+no download. Safetensors files are memory-mapped when loaded, and a bundle
+is loaded with local_files_only, so startup makes no network calls.
+
+Usage:
+    python model_bundle.py build models_bundle
+    python model_bundle.py build models_bundle --whisper-size base
+    python model_bundle.py verify models_bundle
+
+Then set 'model_bundle_dir': 'models_bundle' in the analyzer config
+(OPTISCAM_MODEL_BUNDLE for api.py).
+"""
+
+import os
+import json
+import argparse
+from datetime import datetime, timezone
+
+MANIFEST_NAME = 'manifest.json'
+# Weights other than safetensors are never copied into a bundle
+_HUB_PATTERNS = ['*.json', '*.safetensors', '*.txt', '*.model', '*.tiktoken', '*.jinja']
+
+
+def _file_sizes(directory):
+    sizes = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            sizes[os.path.relpath(path, directory).replace(os.sep, '/')] = os.path.getsize(path)
+    return sizes
+
+
+def _bundle_hub_model(repo_id, target, model_class, processor_class):
+    """Fetch a Hub model's safetensors and processor files; convert if the repo has none."""
+    from huggingface_hub import snapshot_download
+
+    snapshot_download(repo_id, local_dir=target, allow_patterns=_HUB_PATTERNS)
+    if not any(name.endswith('.safetensors') for name in os.listdir(target)):
+        print(f"  {repo_id} has no safetensors weights; converting")
+        model_class.from_pretrained(repo_id).save_pretrained(target, safe_serialization=True)
+        processor_class.from_pretrained(repo_id).save_pretrained(target)
+
+
+def _bundle_whisper(model_size, target):
+    """Re-save a Whisper checkpoint as safetensors plus its dims and alignment heads."""
+    import whisper
+    from dataclasses import asdict
+    from safetensors.torch import save_file
+
+    model = whisper.load_model(model_size, device='cpu')
+    os.makedirs(target, exist_ok=True)
+    save_file({k: v.contiguous() for k, v in model.state_dict().items()},
+              os.path.join(target, 'model.safetensors'))
+    alignment_heads = whisper._ALIGNMENT_HEADS.get(model_size)
+    with open(os.path.join(target, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_size': model_size,
+            'dims': asdict(model.dims),
+            'alignment_heads': alignment_heads.decode('ascii') if alignment_heads else None,
+        }, f, indent=2)
+
+
+def build_bundle(bundle_dir, vision_model='Qwen/Qwen3-VL-2B-Instruct',
+                 trocr_model='microsoft/trocr-small-printed', whisper_size='tiny'):
+    """
+    Download and package every model into bundle_dir and write its manifest.
+
+    :param bundle_dir: Output directory
+    :param vision_model: Qwen3-VL Hub ID
+    :param trocr_model: TrOCR Hub ID
+    :param whisper_size: Whisper model size
+    :return: Manifest dict
+    """
+    from transformers import AutoProcessor, TrOCRProcessor, VisionEncoderDecoderModel
+    from Qwen3_VL_2B import _VLModel
+
+    os.makedirs(bundle_dir, exist_ok=True)
+
+    print(f"1. {vision_model} -> vlm/")
+    _bundle_hub_model(vision_model, os.path.join(bundle_dir, 'vlm'), _VLModel, AutoProcessor)
+    print(f"2. {trocr_model} -> trocr/")
+    _bundle_hub_model(trocr_model, os.path.join(bundle_dir, 'trocr'), VisionEncoderDecoderModel, TrOCRProcessor)
+    print(f"3. Whisper {whisper_size} -> whisper/")
+    _bundle_whisper(whisper_size, os.path.join(bundle_dir, 'whisper'))
+
+    manifest = {
+        'format': 1,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'models': {
+            'vlm': {'path': 'vlm', 'source': vision_model},
+            'trocr': {'path': 'trocr', 'source': trocr_model},
+            'whisper': {'path': 'whisper', 'source': f"openai-whisper {whisper_size}",
+                        'model_size': whisper_size},
+        },
+    }
+    for entry in manifest['models'].values():
+        entry['files'] = _file_sizes(os.path.join(bundle_dir, entry['path']))
+
+    with open(os.path.join(bundle_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    total = sum(size for entry in manifest['models'].values() for size in entry['files'].values())
+    print(f"Bundle written to {bundle_dir} ({total / 1024 ** 3:.2f} GB)")
+    return manifest
+
+
+def read_manifest(bundle_dir):
+    """
+    Load a bundle's manifest and check that every listed file is present and complete.
+
+    :param bundle_dir: Bundle directory
+    :return: Manifest dict with each model's 'path' made absolute
+    """
+    with open(os.path.join(bundle_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    for name, entry in manifest['models'].items():
+        entry['path'] = os.path.abspath(os.path.join(bundle_dir, entry['path']))
+        for relative, size in entry['files'].items():
+            path = os.path.join(entry['path'], relative)
+            if not os.path.exists(path) or os.path.getsize(path) != size:
+                raise FileNotFoundError(f"Model bundle {bundle_dir} is incomplete: {name}/{relative}")
+    return manifest
+
+
+def load_whisper(path, device=None):
+    """
+    Load a bundled Whisper model from its safetensors weights.
+
+    :param path: The bundle's whisper/ directory
+    :param device: Device to move the model to
+    :return: whisper.model.Whisper
+    """
+    from whisper.model import ModelDimensions, Whisper
+    from safetensors.torch import load_file
+
+    with open(os.path.join(path, 'config.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    model = Whisper(ModelDimensions(**config['dims']))
+    # assign=True keeps the memory-mapped tensors instead of copying them into fresh ones
+    model.load_state_dict(load_file(os.path.join(path, 'model.safetensors')), assign=True)
+    if config.get('alignment_heads'):
+        model.set_alignment_heads(config['alignment_heads'].encode('ascii'))
+    return model.to(device) if device else model
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or verify an offline OptiScam model bundle')
+    parser.add_argument('command', choices=['build', 'verify'])
+    parser.add_argument('bundle_dir', type=str, help='Bundle directory')
+    parser.add_argument('--vision-model', type=str, default='Qwen/Qwen3-VL-2B-Instruct')
+    parser.add_argument('--trocr-model', type=str, default='microsoft/trocr-small-printed')
+    parser.add_argument('--whisper-size', type=str, default='tiny',
+                        choices=['tiny', 'base', 'small', 'medium', 'large'])
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_bundle(args.bundle_dir, args.vision_model, args.trocr_model, args.whisper_size)
+    else:
+        manifest = read_manifest(args.bundle_dir)
+        for name, entry in manifest['models'].items():
+            size = sum(entry['files'].values())
+            print(f"  {name:<8} {entry['source']:<40} {size / 1024 ** 2:>8.0f} MB")
+        print(f"Bundle {args.bundle_dir} is complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Load-on-first-use registry for the pipeline's models with a memory ceiling.
+
+Components are registered with a loader and built the first time they are
+used. Resident memory is the size of the tensors in each component's torch
+modules (state_dict, so quantize_dynamic's packed weights are included),
+measured when the component loads and cached. Components that load weights
+lazily themselves (Whisper on first transcription, TrOCR on the first
+low-confidence detection) are registered with grows=True and re-measured
+after each use. Method calls through a LazyModel mark the component in use;
+when the total goes over the ceiling, the least recently used components
+that are not in use are unloaded and rebuilt on their next use. Reading a
+plain attribute through a LazyModel never loads the component: it is read
+from the loaded instance, or from the metadata declared at registration.
+"""
+
+import gc
+import os
+import time
+import inspect
+import weakref
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+
+import torch
+
+
+def _tensors(value):
+    """Tensors in a state_dict entry; packed quantized weights are stored as tuples."""
+    if isinstance(value, torch.Tensor):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _tensors(item)
+
+
+_MISSING = object()
+
+
+def resident_bytes(obj, depth=2):
+    """
+    Bytes of the torch module tensors reachable from obj's attributes.
+
+    :param obj: Component instance (or torch module)
+    :param depth: How many attribute levels to search for modules
+    :return: Size in bytes; shared tensors are counted once
+    """
+    seen = set()
+    total = 0
+
+    def visit(value, level):
+        nonlocal total
+        if isinstance(value, torch.nn.Module):
+            # parameters() misses the packed weights of dynamically quantized layers
+            for entry in value.state_dict(keep_vars=True).values():
+                for tensor in _tensors(entry):
+                    key = (tensor.device, tensor.data_ptr())
+                    if key not in seen:
+                        seen.add(key)
+                        total += tensor.numel() * tensor.element_size()
+        elif level < depth and hasattr(value, '__dict__') and not isinstance(value, type):
+            for attribute in list(vars(value).values()):
+                visit(attribute, level + 1)
+
+    visit(obj, 0)
+    return total
+
+
+class LazyModel:
+    """
+    Stand-in that resolves to the manager's instance on every attribute access.
+
+    Method calls load the model and run with it marked in use, so it is not
+    evicted mid-call. With the model's class declared at registration, other
+    attributes are resolved without loading it: class attributes from the
+    class, instance attributes from the loaded instance or the declared
+    metadata (AttributeError otherwise). Properties still load the model,
+    since they read the instance (e.g. AudioTranscriber.model).
+    """
+
+    def __init__(self, manager, name):
+        object.__setattr__(self, '_manager', manager)
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attribute):
+        manager, name = self._manager, self._name
+
+        def call(*args, **kwargs):
+            with manager.use(name) as instance:
+                return getattr(instance, attribute)(*args, **kwargs)
+
+        instance = manager.loaded(name)
+        cls = manager.declared_class(name)
+        if instance is None and cls is not None:
+            declared = inspect.getattr_static(cls, attribute, _MISSING)
+            if inspect.isfunction(declared):
+                return call
+            if declared is _MISSING:
+                metadata = manager.metadata(name)
+                if attribute in metadata:
+                    return metadata[attribute]
+                raise AttributeError(f"'{attribute}' is not available until model '{name}' is loaded")
+            if not isinstance(declared, property):
+                return getattr(cls, attribute)
+
+        value = getattr(instance if instance is not None else manager.get(name), attribute)
+        return call if inspect.ismethod(value) else value
+
+    def __setattr__(self, attribute, value):
+        setattr(self._manager.get(self._name), attribute, value)
+
+    def __repr__(self):
+        return f"LazyModel({self._name!r})"
+
+
+class ModelManager:
+    def __init__(self, max_memory_mb=None):
+        """
+        Registry of lazily loaded models with LRU eviction.
+
+        :param max_memory_mb: Ceiling on resident model memory in MB (None = never evict)
+        """
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+
+        self._loaders = {}
+        self._classes = {}
+        self._metadata = {}
+        self._sizes = {}
+        self._grows = {}
+        self._measured = {}
+        self._in_use = {}
+        self._resident = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.stats = {'loads': 0, 'evictions': 0, 'load_time': 0.0}
+        self.events = deque(maxlen=200)
+
+        # Locks held by another thread at fork time would stay locked in the child
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.WeakMethod(self._reset_locks)
+            os.register_at_fork(after_in_child=lambda: ref() and ref()())
+
+    def _reset_locks(self):
+        """Fresh locks in a forked child."""
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self._load_locks}
+
+    def register(self, name, loader, unloader=None, size_mb=None, grows=False, cls=None, metadata=None):
+        """
+        Register a model without loading it.
+
+        :param name: Model name ('ocr', 'whisper', 'vlm', ...)
+        :param loader: Zero-argument callable returning the loaded instance
+        :param unloader: Optional callable receiving the instance before it is dropped
+        :param size_mb: Fixed size estimate for models that hold no torch tensors (None = measure)
+        :param grows: The instance loads more weights on first use; re-measure it after each use
+                      (otherwise it is measured once, at load)
+        :param cls: Class the loader returns; lets LazyModel tell methods from data attributes
+                    without loading (None = any attribute access loads)
+        :param metadata: Read-only attribute values served by LazyModel while not loaded
+        """
+        self._loaders[name] = (loader, unloader)
+        self._classes[name] = cls
+        self._metadata[name] = dict(metadata or {})
+        self._sizes[name] = int(size_mb * 1024 * 1024) if size_mb else None
+        self._grows[name] = grows
+        self._in_use[name] = 0
+        self._load_locks[name] = threading.Lock()
+
+    def proxy(self, name):
+        """LazyModel for name, usable wherever the loaded instance would be."""
+        return LazyModel(self, name)
+
+    def declared_class(self, name):
+        """Class registered for name, or None."""
+        return self._classes.get(name)
+
+    def metadata(self, name):
+        """Attribute values registered for name, served while it is not loaded."""
+        return self._metadata.get(name, {})
+
+    def loaded(self, name):
+        """The instance if it is resident, else None (never triggers a load)."""
+        with self._lock:
+            return self._resident.get(name)
+
+    def get(self, name):
+        """
+        Instance for name, loading it on first use and evicting others if over the ceiling.
+
+        :param name: Registered model name
+        :return: Loaded instance
+        """
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                return self._resident[name]
+
+        # Per-model lock: concurrent first uses load once, other models stay available
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self._resident:
+                    self._resident.move_to_end(name)
+                    return self._resident[name]
+
+            loader, _ = self._loaders[name]
+            print(f"Loading model '{name}' on first use...")
+            started = time.perf_counter()
+            instance = loader()
+            elapsed = time.perf_counter() - started
+            measured = resident_bytes(instance) if self._sizes[name] is None else None
+
+            with self._lock:
+                self._resident[name] = instance
+                self._measured[name] = measured
+                size = self._size(name)
+                self.stats['loads'] += 1
+                self.stats['load_time'] += elapsed
+                self.events.append({'event': 'load', 'model': name, 'seconds': elapsed,
+                                    'bytes': size, 'time': time.time()})
+                self._enforce_limit(keep=name)
+            print(f"Model '{name}' loaded in {elapsed:.1f}s ({size / 1024 ** 2:.0f} MB)")
+            return instance
+
+    @contextmanager
+    def use(self, name):
+        """
+        Hold a model in use for the duration of a call; models in use are never evicted.
+
+        :param name: Registered model name
+        :return: Context manager yielding the loaded instance
+        """
+        with self._lock:
+            self._in_use[name] += 1
+        try:
+            yield self.get(name)
+        finally:
+            with self._lock:
+                self._in_use[name] -= 1
+                idle = self._in_use[name] == 0
+                instance = self._resident.get(name)
+            if idle and instance is not None and self._grows[name] and self._sizes[name] is None:
+                # Weights the component loaded during this call are counted from now on
+                measured = resident_bytes(instance)
+                with self._lock:
+                    if self._resident.get(name) is instance:
+                        self._measured[name] = measured
+            with self._lock:
+                self._enforce_limit(keep=name)
+
+    def refresh(self, name):
+        """Re-measure a resident model's size (after loading weights outside a tracked call)."""
+        instance = self.loaded(name)
+        if instance is not None and self._sizes[name] is None:
+            measured = resident_bytes(instance)
+            with self._lock:
+                if self._resident.get(name) is instance:
+                    self._measured[name] = measured
+
+    def _size(self, name):
+        """Cached size of a resident model. Caller holds the lock."""
+        return self._sizes[name] if self._sizes[name] is not None else self._measured.get(name) or 0
+
+    def _enforce_limit(self, keep):
+        """
+        Unload least recently used idle models until under the ceiling. Caller holds the lock.
+
+        Models in use are skipped; the total may stay over the ceiling until they are released.
+        """
+        if self.max_memory_bytes is None:
+            return
+        total = sum(self._size(name) for name in self._resident)
+
+        for name in list(self._resident):
+            if total <= self.max_memory_bytes:
+                break
+            if name == keep or self._in_use[name]:
+                continue
+            size = self._size(name)
+            self._unload(name, reason='memory limit')
+            total -= size
+
+    def _unload(self, name, reason):
+        """Drop a resident model. Caller holds the lock."""
+        size = self._size(name)
+        instance = self._resident.pop(name)
+        self._measured.pop(name, None)
+        _, unloader = self._loaders[name]
+        if unloader is not None:
+            unloader(instance)
+        # Calls already running on the instance keep it alive until they return
+        del instance
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+        self.stats['evictions'] += 1
+        self.events.append({'event': 'evict', 'model': name, 'reason': reason,
+                            'bytes': size, 'time': time.time()})
+        print(f"Unloaded model '{name}' ({reason}, {size / 1024 ** 2:.0f} MB)")
+
+    def unload(self, name):
+        """Unload a model now; it is reloaded on its next use."""
+        with self._lock:
+            if name in self._resident:
+                self._unload(name, reason='requested')
+
+    def preload(self, names=None):
+        """Load models up front (all registered models by default)."""
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def summary(self):
+        """Load/eviction counters, resident models with their sizes, and recent events."""
+        with self._lock:
+            resident = {name: self._size(name) for name in self._resident}
+            return {
+                **self.stats,
+                'resident': resident,
+                'resident_bytes': sum(resident.values()),
+                'max_memory_bytes': self.max_memory_bytes,
+                'registered': list(self._loaders),
+                'in_use': {name: count for name, count in self._in_use.items() if count},
+                'events': list(self.events)[-20:],
+            }
@@ -0,0 +1,197 @@
+"""
+Preload-then-fork API server.
+
+Loads Whisper, TrOCR and Qwen3-VL once in the parent process, freezes the
+garbage collector, then forks N uvicorn workers that share one listening
+socket. The weights stay in copy-on-write pages shared by every worker:
+gc.freeze() moves the loaded objects out of the collector's generations,
+so collections in the workers never write to (and so never copy) them.
+
+CPU only: CUDA contexts, ONNX Runtime sessions and warm OpenMP pools do not
+survive fork. The parent therefore loads on CPU with one intra-op thread,
+and each worker creates its own RapidOCR session and VLM scheduler thread.
+Worker i gets every workers-th core, and the resource governor sizes its
+OpenCV, ONNX Runtime and torch pools to that share.
+
+Jobs live in each worker's memory, so workers mirror them to a shared
+directory (OPTISCAM_JOB_DIR) and GET /job/{id} is answered by any worker.
+
+Usage:
+    python prefork_server.py --workers 4 --port 8000
+    python prefork_server.py --workers 4 --report-interval 60   # log memory per worker
+"""
+
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import argparse
+
+
+def process_memory(pid='self'):
+    """
+    Private vs shared memory of a process, from /proc/<pid>/smaps_rollup (Linux).
+
+    :param pid: Process ID or 'self'
+    :return: Dict with rss, pss, shared and private bytes, or None where unavailable
+    """
+    fields = {}
+    for name in ('smaps_rollup', 'smaps'):
+        try:
+            with open(f"/proc/{pid}/{name}", 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 3 and parts[2] == 'kB':
+                        key = parts[0].rstrip(':')
+                        fields[key] = fields.get(key, 0) + int(parts[1]) * 1024
+            break
+        except OSError:
+            continue
+    if not fields:
+        return None
+
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def print_memory_report(workers):
+    """Print private/shared memory for each worker and the total actually used (sum of PSS)."""
+    mb = 1024 ** 2
+    total_pss = 0
+    print(f"{'pid':>8}  {'private MB':>10}  {'shared MB':>10}  {'pss MB':>8}")
+    for pid in [os.getpid()] + sorted(workers):
+        memory = process_memory(pid)
+        if memory is None:
+            continue
+        total_pss += memory['pss']
+        label = ' (parent)' if pid == os.getpid() else ''
+        print(f"{pid:>8}  {memory['private'] / mb:>10.0f}  {memory['shared'] / mb:>10.0f}  "
+              f"{memory['pss'] / mb:>8.0f}{label}")
+    print(f"Total (sum of PSS): {total_pss / mb:.0f} MB\n")
+
+
+def _serve(sock, cores, torch_threads, log_level):
+    """Worker body: per-worker thread budgets, then serve the inherited socket."""
+    import uvicorn
+    import api
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    api.analyzer.set_cpu_cores(cores, torch_threads)
+
+    config = uvicorn.Config(api.app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _fork_worker(sock, cores, torch_threads, log_level):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _serve(sock, cores, torch_threads, log_level)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the OptiScam API from preforked workers sharing model weights')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes')
+    parser.add_argument('--host', type=str, default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help='torch intra-op threads per worker (default: the worker\'s cores / concurrent jobs)')
+    parser.add_argument('--job-dir', type=str, default='jobs', help='Shared directory for job state')
+    parser.add_argument('--report-interval', type=float, default=0,
+                        help='Seconds between per-worker memory reports (0 = only at startup)')
+    parser.add_argument('--no-warm-up', action='store_true', help='Skip the warm-up inference in the parent')
+    parser.add_argument('--log-level', type=str, default='info')
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        sys.exit("prefork_server.py needs os.fork (Linux/macOS); use uvicorn directly on Windows")
+    if os.environ.get('OPTISCAM_DEVICE', 'cpu') != 'cpu':
+        sys.exit("Preforked workers cannot share a CUDA context; run one uvicorn process per GPU instead")
+
+    from resource_governor import available_cores
+    all_cores = available_cores()
+    worker_cores = [all_cores[i::args.workers] or all_cores for i in range(args.workers)]
+
+    # Configure api.py before it builds the analyzer: CPU, one loader thread, job mirroring
+    os.environ['OPTISCAM_DEVICE'] = 'cpu'
+    os.environ['OPTISCAM_CPU_THREADS'] = '1'
+    os.environ['OPTISCAM_JOB_DIR'] = args.job_dir
+    # Each worker's thread pools are sized to its share of the cores
+    os.environ['OPTISCAM_RESOURCE_GOVERNOR'] = '1'
+    # Warm-up runs below, without the ONNX session that would not survive fork
+    os.environ['OPTISCAM_WARMUP'] = '0'
+    os.makedirs(args.job_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    import api
+    api.analyzer.preload_models(include_onnx=False)
+    print(f"Models loaded in parent in {time.perf_counter() - started:.1f}s")
+    if not args.no_warm_up:
+        # The system-prompt KV cache built here is shared with every worker too
+        api.analyzer.warm_up(include_onnx=False)
+
+    # Everything allocated so far is long-lived; keep the collector off its pages
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # pid -> worker index, so a replacement gets the same cores
+    workers = {_fork_worker(sock, worker_cores[i], args.threads_per_worker, args.log_level): i
+               for i in range(args.workers)}
+    print(f"Forked {len(workers)} workers ({len(worker_cores[0])} cores each) on {args.host}:{args.port}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # First report once workers have imported and settled
+    next_report = time.monotonic() + 10
+    while workers:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            index = workers.pop(pid)
+            if not stopping:
+                print(f"Worker {pid} exited (status {status}); forking a replacement")
+                workers[_fork_worker(sock, worker_cores[index], args.threads_per_worker, args.log_level)] = index
+            continue
+
+        if next_report is not None and time.monotonic() >= next_report and not stopping:
+            print_memory_report(workers)
+            next_report = time.monotonic() + args.report_interval if args.report_interval > 0 else None
+        time.sleep(0.5)
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+CPU thread budgets shared by OpenCV, ONNX Runtime and PyTorch.
+
+Each library sizes its thread pool to every core by default, so two
+overlapping jobs (or OCR overlapping with Whisper) run several times more
+threads than there are cores. The governor splits the cores between the
+allowed number of concurrent jobs and sizes every pool to one job's share.
+It can also cap how many jobs run at once and pin each job's thread to its
+own cores.
+
+OpenCV's and PyTorch's thread counts are process-wide, so every job gets
+the same budget. ONNX Runtime's is set per session (RapidOCR's session is
+created with the budget).
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import cv2
+import torch
+
+
+def available_cores():
+    """Cores this process may run on (affinity mask where supported)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class ResourceGovernor:
+    def __init__(self, max_concurrent_jobs=None, cores=None, torch_threads=None, pin_jobs=False):
+        """
+        Assign per-library thread budgets for a number of concurrent jobs.
+
+        :param max_concurrent_jobs: Jobs allowed to run at once; further jobs wait for a slot
+                                    (None = no limit, budgets sized for one job)
+        :param cores: Core IDs the budgets are sized for (None = current affinity); the
+                      process is pinned to them only when pin_jobs is set
+        :param torch_threads: Override for the PyTorch intra-op budget (None = one job's share)
+        :param pin_jobs: Pin each running job's thread to the cores of its slot (Linux). Library
+                         pool threads started during a job keep that job's cores, so this
+                         works best with one job per process or with long-lived pools
+        """
+        self.cores = list(cores) if cores else available_cores()
+        self.max_concurrent_jobs = max_concurrent_jobs
+        # Affinity is only ever changed when pinning is requested
+        self.pin_jobs = pin_jobs and hasattr(os, 'sched_setaffinity')
+
+        self._slot_lock = threading.Condition()
+        self._free_slots = list(range(max_concurrent_jobs or 1))
+        self.stats = {'jobs': 0, 'total_wait_time': 0.0, 'max_wait_time': 0.0, 'running': 0,
+                      'max_running': 0}
+
+        self.resize(self.cores, torch_threads)
+
+    def resize(self, cores, torch_threads=None):
+        """
+        Recompute and apply the budgets for a set of cores (e.g. one preforked worker's share).
+
+        :param cores: Core IDs available to this process's jobs; the process is pinned to
+                      them when pin_jobs is set
+        :param torch_threads: Override for the PyTorch intra-op budget (None = one job's share)
+        """
+        self.cores = list(cores)
+        self._torch_override = torch_threads
+        if self.pin_jobs:
+            os.sched_setaffinity(0, self.cores)
+
+        jobs = self.max_concurrent_jobs or 1
+        self.threads_per_job = max(1, len(self.cores) // jobs)
+        self.cv2_threads = self.threads_per_job
+        self.ort_threads = self.threads_per_job
+        self.torch_threads = self._torch_override or self.threads_per_job
+
+        # Disjoint core sets, one per job slot, for pinning
+        self.slot_cores = [self.cores[i::jobs] or self.cores for i in range(jobs)]
+
+        cv2.setNumThreads(self.cv2_threads)
+        torch.set_num_threads(self.torch_threads)
+        try:
+            # Only settable before any inter-op parallel work has started
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+
+        print(f"CPU budget: {len(self.cores)} cores, {jobs} concurrent job(s) -> "
+              f"OpenCV {self.cv2_threads}, ONNX Runtime {self.ort_threads}, PyTorch {self.torch_threads} threads"
+              + (" (jobs pinned)" if self.pin_jobs else ""))
+
+    @contextmanager
+    def job(self):
+        """
+        Hold a job slot for the duration of a job, pinning the calling thread if enabled.
+
+        :return: Context manager yielding the slot index
+        """
+        started = time.perf_counter()
+        with self._slot_lock:
+            if self.max_concurrent_jobs:
+                while not self._free_slots:
+                    self._slot_lock.wait()
+                slot = self._free_slots.pop(0)
+            else:
+                slot = 0
+            waited = time.perf_counter() - started
+            self.stats['jobs'] += 1
+            self.stats['total_wait_time'] += waited
+            self.stats['max_wait_time'] = max(self.stats['max_wait_time'], waited)
+            self.stats['running'] += 1
+            self.stats['max_running'] = max(self.stats['max_running'], self.stats['running'])
+
+        thread_id = threading.get_native_id()
+        previous = None
+        if self.pin_jobs:
+            # Threads this thread starts (and work it does itself) stay on the slot's cores
+            previous = os.sched_getaffinity(thread_id)
+            os.sched_setaffinity(thread_id, self.slot_cores[slot])
+        try:
+            yield slot
+        finally:
+            if previous is not None:
+                os.sched_setaffinity(thread_id, previous)
+            with self._slot_lock:
+                self.stats['running'] -= 1
+                if self.max_concurrent_jobs:
+                    self._free_slots.append(slot)
+                    self._slot_lock.notify()
+
+    def summary(self):
+        """Budgets per library plus job slot counters."""
+        with self._slot_lock:
+            stats = dict(self.stats)
+        return {
+            'cores': len(self.cores),
+            'max_concurrent_jobs': self.max_concurrent_jobs,
+            'threads_per_job': self.threads_per_job,
+            'cv2_threads': self.cv2_threads,
+            'ort_threads': self.ort_threads,
+            'torch_threads': self.torch_threads,
+            'pin_jobs': self.pin_jobs,
+            **stats,
+            'avg_wait_time': stats['total_wait_time'] / stats['jobs'] if stats['jobs'] else 0.0,
+        }
@@ -0,0 +1,96 @@
+"""
+Cheap regex signals for scam-related text (OCR, transcript, title, description).
+"""
+
+import re
+
+
+SIGNAL_PATTERNS = {
+    'url': re.compile(
+        r'\b(?:https?://|www\.)\S+'
+        r'|\b[a-z0-9-]+\.(?:com|net|org|io|xyz|top|site|online|info|biz|me|ly|gg|app|link|click|shop|vip|cc)\b(?:/\S*)?',
+        re.IGNORECASE),
+    # Phone-like grouping only, so dates, version strings, ISBNs and lists of years
+    # do not match: a +country code (8+ digits), a parenthesised area code, 3-3-4
+    # groups, or a national number with a leading trunk 0. A trailing full stop
+    # ends the number rather than cutting it short
+    'phone': re.compile(
+        r'(?<![\w.+-])(?:'
+        r'\+(?=(?:[\s().-]*\d){8})\d{1,3}(?:[-. ]?(?:\(\d{1,4}\)|\d{1,6})){1,5}'
+        r'|\(\d{2,4}\)[-. ]?\d{3,4}[-. ]?\d{3,4}'
+        r'|(?:1[-. ])?\d{3}[-. ]\d{3}[-. ]\d{4}'
+        r'|0\d{2,4}[-. ]?\d{3,4}[-. ]?\d{3,4}'
+        r')(?!\w|[.-]\d)'),
+    'crypto_address': re.compile(
+        r'\b(?:bc1[a-z0-9]{25,39}|[13][a-km-zA-HJ-NP-Z1-9]{25,34}|0x[a-fA-F0-9]{40}|T[1-9A-HJ-NP-Za-km-z]{33})\b'),
+    'urgency': re.compile(
+        r'\b(?:act now|limited time|hurry|urgent(?:ly)?|only \d+ (?:left|spots?|slots?)|expires? (?:today|soon)'
+        r'|last chance|don\'?t miss|account (?:suspended|locked|blocked|disabled)|verify your account|immediately)\b',
+        re.IGNORECASE),
+    'money_promise': re.compile(
+        r'\b(?:guaranteed (?:returns?|profits?|income)|\d{2,}\s?% (?:returns?|roi|profits?|daily|weekly)'
+        r'|double your (?:money|crypto|bitcoin)|passive income|get rich|free (?:money|crypto|bitcoin|btc|eth|iphone)'
+        r'|giveaway|risk[- ]free|no risk)\b',
+        re.IGNORECASE),
+    'contact_redirect': re.compile(
+        r'\b(?:dm me|message me|contact me|whats ?app|telegram|t\.me/\S+|signal app|link in (?:bio|description))\b',
+        re.IGNORECASE),
+}
+
+
+def find_signals(text):
+    """
+    Find suspicious patterns in a piece of text.
+
+    :param text: Any text (OCR line, transcript, title...)
+    :return: Dict mapping signal name to list of matched strings (only signals that matched)
+
+    Regression examples (python -m doctest scam_signals.py):
+
+    >>> find_signals("Call +1 (555) 123-4567.")['phone']
+    ['+1 (555) 123-4567']
+    >>> find_signals("WhatsApp +44 7911 123456!")['phone']
+    ['+44 7911 123456']
+    >>> 'phone' in find_signals("Posted 2023-10-18, updated 18.10.2023")
+    False
+    >>> find_signals("Text 555-123-4567 or 07911 123456")['phone']
+    ['555-123-4567', '07911 123456']
+    >>> 'phone' in find_signals("Update to version 1.2.3.4567890")
+    False
+    >>> 'phone' in find_signals("ISBN 978-3-16-148410-0")
+    False
+    >>> 'phone' in find_signals("Seasons 2023 2024 2025 2026")
+    False
+    """
+    if not text:
+        return {}
+
+    hits = {}
+    for name, pattern in SIGNAL_PATTERNS.items():
+        matches = [m.group(0) for m in pattern.finditer(text)]
+        if matches:
+            hits[name] = matches
+    return hits
+
+
+def count_signals(text):
+    """Total number of suspicious pattern matches in text."""
+    return sum(len(matches) for matches in find_signals(text).values())
+
+
+# Words that are common in scam pitches; weaker evidence than SIGNAL_PATTERNS on their own
+SCAM_LEXICON = (
+    'investment', 'invest', 'profit', 'returns', 'crypto', 'bitcoin', 'ethereum', 'wallet',
+    'trading', 'forex', 'signals', 'mentor', 'deposit', 'withdraw', 'bonus', 'giveaway',
+    'free', 'guaranteed', 'winner', 'prize', 'claim', 'reward', 'gift card', 'refund',
+    'password', 'verify', 'login', 'account', 'bank', 'payment', 'click', 'link',
+    'limited', 'urgent', 'offer', 'exclusive', 'secret', 'millionaire', 'income',
+)
+
+_LEXICON_RE = re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in SCAM_LEXICON) + r')\b',
+                         re.IGNORECASE)
+
+
+def lexicon_hits(text):
+    """Number of scam-lexicon words in text."""
+    return len(_LEXICON_RE.findall(text or ''))
@@ -122,6 +122,8 @@ def download_models():
         print("\n3. Qwen2-VL-2B-Instruct (~4GB)")
         print("   This model will be downloaded on first use")
         print("   Set TRANSFORMERS_CACHE environment variable to customize location")
+        print("\n   For offline hosts and fast cold starts, package every model instead:")
+        print("   python model_bundle.py build models_bundle")
 
         return True
 
@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import subprocess
+from pathlib import Path
+
+
+# Subtitle codecs that carry text; bitmap formats (PGS, VobSub, DVB) would need OCR
+TEXT_SUBTITLE_CODECS = {'subrip', 'srt', 'ass', 'ssa', 'webvtt', 'mov_text', 'text'}
+
+_TIMESTAMP_RE = re.compile(
+    r'(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})'
+)
+_TAG_RE = re.compile(r'<[^>]+>|\{\\[^}]*\}')
+
+
+class SubtitleExtractor:
+    def __init__(self, min_segments=3, min_characters=40):
+        """
+        Load caption tracks as a drop-in replacement for Whisper transcription.
+
+        :param min_segments: Minimum number of cues for a track to be considered usable
+        :param min_characters: Minimum total caption text length for a usable track
+        """
+        self.min_segments = min_segments
+        self.min_characters = min_characters
+
+    def probe_embedded_subtitles(self, video_path):
+        """
+        List the text subtitle streams carried in a video container using ffprobe.
+
+        :param video_path: Path to video file
+        :return: List of dicts with stream index, codec and language
+        """
+        command = [
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', 's',
+            '-show_entries', 'stream=index,codec_name:stream_tags=language',
+            '-of', 'json',
+            video_path
+        ]
+
+        try:
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            print(f"Error probing subtitle streams: {e}")
+            return []
+
+        streams = []
+        for position, stream in enumerate(json.loads(output or '{}').get('streams', [])):
+            codec = stream.get('codec_name', '')
+            if codec not in TEXT_SUBTITLE_CODECS:
+                continue
+            streams.append({
+                'index': stream.get('index'),
+                'position': position,
+                'codec': codec,
+                'language': stream.get('tags', {}).get('language'),
+            })
+
+        return streams
+
+    def extract_embedded_subtitles(self, video_path, output_path=None, stream_position=0):
+        """
+        Extract one embedded subtitle stream to an SRT file using ffmpeg.
+
+        :param video_path: Path to video file
+        :param output_path: Path for the extracted SRT file (optional)
+        :param stream_position: Position of the stream among the container's subtitle streams
+        :return: Path to extracted subtitle file, or None on failure
+        """
+        if output_path is None:
+            output_path = f"{Path(video_path).stem}_subtitles.srt"
+
+        command = [
+            'ffmpeg',
+            '-i', video_path,
+            '-map', f'0:s:{stream_position}',
+            '-c:s', 'srt',
+            '-y',
+            output_path
+        ]
+
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+            return output_path
+        except subprocess.CalledProcessError as e:
+            print(f"Error extracting subtitles: {e}")
+            return None
+
+    def parse_subtitle_file(self, subtitle_path):
+        """
+        Parse an SRT or WebVTT file into timeline segments.
+
+        Rolling auto-captions repeat the previous line at the top of each cue;
+        those repeats are dropped so each spoken line appears once.
+
+        :param subtitle_path: Path to .srt or .vtt file
+        :return: List of segments in get_transcription_timeline format
+        """
+        with open(subtitle_path, 'r', encoding='utf-8', errors='replace') as f:
+            # Only truly empty lines end a cue: YouTube auto-captions put a
+            # whitespace-only line between a cue's timing and its text
+            blocks = re.split(r'\n\n+', f.read().replace('\r\n', '\n'))
+
+        segments = []
+        previous_lines = []
+
+        for block in blocks:
+            lines = block.strip().split('\n')
+            timing_index = next(
+                (i for i, line in enumerate(lines) if _TIMESTAMP_RE.search(line)), None
+            )
+            if timing_index is None:
+                continue
+
+            match = _TIMESTAMP_RE.search(lines[timing_index])
+            start = self._to_seconds(*match.groups()[:4])
+            end = self._to_seconds(*match.groups()[4:])
+
+            cue_lines = [_TAG_RE.sub('', line).strip() for line in lines[timing_index + 1:]]
+            cue_lines = [line for line in cue_lines if line]
+            text_lines = [line for line in cue_lines if line not in previous_lines]
+            previous_lines = cue_lines
+
+            text = ' '.join(text_lines)
+            if not text:
+                continue
+
+            segments.append({
+                'start': start,
+                'end': end,
+                'text': text,
+                'words': []
+            })
+
+        return segments
+
+    def load_transcription(self, subtitle_path, language=None):
+        """
+        Load a subtitle file as a transcription result shaped like Whisper's output.
+
+        :param subtitle_path: Path to .srt or .vtt file
+        :param language: Language code of the track (optional)
+        :return: Transcription result dict, or None if the track is not usable
+        """
+        segments = self.parse_subtitle_file(subtitle_path)
+        full_text = ' '.join(segment['text'] for segment in segments)
+
+        if len(segments) < self.min_segments or len(full_text) < self.min_characters:
+            print(f"Subtitle track too sparse to replace transcription: {subtitle_path}")
+            return None
+
+        for i, segment in enumerate(segments):
+            segment['id'] = i
+
+        return {
+            'text': full_text,
+            'segments': segments,
+            'language': language or self.language_from_filename(subtitle_path) or 'unknown',
+            'source': 'subtitles',
+        }
+
+    def transcription_from_video(self, video_path, output_dir=None):
+        """
+        Build a transcription from the first usable embedded text subtitle stream.
+
+        :param video_path: Path to video file
+        :param output_dir: Directory for the extracted subtitle file (optional)
+        :return: Transcription result dict, or None if no usable track exists
+        """
+        for stream in self.probe_embedded_subtitles(video_path):
+            output_path = None
+            if output_dir:
+                output_path = os.path.join(output_dir, f"subtitles_{stream['position']}.srt")
+
+            subtitle_path = self.extract_embedded_subtitles(
+                video_path, output_path, stream_position=stream['position']
+            )
+            if subtitle_path is None:
+                continue
+
+            transcription = self.load_transcription(subtitle_path, language=stream['language'])
+            if transcription:
+                return transcription
+
+        return None
+
+    @staticmethod
+    def language_from_filename(subtitle_path):
+        """
+        Read the language code yt-dlp embeds in subtitle filenames (video.en.vtt, video.de-orig.vtt).
+
+        :param subtitle_path: Path to subtitle file
+        :return: Language code or None
+        """
+        suffixes = Path(subtitle_path).suffixes
+        if len(suffixes) < 2:
+            return None
+        return suffixes[-2].lstrip('.').split('-')[0] or None
+
+    @staticmethod
+    def _to_seconds(hours, minutes, seconds, millis):
+        """Convert SRT/VTT timestamp components to seconds."""
+        return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
@@ -0,0 +1,67 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import audio_fingerprint
+from audio_fingerprint import AudioFingerprintIndex, HOP_LENGTH, SAMPLE_RATE
+
+
+def synthetic_track(seconds, seed):
+    """Random tone bursts over light noise, standing in for a voice-over."""
+    rng = np.random.default_rng(seed)
+    samples = 0.01 * rng.standard_normal(seconds * SAMPLE_RATE)
+    t = np.arange(int(0.25 * SAMPLE_RATE)) / SAMPLE_RATE
+    for start in range(0, len(samples) - len(t), len(t)):
+        for frequency in rng.uniform(100, 3500, size=3):
+            samples[start:start + len(t)] += 0.2 * np.sin(2 * np.pi * frequency * t)
+    return samples.astype(np.float32)
+
+
+@pytest.fixture
+def media(monkeypatch):
+    """Serve synthetic samples by path instead of decoding files with ffmpeg."""
+    tracks = {}
+
+    def load_audio(path, sample_rate=SAMPLE_RATE, max_seconds=None):
+        samples = tracks[path]
+        return samples[:int(max_seconds * sample_rate)] if max_seconds else samples
+
+    monkeypatch.setattr(audio_fingerprint, 'load_audio', load_audio)
+    return tracks
+
+
+def test_track_matches_itself(media):
+    media['scam.mp4'] = synthetic_track(30, seed=1)
+    index = AudioFingerprintIndex()
+    index.add_track('scam.mp4', verdict='Yes. Known scam.')
+
+    match = index.match('scam.mp4')
+    assert match is not None
+    assert match['verdict'] == 'Yes. Known scam.'
+    assert match['offset_seconds'] == 0.0
+
+
+def test_trimmed_reupload_recovers_offset(media):
+    media['scam.mp4'] = synthetic_track(30, seed=1)
+    media['other.mp4'] = synthetic_track(30, seed=2)
+    # The re-upload starts 160 hops (5.12 s) into the original
+    skip = 160 * HOP_LENGTH
+    media['reupload.mp4'] = media['scam.mp4'][skip:skip + 15 * SAMPLE_RATE]
+
+    index = AudioFingerprintIndex()
+    index.add_track('other.mp4', verdict='No.', is_scam=False)
+    index.add_track('scam.mp4', verdict='Yes. Known scam.')
+
+    match = index.match('reupload.mp4')
+    assert match is not None
+    assert match['name'] == 'scam.mp4'
+    assert match['offset_seconds'] == pytest.approx(skip / SAMPLE_RATE, abs=HOP_LENGTH / SAMPLE_RATE)
+
+
+def test_unrelated_audio_does_not_match(media):
+    media['scam.mp4'] = synthetic_track(30, seed=1)
+    media['unrelated.mp4'] = synthetic_track(30, seed=3)
+    index = AudioFingerprintIndex()
+    index.add_track('scam.mp4', verdict='Yes. Known scam.')
+
+    assert index.match('unrelated.mp4') is None
@@ -0,0 +1,47 @@
+from context_builder import ContextBuilder
+
+
+def build_example(max_tokens=60):
+    builder = ContextBuilder(max_tokens=max_tokens, ocr_share=0.3)
+    transcript = ' '.join(f"Sentence number {i} talks about cooking pasta." for i in range(20))
+    transcript += " Send bitcoin now for guaranteed returns."
+    ocr = ['Visit www.example.com', 'visit www.example.com!', 'www.example', 'Chef Mario'] * 3
+    return builder, transcript, ocr, builder.build(transcript, ocr, title='Pasta recipe')
+
+
+def test_dropped_counts_add_up():
+    builder, transcript, ocr, result = build_example()
+    dropped = result['dropped']
+    sentences = builder.split_sentences(transcript)
+    ocr_tokens = sum(builder.count_tokens(span) for span in result['ocr_text'].split('\n'))
+
+    assert result['tokens'] <= builder.max_tokens
+    # Every span but the two distinct captions is a repeat or a partial read
+    assert dropped['ocr_duplicate_spans'] == len(ocr) - 2
+    assert dropped['ocr_spans_over_budget'] == 0
+    assert result['ocr_text'].split('\n') == ['Visit www.example.com', 'Chef Mario']
+    assert 0 < dropped['transcript_sentences'] < len(sentences)
+    assert dropped['transcript_tokens'] == sum(tokens for _, tokens in sentences) - (result['tokens'] - ocr_tokens)
+
+
+def test_scam_sentences_are_kept_first():
+    _, _, _, result = build_example()
+    # The scam sentence comes last in spoken order but is kept ahead of the filler before it
+    assert result['transcription'].endswith('[...] Send bitcoin now for guaranteed returns.')
+
+
+def test_unpunctuated_transcript_is_split_not_dropped():
+    builder = ContextBuilder(max_tokens=100, ocr_share=0.0, max_sentence_tokens=20)
+    transcript = ' '.join(['so today we are talking about my new trading course'] * 40)
+    result = builder.build(transcript)
+
+    assert len(builder.split_sentences(transcript)) > 1
+    assert result['transcription'].replace('[...]', '').strip()
+    assert 0 < result['tokens'] <= builder.max_tokens
+
+
+def test_over_budget_item_is_truncated():
+    builder = ContextBuilder(max_tokens=10, ocr_share=0.0, max_sentence_tokens=1000)
+    result = builder.build('word ' * 100)
+    assert 0 < result['tokens'] <= 10
+    assert result['transcription'].startswith('word')
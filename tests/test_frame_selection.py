@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+pytest.importorskip('cv2')
+
+from frame_selection import FrameSelector
+
+
+def text_box(x, y, width, height):
+    return [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+
+
+def test_pixel_budgets_respect_total_and_bounds():
+    rng = random.Random(0)
+    for _ in range(100):
+        selector = FrameSelector(total_pixels=rng.choice([4, 6, 10]) * 448 * 448)
+        frames = [{'frame_id': i, 'width': 1280, 'height': 720} for i in range(rng.randint(1, 8))]
+        detections = [
+            {'frame_id': frame['frame_id'], 'text': 'x',
+             'bbox': text_box(rng.uniform(0, 1000), rng.uniform(0, 600), rng.uniform(20, 280), rng.uniform(8, 120))}
+            for frame in frames for _ in range(rng.choice([0, 0, 1, 5]))
+        ]
+
+        budgets = selector.allocate_pixel_budgets(frames, detections)
+        assert len(budgets) == len(frames)
+        assert sum(budgets) <= max(selector.total_pixels, selector.min_pixels * len(frames))
+        assert all(selector.min_pixels <= budget <= selector.max_pixels for budget in budgets)
+
+
+def test_pixel_budgets_favour_small_text():
+    selector = FrameSelector()
+    frames = [{'frame_id': 0, 'width': 1280, 'height': 720}, {'frame_id': 1, 'width': 1280, 'height': 720}]
+    detections = [{'frame_id': 0, 'text': 'fine print', 'bbox': text_box(100, 100, 600, 12)}]
+    budgets = selector.allocate_pixel_budgets(frames, detections)
+    assert budgets[0] > budgets[1] == selector.min_pixels
+
+
+def test_pixel_budgets_split_evenly_without_text():
+    selector = FrameSelector(total_pixels=4 * 448 * 448)
+    budgets = selector.allocate_pixel_budgets([{'frame_id': i} for i in range(4)], [])
+    assert len(set(budgets)) == 1
+
+
+def test_ranked_subsample_skips_near_duplicates():
+    selector = FrameSelector(max_frames=3, min_hash_distance=10)
+    # Five sharp near-identical frames of one scene, then two distinct scenes
+    scene = 0b1011_0110 << 40
+    frames = [{'frame_id': i, 'timestamp': float(i), 'sharpness': 500.0, 'dhash': scene ^ (1 << i)}
+              for i in range(5)]
+    frames += [
+        {'frame_id': 5, 'timestamp': 5.0, 'sharpness': 100.0, 'dhash': (1 << 64) - 1},
+        {'frame_id': 6, 'timestamp': 6.0, 'sharpness': 50.0, 'dhash': 0xFFFF_FFFF},
+    ]
+
+    selected = selector.subsample_ranked(frames)
+    assert [frame['frame_id'] for frame in selected] == [0, 5, 6]
+    hashes = [frame['dhash'] for frame in selected]
+    assert all(bin(a ^ b).count('1') >= selector.min_hash_distance
+               for i, a in enumerate(hashes) for b in hashes[i + 1:])
+
+
+def test_ranked_subsample_prefers_frames_with_scam_text():
+    selector = FrameSelector(max_frames=1)
+    frames = [{'frame_id': i, 'timestamp': float(i), 'sharpness': 100.0, 'dhash': i << 20} for i in range(3)]
+    detections = [{'frame_id': 2, 'text': 'Send BTC to bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh'}]
+    assert selector.subsample_ranked(frames, detections)[0]['frame_id'] == 2
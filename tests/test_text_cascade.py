@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from text_cascade import TextScamScorer
+
+
+def test_prior_settles_only_clear_cut_scams():
+    scorer = TextScamScorer()
+    assert scorer.decide(scorer.score("Guaranteed 500% return, DM me on Telegram")) is True
+    # One signal alone, or none, is left to the VLM
+    assert scorer.decide(scorer.score("Guaranteed returns on every trade")) is None
+    assert scorer.decide(scorer.score("Message me on Telegram for details")) is None
+    assert scorer.decide(scorer.score("Easy pasta recipe in 10 minutes")) is None
+
+
+def test_signals_in_any_source_raise_the_score():
+    scorer = TextScamScorer()
+    plain = scorer.score("Morning routine", transcript="I make coffee and go for a run")
+    for kwargs in ({'ocr_text': 'double your bitcoin'}, {'transcript': 'double your bitcoin'},
+                   {'description': 'double your bitcoin'}):
+        assert scorer.score("Morning routine", **kwargs) > plain
+
+
+def test_trained_scorer_round_trips(tmp_path):
+    scorer = TextScamScorer()
+    scam = [scorer.features("Free crypto giveaway", ocr_text="send 1 BTC get 2 back, act now")] * 5
+    legit = [scorer.features("Pasta recipe", transcript="boil the water and add salt")] * 5
+    scorer.fit(scam + legit, [True] * 5 + [False] * 5)
+    assert scorer.decide(scorer.score("Free crypto giveaway", ocr_text="send 1 BTC get 2 back, act now")) is True
+    assert scorer.decide(scorer.score("Pasta recipe", transcript="boil the water and add salt")) is False
+
+    path = tmp_path / 'scorer.json'
+    scorer.save(path)
+    loaded = TextScamScorer(str(path))
+    assert loaded.trained
+    assert loaded.score("Free crypto giveaway") == pytest.approx(scorer.score("Free crypto giveaway"))
@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from timeline_index import IntervalList, TimelineIndex
+
+
+def brute_force(items, t0, t1, half_open):
+    """Reference overlap scan over every interval."""
+    if half_open:
+        return [item for item in items if item['start'] <= t1 and (item['end'] > t0 or item['start'] >= t0)]
+    return [item for item in items if item['start'] <= t1 and item['end'] >= t0]
+
+
+@pytest.mark.parametrize('half_open', [False, True])
+def test_overlapping_matches_brute_force(half_open):
+    rng = random.Random(0)
+    for _ in range(200):
+        items = []
+        for _ in range(rng.randint(0, 40)):
+            start = rng.choice([rng.uniform(0, 100), float(rng.randint(0, 20))])
+            # Mix points, short spans, whole-video spans and shared boundaries
+            length = rng.choice([0.0, rng.uniform(0, 5), rng.uniform(0, 100), float(rng.randint(0, 5))])
+            items.append({'start': start, 'end': start + length})
+        intervals = IntervalList(items, half_open=half_open)
+
+        for _ in range(20):
+            t0 = rng.choice([rng.uniform(-5, 110), float(rng.randint(0, 25))])
+            t1 = t0 + rng.choice([0.0, rng.uniform(0, 10)])
+            assert intervals.overlapping(t0, t1) == brute_force(intervals.items, t0, t1, half_open)
+
+
+def test_long_interval_does_not_hide_short_ones():
+    items = [{'start': 0.0, 'end': 1000.0}] + [{'start': float(t), 'end': t + 1.0} for t in range(1000)]
+    intervals = IntervalList(items)
+    assert intervals.overlapping(499.5, 500.5) == [items[0], items[500], items[501]]
+
+
+def test_half_open_frames_do_not_share_boundaries():
+    index = TimelineIndex(frames=[{'timestamp': 0.0}, {'timestamp': 2.0}, {'timestamp': 4.0}])
+    assert [frame['timestamp'] for frame in index.frames.at(2.0)] == [2.0]
@@ -0,0 +1,219 @@
+"""
+Cheap first-stage scam scorer over the text the pipeline already gathers.
+
+Title + description, OCR text and transcript are reduced to scam-pattern and
+scam-lexicon counts (see scam_signals.py) and scored with a logistic model.
+Only videos whose score falls inside the uncertainty band go on to the VLM.
+Untrained, the scorer uses hand-set weights that only short-circuit blatant
+scams (a video with no signals scores inside the band, so it still reaches
+the VLM); train it on a labeled set whose entries carry a "report" (see
+labeled_set.py) to also settle clearly legitimate videos.
+
+Usage:
+    python text_cascade.py train labeled.jsonl --output text_scorer.json
+    python text_cascade.py evaluate labeled.jsonl --model text_scorer.json --low 0.1 --high 0.9
+"""
+
+import json
+import math
+import argparse
+
+import numpy as np
+
+from scam_signals import SIGNAL_PATTERNS, find_signals, lexicon_hits
+
+
+SOURCES = ('metadata', 'ocr', 'transcript')
+FEATURE_NAMES = [f"{source}_{name}" for source in SOURCES for name in (*SIGNAL_PATTERNS, 'lexicon')]
+
+# Untrained prior: strong patterns push towards scam; with no signals the score
+# (sigmoid of the bias, ~0.27) stays inside the default band. Calibrated so a
+# money promise plus an off-platform contact ("guaranteed 500% return, DM on
+# Telegram", ~0.88) settles above 0.85, while either the promise or the
+# redirect alone (~0.72 / ~0.52) still goes to the VLM
+_DEFAULT_SIGNAL_WEIGHTS = {
+    'url': 0.5, 'phone': 0.4, 'crypto_address': 2.0, 'urgency': 0.8,
+    'money_promise': 2.5, 'contact_redirect': 1.5, 'lexicon': 0.3,
+}
+_DEFAULT_BIAS = -1.0
+
+
+class TextScamScorer:
+    def __init__(self, model_path=None, low=None, high=None):
+        """
+        Logistic scorer over scam-pattern counts with an uncertainty band.
+
+        :param model_path: JSON weights from fit() / save() (None = hand-set prior)
+        :param low: Scores at or below this are decided as not scam (None = saved value or 0.15)
+        :param high: Scores at or above this are decided as scam (None = saved value or 0.85)
+        """
+        self.weights = np.array([_DEFAULT_SIGNAL_WEIGHTS[name.split('_', 1)[1]] for name in FEATURE_NAMES])
+        self.bias = _DEFAULT_BIAS
+        self.low = 0.15
+        self.high = 0.85
+        self.trained = False
+
+        if model_path:
+            self.load(model_path)
+        if low is not None:
+            self.low = low
+        if high is not None:
+            self.high = high
+
+    @staticmethod
+    def _texts(title=None, description=None, ocr_text=None, transcript=None):
+        return {
+            'metadata': ' '.join(t for t in (title, description) if t),
+            'ocr': ocr_text or '',
+            'transcript': transcript or '',
+        }
+
+    def features(self, title=None, description=None, ocr_text=None, transcript=None):
+        """
+        Feature vector: log(1 + count) of every scam pattern and of lexicon words, per text source.
+
+        :return: numpy array aligned with FEATURE_NAMES
+        """
+        values = []
+        for source, text in self._texts(title, description, ocr_text, transcript).items():
+            hits = find_signals(text)
+            values.extend(math.log1p(len(hits.get(name, []))) for name in SIGNAL_PATTERNS)
+            values.append(math.log1p(lexicon_hits(text)))
+        return np.array(values)
+
+    def score(self, title=None, description=None, ocr_text=None, transcript=None):
+        """
+        Probability that the video is a scam, from its text alone.
+
+        Checks of the untrained prior (python -m doctest text_cascade.py):
+
+        >>> scorer = TextScamScorer()
+        >>> scorer.decide(scorer.score("guaranteed 500% return, DM on Telegram"))
+        True
+        >>> scorer.decide(scorer.score("Easy pasta recipe in 10 minutes")) is None
+        True
+        >>> scorer.decide(scorer.score("Passive income tips for students")) is None
+        True
+        """
+        z = float(self.features(title, description, ocr_text, transcript) @ self.weights + self.bias)
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def decide(self, probability):
+        """
+        Apply the uncertainty band.
+
+        :param probability: Output of score()
+        :return: True / False when decisive, None when the VLM should decide
+        """
+        if probability >= self.high:
+            return True
+        if probability <= self.low:
+            return False
+        return None
+
+    def explain(self, title=None, description=None, ocr_text=None, transcript=None, limit=4):
+        """Matched pattern strings, strongest signal types first, for the verdict text."""
+        matches = {}
+        for text in self._texts(title, description, ocr_text, transcript).values():
+            for name, found in find_signals(text).items():
+                matches.setdefault(name, []).extend(found)
+        ranked = sorted(matches.items(), key=lambda item: -_DEFAULT_SIGNAL_WEIGHTS[item[0]])
+        return [(name.replace('_', ' '), list(dict.fromkeys(found))[:2]) for name, found in ranked[:limit]]
+
+    def fit(self, feature_rows, labels, epochs=2000, learning_rate=0.1, l2=1e-3):
+        """
+        Fit the logistic weights with full-batch gradient descent.
+
+        :param feature_rows: List of feature vectors from features()
+        :param labels: List of bools (True = scam)
+        :param epochs: Gradient steps
+        :param learning_rate: Step size
+        :param l2: L2 penalty on the weights
+        """
+        x = np.asarray(feature_rows, dtype=np.float64)
+        y = np.asarray(labels, dtype=np.float64)
+        w = np.zeros(x.shape[1])
+        b = 0.0
+
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-(x @ w + b)))
+            w -= learning_rate * (x.T @ (p - y) / len(y) + l2 * w)
+            b -= learning_rate * float(np.mean(p - y))
+
+        self.weights = w
+        self.bias = b
+        self.trained = True
+
+    def save(self, path):
+        """Write weights and band thresholds as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'features': FEATURE_NAMES,
+                'weights': self.weights.tolist(),
+                'bias': self.bias,
+                'low': self.low,
+                'high': self.high,
+            }, f, indent=2)
+        print(f"Saved text scorer to: {path}")
+
+    def load(self, path):
+        """Load weights and band thresholds saved by save()."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data['features'] != FEATURE_NAMES:
+            raise ValueError(f"{path} was trained on a different feature set")
+        self.weights = np.array(data['weights'])
+        self.bias = data['bias']
+        self.low = data.get('low', self.low)
+        self.high = data.get('high', self.high)
+        self.trained = True
+
+
+def labeled_features(scorer, items):
+    """Feature rows for labeled_set items, using OCR and transcript from their reports."""
+    rows = []
+    for item in items:
+        ocr_text = ' '.join(dict.fromkeys(
+            entry['text'] for texts in item.get('text_timeline', {}).values() for entry in texts
+        ))
+        transcript = (item.get('audio_transcription') or {}).get('full_text')
+        rows.append(scorer.features(item['title'], item['description'], ocr_text, transcript))
+    return rows
+
+
+def main():
+    from labeled_set import load_labeled_set
+
+    parser = argparse.ArgumentParser(description='Train or evaluate the text-signal scam scorer')
+    parser.add_argument('command', choices=['train', 'evaluate'])
+    parser.add_argument('labeled_set', type=str, help='Labeled JSONL file (entries should have a "report")')
+    parser.add_argument('--output', type=str, default='text_scorer.json', help='Where train writes weights')
+    parser.add_argument('--model', type=str, default=None, help='Weights to evaluate (default: hand-set prior)')
+    parser.add_argument('--low', type=float, default=None, help='Band lower edge (default: 0.15 or saved)')
+    parser.add_argument('--high', type=float, default=None, help='Band upper edge (default: 0.85 or saved)')
+    args = parser.parse_args()
+
+    items = load_labeled_set(args.labeled_set)
+    scorer = TextScamScorer(args.model if args.command == 'evaluate' else None, args.low, args.high)
+    rows = labeled_features(scorer, items)
+    labels = [item['is_scam'] for item in items]
+
+    if args.command == 'train':
+        scorer.fit(rows, labels)
+        scorer.save(args.output)
+
+    decided = correct = 0
+    for row, label in zip(rows, labels):
+        probability = 1.0 / (1.0 + math.exp(-float(row @ scorer.weights + scorer.bias)))
+        decision = scorer.decide(probability)
+        if decision is not None:
+            decided += 1
+            correct += decision == label
+
+    print(f"Videos: {len(items)}  |  decided by text: {decided} ({decided / max(len(items), 1):.1%})  |  "
+          f"accuracy on decided: {correct / decided if decided else 0.0:.1%}  |  "
+          f"escalated to VLM: {len(items) - decided}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,53 @@ from PIL import Image
 import torch
 
 class TextExtractor:
-    def __init__(self, use_trocr_fallback=True, trocr_confidence_threshold=0.8):
+    def __init__(self, use_trocr_fallback=True, trocr_confidence_threshold=0.8, device=None,
+                 trocr_model_name='microsoft/trocr-small-printed', local_files_only=False,
+                 ocr_threads=None):
         """
         Initialize text extraction with RapidOCR and optional TrOCR fallback.
 
         :param use_trocr_fallback: Use TrOCR for low-confidence detections
         :param trocr_confidence_threshold: RapidOCR confidence below which TrOCR takes over (default 0.8 = 80%)
+        :param device: Device for TrOCR (cuda/cpu, None = auto-detect)
+        :param trocr_model_name: TrOCR model ID or local directory (e.g. a model bundle's trocr/)
+        :param local_files_only: Never contact the Hub when loading TrOCR
+        :param ocr_threads: ONNX Runtime intra-op threads for RapidOCR (None = all cores)
         """
         self.use_trocr_fallback = use_trocr_fallback
         self.trocr_confidence_threshold = trocr_confidence_threshold
 
-        # Initialize RapidOCR
-        self.rapid_ocr = RapidOCR()
-
-        # Initialize TrOCR if fallback is enabled
-        if use_trocr_fallback:
-            self.trocr_processor = TrOCRProcessor.from_pretrained('microsoft/trocr-small-printed')
-            self.trocr_model = VisionEncoderDecoderModel.from_pretrained('microsoft/trocr-small-printed')
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # RapidOCR's ONNX Runtime session is created on first use; sessions (and their
+        # thread pools) do not survive fork, so preforked workers each build their own
+        self._rapid_ocr = None
+        self.ocr_threads = ocr_threads
+
+        # TrOCR loads on the first low-confidence detection, not up front
+        self.trocr_model_name = trocr_model_name
+        self.local_files_only = local_files_only
+        self.trocr_processor = None
+        self.trocr_model = None
+        self.device = device if device else ("cuda" if torch.cuda.is_available() else "cpu")
+
+    @property
+    def rapid_ocr(self):
+        """RapidOCR engine, created on first use."""
+        if self._rapid_ocr is None:
+            if self.ocr_threads:
+                self._rapid_ocr = RapidOCR(intra_op_num_threads=self.ocr_threads, inter_op_num_threads=1)
+            else:
+                self._rapid_ocr = RapidOCR()
+        return self._rapid_ocr
+
+    def load_trocr(self):
+        """Load the TrOCR fallback model if it is not loaded yet."""
+        if self.trocr_model is None:
+            self.trocr_processor = TrOCRProcessor.from_pretrained(
+                self.trocr_model_name, local_files_only=self.local_files_only
+            )
+            self.trocr_model = VisionEncoderDecoderModel.from_pretrained(
+                self.trocr_model_name, local_files_only=self.local_files_only
+            )
             self.trocr_model.to(self.device)
 
     def extract_with_rapidocr(self, image_path):
@@ -74,6 +103,7 @@ class TextExtractor:
             right, bottom = max(x_coords), max(y_coords)
             image = image.crop((left, top, right, bottom))
 
+        self.load_trocr()
         pixel_values = self.trocr_processor(image, return_tensors="pt").pixel_values
         pixel_values = pixel_values.to(self.device)
 
@@ -0,0 +1,178 @@
+from bisect import bisect_right
+
+
+class IntervalList:
+    def __init__(self, items, start_key='start', end_key='end', half_open=False):
+        """
+        Sorted interval store answering overlap queries as an implicit interval tree.
+
+        Items are sorted by start; the middle item of every range is a tree node
+        holding the largest end in its range, so a query skips whole ranges that
+        end before the window and costs O(log n + matches) however long the
+        longest interval is.
+
+        :param items: Dicts carrying start/end times in seconds
+        :param start_key: Key holding the interval start
+        :param end_key: Key holding the interval end
+        :param half_open: Treat intervals as [start, end) so back-to-back spans do not share a boundary
+        """
+        self.half_open = half_open
+        self.items = sorted(items, key=lambda item: item[start_key])
+        self.starts = [item[start_key] for item in self.items]
+        self.ends = [item[end_key] for item in self.items]
+        self._max_end = [0.0] * len(self.items)
+        self._build(0, len(self.items))
+
+    def __len__(self):
+        return len(self.items)
+
+    def _build(self, lo, hi):
+        """Fill _max_end for the node covering [lo, hi) and its subtrees; return its max end."""
+        if lo >= hi:
+            return float('-inf')
+        mid = (lo + hi) // 2
+        self._max_end[mid] = max(self.ends[mid], self._build(lo, mid), self._build(mid + 1, hi))
+        return self._max_end[mid]
+
+    def _overlaps(self, start, end, t0):
+        """Whether an interval starting no later than the window end reaches t0."""
+        if self.half_open:
+            return end > t0 or start >= t0
+        return end >= t0
+
+    def _collect(self, lo, hi, t0, limit, out):
+        """Append overlapping items of [lo, hi) below index limit to out, in start order."""
+        if lo >= hi or lo >= limit:
+            return
+        mid = (lo + hi) // 2
+        # The range's last start and largest end bound every interval in it
+        if not self._overlaps(self.starts[hi - 1], self._max_end[mid], t0):
+            return
+        self._collect(lo, mid, t0, limit, out)
+        if mid < limit and self._overlaps(self.starts[mid], self.ends[mid], t0):
+            out.append(self.items[mid])
+        self._collect(mid + 1, hi, t0, limit, out)
+
+    def overlapping(self, t0, t1):
+        """
+        Return all intervals that overlap [t0, t1].
+
+        :param t0: Window start in seconds
+        :param t1: Window end in seconds
+        :return: List of items in start order
+        """
+        out = []
+        self._collect(0, len(self.items), t0, bisect_right(self.starts, t1), out)
+        return out
+
+    def at(self, timestamp):
+        """Return all intervals active at a single timestamp."""
+        return self.overlapping(timestamp, timestamp)
+
+
+class TimelineIndex:
+    def __init__(self, segments=None, frames=None, text_timeline=None):
+        """
+        Time-indexed view over transcript segments, words, OCR spans and frames.
+
+        OCR text is read from a sampled frame, so each OCR span lasts from its
+        frame's timestamp until the next sampled frame.
+
+        :param segments: Transcript timeline from AudioTranscriber.get_transcription_timeline
+        :param frames: Frame metadata from ImageProcessing.sample_frames_by_sharpness
+        :param text_timeline: OCR timeline from TextExtractor.get_text_timeline
+        """
+        segments = segments or []
+        frames = sorted(frames or [], key=lambda f: f['timestamp'])
+        frame_times = [f['timestamp'] for f in frames]
+
+        self.segments = IntervalList(segments)
+
+        words = []
+        for segment in segments:
+            for word in segment.get('words') or []:
+                words.append({
+                    'start': word['start'],
+                    'end': word['end'],
+                    'text': word.get('word', word.get('text', '')).strip()
+                })
+        self.words = IntervalList(words)
+
+        self.frames = IntervalList([
+            {**frame, 'start': t, 'end': self._next_time(frame_times, t)}
+            for frame, t in zip(frames, frame_times)
+        ], half_open=True)
+
+        ocr_spans = []
+        for timestamp, texts in (text_timeline or {}).items():
+            timestamp = float(timestamp)  # JSON reports store keys as strings
+            end = self._next_time(frame_times, timestamp)
+            for text_item in texts:
+                ocr_spans.append({**text_item, 'start': timestamp, 'end': end})
+        self.ocr = IntervalList(ocr_spans, half_open=True)
+
+    @classmethod
+    def from_results(cls, results):
+        """
+        Build an index from a process_video results dict (or its JSON report).
+
+        :param results: Analysis results
+        :return: TimelineIndex
+        """
+        audio = results.get('audio_transcription') or {}
+        return cls(
+            segments=audio.get('timeline', []),
+            frames=results.get('frames', []),
+            text_timeline=results.get('text_timeline', {})
+        )
+
+    @staticmethod
+    def _next_time(sorted_times, timestamp):
+        """End of a frame-sampled span: the next sampled timestamp, or the timestamp itself."""
+        i = bisect_right(sorted_times, timestamp)
+        return sorted_times[i] if i < len(sorted_times) else timestamp
+
+    def window(self, t0, t1):
+        """
+        Everything said and shown between t0 and t1.
+
+        :param t0: Window start in seconds
+        :param t1: Window end in seconds
+        :return: Dict with matching segments, words, OCR spans, frames and joined text
+        """
+        segments = self.segments.overlapping(t0, t1)
+        ocr = self.ocr.overlapping(t0, t1)
+        return {
+            'start': t0,
+            'end': t1,
+            'segments': segments,
+            'words': self.words.overlapping(t0, t1),
+            'ocr': ocr,
+            'frames': self.frames.overlapping(t0, t1),
+            'transcript': ' '.join(s['text'] for s in segments),
+            'ocr_text': ' '.join(dict.fromkeys(o['text'] for o in ocr)),
+        }
+
+    def at(self, timestamp):
+        """Everything said and shown at a single timestamp."""
+        return self.window(timestamp, timestamp)
+
+    def batch_window(self, timestamps, radius=0.0):
+        """
+        Run window queries for many timestamps at once.
+
+        :param timestamps: Iterable of times in seconds
+        :param radius: Seconds of context on each side of every timestamp
+        :return: List of window dicts, aligned with the input order
+        """
+        return [self.window(t - radius, t + radius) for t in timestamps]
+
+    def for_frames(self, radius=0.0):
+        """
+        Window query for every indexed frame timestamp.
+
+        :param radius: Seconds of context on each side of every frame
+        :return: List of (frame, window) tuples in time order
+        """
+        frames = self.frames.items
+        return list(zip(frames, self.batch_window([f['timestamp'] for f in frames], radius)))
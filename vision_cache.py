@@ -0,0 +1,174 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+import torch
+
+
+class VisionEmbeddingCache:
+    def __init__(self, max_memory_mb=256, disk_dir=None, namespace='', device=None, max_disk_mb=2048):
+        """
+        Two-tier cache of vision-encoder outputs, one entry per image.
+
+        Entries are keyed by a hash of the image's preprocessed patches and
+        grid, which are fixed by the frame content and its pixel budget, so the
+        same frame at the same budget maps to the same entry across requests.
+        The memory tier is a byte-bounded LRU; the optional disk tier keeps
+        entries as .pt files, survives restarts, and is pruned oldest-first
+        (by last write or hit) when it grows past max_disk_mb.
+
+        :param max_memory_mb: Memory tier size in MB (0 = disk tier only)
+        :param disk_dir: Directory for the disk tier (None = memory only)
+        :param namespace: Mixed into every key (model name, quantization) so
+                          different encoders never share entries
+        :param device: Device disk entries are loaded onto
+        :param max_disk_mb: Disk tier size in MB (None = unbounded)
+        """
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.disk_dir = disk_dir
+        self.namespace = namespace
+        self.device = device
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024) if max_disk_mb else None
+
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0,
+                      'disk_evictions': 0}
+
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, pixel_values, grid_thw):
+        """
+        Cache key for one image.
+
+        :param pixel_values: The image's flattened patches from the processor
+        :param grid_thw: The image's (t, h, w) patch grid
+        :return: Hex digest
+        """
+        digest = hashlib.sha1(self.namespace.encode('utf-8'))
+        digest.update(str([int(v) for v in grid_thw]).encode('utf-8'))
+        digest.update(pixel_values.detach().cpu().contiguous().flatten().view(torch.uint8).numpy().tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _entry_bytes(entry):
+        embeds, deepstack = entry
+        tensors = [embeds] + list(deepstack or [])
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pt")
+
+    def _disk_files(self):
+        """(path, size, mtime) of every disk entry; other processes may share the directory."""
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pt'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _prune_disk(self):
+        """Delete the least recently written or hit entries until the disk tier is under 90% of its cap."""
+        files = sorted(self._disk_files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_disk_bytes * 0.9)
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                self.stats['disk_evictions'] += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+    def get(self, key):
+        """
+        Look up an entry, promoting disk hits into the memory tier.
+
+        :param key: Key from key()
+        :return: Tuple of (image embeddings, list of deepstack features or None), or None on a miss
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return self._entries[key]
+
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                # Tensors only: a disk entry is never unpickled into arbitrary objects
+                data = torch.load(self._disk_path(key), map_location=self.device, weights_only=True)
+                entry = (data['embeds'], data['deepstack'])
+                # Hits keep an entry at the young end of the pruning order
+                os.utime(self._disk_path(key))
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                    self._store(key, entry)
+                return entry
+            except Exception as e:
+                print(f"Ignoring unreadable vision cache entry {key}: {e}")
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key, embeds, deepstack=None):
+        """
+        Add an entry to the memory tier (and the disk tier when enabled).
+
+        :param key: Key from key()
+        :param embeds: Image embeddings, shape (tokens, hidden)
+        :param deepstack: Optional list of per-layer deepstack features for the image
+        """
+        entry = (embeds.detach(), [layer.detach() for layer in deepstack] if deepstack is not None else None)
+        with self._lock:
+            self._store(key, entry)
+
+        if self.disk_dir and not os.path.exists(self._disk_path(key)):
+            tmp_path = f"{self._disk_path(key)}.{os.getpid()}.tmp"
+            torch.save({
+                'embeds': entry[0].cpu(),
+                'deepstack': [layer.cpu() for layer in entry[1]] if entry[1] is not None else None,
+            }, tmp_path)
+            os.replace(tmp_path, self._disk_path(key))
+
+            if self.max_disk_bytes is not None:
+                with self._lock:
+                    self._disk_bytes += os.path.getsize(self._disk_path(key))
+                    if self._disk_bytes > self.max_disk_bytes:
+                        self._prune_disk()
+
+    def _store(self, key, entry):
+        """Insert into the memory tier and evict least recently used entries. Caller holds the lock."""
+        size = self._entry_bytes(entry)
+        if size > self.max_memory_bytes:
+            return
+        if key in self._entries:
+            self._memory_bytes -= self._entry_bytes(self._entries.pop(key))
+        self._entries[key] = entry
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= self._entry_bytes(evicted)
+            self.stats['evictions'] += 1
+
+    def summary(self):
+        """Hit/miss counters plus current memory tier occupancy."""
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries), 'memory_bytes': self._memory_bytes,
+                    'disk_bytes': self._disk_bytes if self.disk_dir else None}
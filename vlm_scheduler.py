@@ -0,0 +1,247 @@
+"""
+Request scheduler that shares one Qwen3VLModel across concurrent analysis jobs.
+
+Every job thread submits its classification request here instead of calling
+the model directly. A single worker thread owns the model, so jobs never run
+inference concurrently on it, and requests that arrive close together are
+classified as one padded batch. Streamed requests batch like any other:
+each video's verdict and reasoning are forwarded to its own callback as the
+batch decodes.
+"""
+
+import os
+import time
+import weakref
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+
+class _Request:
+    __slots__ = ('video', 'options', 'key', 'exclusive', 'future', 'enqueued_at')
+
+    def __init__(self, video, options):
+        self.video = video
+        self.options = options
+        # Only requests with identical decoding options can share a batch;
+        # exclusive calls always run alone
+        self.exclusive = 'call' in video
+        self.key = ('exclusive', id(self)) if self.exclusive else tuple(sorted(options.items()))
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class VLMScheduler:
+    def __init__(self, vision_model, max_batch_size=4, max_wait_ms=50):
+        """
+        Queue classification requests and run them in dynamic batches.
+
+        :param vision_model: Loaded Qwen3VLModel
+        :param max_batch_size: Maximum videos per batch
+        :param max_wait_ms: How long the oldest request waits for others to join its batch
+        """
+        self.vision_model = vision_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._running = True
+        self._start()
+
+        # A forked worker process inherits this object but not its thread
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.WeakMethod(self._start)
+            os.register_at_fork(after_in_child=lambda: ref() and ref()())
+
+    def _start(self):
+        """Create the queue, metrics and worker thread (again in a forked child)."""
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'requests': 0,
+            'batches': 0,
+            'errors': 0,
+            'total_queue_time': 0.0,
+            'max_queue_time': 0.0,
+            'total_batch_size': 0,
+            'max_batch_size_seen': 0,
+            'prompt_tokens': 0,
+            'generated_tokens': 0,
+            'inference_time': 0.0,
+        }
+
+        if self._running:
+            self._worker = threading.Thread(target=self._run, name="vlm-scheduler", daemon=True)
+            self._worker.start()
+
+    def submit(self, image_paths, title=None, description=None, pixel_budgets=None, on_token=None,
+               **options):
+        """
+        Queue a classification request.
+
+        :param image_paths: List of frame image paths
+        :param title: Video title
+        :param description: Video description
+        :param pixel_budgets: Optional max_pixels per frame (per-video, so not part of the batch key)
+        :param on_token: Optional stream callback (see Qwen3VLModel.classify_video); streamed
+                         requests still share batches with others
+        :param options: Keyword arguments for Qwen3VLModel.classify_video (max_frames, reasoning, ...)
+        :return: Future resolving to (verdict_text, confidence_pct)
+        """
+        request = _Request(
+            {'image_paths': image_paths, 'title': title, 'description': description,
+             'pixel_budgets': pixel_budgets, 'on_token': on_token},
+            options
+        )
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("VLMScheduler has been shut down")
+            self._pending.append(request)
+            self._condition.notify_all()
+        return request.future
+
+    def classify_video(self, image_paths, title=None, description=None, pixel_budgets=None,
+                       on_token=None, **options):
+        """Blocking drop-in for Qwen3VLModel.classify_video that goes through the queue."""
+        return self.submit(image_paths, title, description, pixel_budgets, on_token, **options).result()
+
+    def run_exclusive(self, fn, *args, **kwargs):
+        """
+        Run any other model call on the scheduler thread, between batches.
+
+        :param fn: Callable using the shared model (e.g. vision_model.analyze_flagged_frames)
+        :return: fn's return value
+        """
+        request = _Request({'call': lambda: fn(*args, **kwargs)}, {})
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("VLMScheduler has been shut down")
+            self._pending.append(request)
+            self._condition.notify_all()
+        return request.future.result()
+
+    def _next_batch(self):
+        """Wait for the oldest request, give others up to max_wait to join, then pop a batch."""
+        with self._condition:
+            while self._running and not self._pending:
+                self._condition.wait()
+            if not self._pending:
+                return []
+
+            first = self._pending[0]
+            if first.exclusive:
+                # Nothing can join an exclusive call; run it now
+                return [self._pending.popleft()]
+
+            deadline = first.enqueued_at + self.max_wait
+            while self._running:
+                matching = sum(1 for r in self._pending if r.key == first.key)
+                remaining = deadline - time.perf_counter()
+                if matching >= self.max_batch_size or remaining <= 0:
+                    break
+                self._condition.wait(timeout=remaining)
+
+            batch = []
+            kept = deque()
+            while self._pending:
+                request = self._pending.popleft()
+                if request.key == first.key and len(batch) < self.max_batch_size:
+                    batch.append(request)
+                else:
+                    kept.append(request)
+            self._pending = kept
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            if batch[0].exclusive:
+                # Exclusive calls are not classifications; keep them out of the metrics
+                try:
+                    batch[0].future.set_result(batch[0].video['call']())
+                except Exception as e:
+                    batch[0].future.set_exception(e)
+                continue
+
+            started = time.perf_counter()
+            queue_times = [started - r.enqueued_at for r in batch]
+            options = dict(batch[0].options)
+
+            try:
+                if len(batch) == 1:
+                    video = batch[0].video
+                    outcome, token_stats = self.vision_model.classify_video(
+                        video['image_paths'], video['title'], video['description'],
+                        pixel_budgets=video['pixel_budgets'], on_token=video['on_token'],
+                        return_stats=True, **options
+                    )
+                    outcomes = [outcome]
+                else:
+                    # Token counts cover every pass of this batch, retries included
+                    outcomes, token_stats = self.vision_model.classify_videos(
+                        [r.video for r in batch], return_stats=True, **options
+                    )
+            except Exception as e:
+                outcomes = [e] * len(batch)
+                token_stats = {}
+
+            elapsed = time.perf_counter() - started
+
+            errors = 0
+            for request, outcome in zip(batch, outcomes):
+                if isinstance(outcome, Exception):
+                    errors += 1
+                    request.future.set_exception(outcome)
+                else:
+                    request.future.set_result(outcome)
+
+            with self._metrics_lock:
+                m = self._metrics
+                m['requests'] += len(batch)
+                m['batches'] += 1
+                m['errors'] += errors
+                m['total_queue_time'] += sum(queue_times)
+                m['max_queue_time'] = max(m['max_queue_time'], max(queue_times))
+                m['total_batch_size'] += len(batch)
+                m['max_batch_size_seen'] = max(m['max_batch_size_seen'], len(batch))
+                m['prompt_tokens'] += token_stats.get('prompt_tokens', 0)
+                m['generated_tokens'] += token_stats.get('generated_tokens', 0)
+                m['inference_time'] += elapsed
+
+    def stats(self):
+        """
+        Scheduler metrics.
+
+        :return: Dict with request/batch counts, queue times, batch sizes and tokens/s
+        """
+        with self._metrics_lock:
+            m = dict(self._metrics)
+        with self._condition:
+            queued = len(self._pending)
+
+        return {
+            'queued': queued,
+            'requests': m['requests'],
+            'batches': m['batches'],
+            'errors': m['errors'],
+            'avg_queue_time_ms': 1000 * m['total_queue_time'] / m['requests'] if m['requests'] else 0.0,
+            'max_queue_time_ms': 1000 * m['max_queue_time'],
+            'avg_batch_size': m['total_batch_size'] / m['batches'] if m['batches'] else 0.0,
+            'max_batch_size': m['max_batch_size_seen'],
+            'prompt_tokens': m['prompt_tokens'],
+            'generated_tokens': m['generated_tokens'],
+            'generated_tokens_per_s': m['generated_tokens'] / m['inference_time'] if m['inference_time'] else 0.0,
+            'prompt_tokens_per_s': m['prompt_tokens'] / m['inference_time'] if m['inference_time'] else 0.0,
+        }
+
+    def shutdown(self):
+        """Stop the worker after the current batch; queued requests are cancelled."""
+        with self._condition:
+            self._running = False
+            pending, self._pending = self._pending, deque()
+            self._condition.notify_all()
+        for request in pending:
+            request.future.cancel()